@@ -0,0 +1,293 @@
+"""
+Benchmark suite for deck operations, environment stepping, simulation and
+poker hand evaluation.
+
+Run from the root directory:
+    python benchmarks/run.py
+
+Each run is appended to a JSON history file. With `--compare`, the run is
+checked against a stored baseline, and the script exits with status 1 if any
+metric regressed past `--threshold`.
+"""
+
+### Imports ###
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from cardgames.games import GameBase, GameSimulator, simple_rank_scores
+from cardgames.poker import HandEvaluator
+from cardgames.utils import BitHand, Card, Deck, all_ids, N_CARDS_PER_DECK
+from cardgames.vector import VectorGameEnv
+
+### Constants ###
+results_dir = Path(__file__).parent / "results"
+default_history = results_dir / "history.json"
+
+deck_sizes = [1, 2, 4, 8, 16, 32, 64]
+vector_num_envs = 1024
+episodes_per_call = 1000
+hands_per_call = 2**16
+
+
+### Low-Level Functions ###
+def parse_args():
+    parser = argparse.ArgumentParser(prog="Benchmark cardgames")
+    parser.add_argument(
+        "--history",
+        type=Path,
+        default=default_history,
+        help="JSON file that each run is appended to",
+    )
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        help="Baseline JSON file (a single run, or a history whose last run is used)",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Largest allowed fractional slowdown against the baseline",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        type=Path,
+        help="Write this run to a baseline JSON file",
+    )
+    parser.add_argument(
+        "-k",
+        "--filter",
+        default="",
+        help="Only run benchmarks whose name contains this string",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="Minimum time in seconds spent timing each benchmark",
+    )
+
+    return parser.parse_args()
+
+
+def measure(func, ops_per_call=1, min_time=0.2, repeat=3) -> float:
+    """
+    Operations per second of `func`, which performs `ops_per_call`
+    operations per call. The call count is grown until one timing takes at
+    least `min_time / repeat`, and the best of `repeat` timings is reported.
+    """
+    func()  # Warm up
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeat:
+            break
+        number *= 2
+
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - start)
+
+    return number * ops_per_call / best
+
+
+def git_commit() -> str:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).parent,
+        )
+        return result.stdout.strip()
+    except OSError:
+        return ""
+
+
+### Benchmark Cases ###
+def bench_cards():
+    yield "card_lookup", lambda: [Card(id) for id in all_ids], len(all_ids)
+    yield "deck_init[1]", lambda: Deck(1), 1
+
+
+def bench_decks():
+    for n_decks in deck_sizes:
+        deck = Deck(n_decks, seed=0)
+
+        def deal(deck=deck):
+            if deck.n_cards == 0:
+                deck.reset()
+            deck.deal()
+
+        def deal_codes(deck=deck):
+            if deck.n_cards == 0:
+                deck.reset()
+            deck.deal_codes(1)
+
+        def cut(deck=deck, n_decks=n_decks):
+            deck.reset()
+            deck.cut(10 * n_decks)
+
+        yield f"deck_deal[{n_decks}]", deal, 1
+        yield f"deck_deal_codes[{n_decks}]", deal_codes, 1
+        yield f"deck_cut[{n_decks}]", cut, 1
+        yield f"deck_shuffle[{n_decks}]", deck.shuffle, 1
+
+
+def bench_envs():
+    for name, kwargs in [
+        ("eager", {}),
+        ("lazy", {"lazy_shuffle": True}),
+        ("instrumented", {"instrument": True}),
+        ("counts", {"observation_mode": "counts"}),
+        ("shoe", {"deck_type": "shoe", "max_steps": 10}),
+    ]:
+        env = GameBase(1, simple_rank_scores, **kwargs)
+        env.reset(seed=0)
+
+        def step(env=env):
+            terminated, truncated = env.step(0)[2:4]
+            if terminated or truncated:
+                env.reset()
+
+        yield f"env_step[{name}]", step, 1
+
+    env = GameSimulator(1, simple_rank_scores)
+    env.reset(seed=0)
+    state = env.get_state()
+    yield "env_get_state", env.get_state, 1
+    yield "env_set_state", lambda: env.set_state(state), 1
+    yield "env_clone", env.clone, 1
+
+    envs = VectorGameEnv(vector_num_envs, 1, simple_rank_scores)
+    envs.reset(seed=0)
+    actions = np.zeros(vector_num_envs, dtype=np.int64)
+    yield "vector_env_step", lambda: envs.step(actions), vector_num_envs
+
+
+def bench_simulations():
+    env = GameSimulator(1, simple_rank_scores)
+    env.reset(seed=0)
+    for strategy in GameSimulator.strategies:
+        action_func = getattr(env, strategy)
+        yield f"simulate_run[{strategy}]", lambda f=action_func: env.simulate_run(f), 1
+        yield (
+            f"simulate_many[{strategy}]",
+            lambda s=strategy: env.simulate_many(s, episodes_per_call),
+            episodes_per_call,
+        )
+
+
+def bench_poker():
+    hand_a = BitHand.from_codes(range(0, 14, 2))
+    hand_b = BitHand.from_codes(range(1, 14, 2))
+    yield "bithand_union", lambda: hand_a | hand_b, 1
+
+    # Tables are generated once and cached in the default cache directory
+    evaluator = HandEvaluator()
+    rng = np.random.default_rng(0)
+    deals = np.argsort(rng.random((hands_per_call, N_CARDS_PER_DECK)), axis=1)
+    for n_cards in [5, 7]:
+        hands = deals[:, :n_cards].astype(np.uint8)
+        yield (
+            f"poker_evaluate[{n_cards}]",
+            lambda hands=hands: evaluator.evaluate(hands),
+            hands_per_call,
+        )
+
+
+suites = [bench_cards, bench_decks, bench_envs, bench_simulations, bench_poker]
+
+
+### High-Level Functions ###
+def run_benchmarks(name_filter="", min_time=0.2) -> dict:
+    """
+    Run every benchmark whose name contains `name_filter`, and return a mapping
+    of benchmark name to operations per second.
+    """
+    metrics = {}
+    for suite in suites:
+        for name, func, ops_per_call in suite():
+            if name_filter not in name:
+                continue
+
+            metrics[name] = measure(func, ops_per_call, min_time)
+            print(f"{name:<40} {metrics[name]:>16,.0f} ops/s")
+
+    return metrics
+
+
+def compare(metrics: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Names of metrics slower than `(1 - threshold)` times their baseline.
+    """
+    regressions = []
+    for name, value in metrics.items():
+        if name not in baseline:
+            continue
+
+        ratio = value / baseline[name]
+        status = "REGRESSION" if ratio < 1 - threshold else "ok"
+        print(f"{name:<40} {ratio:>8.2f}x  {status}")
+        if ratio < 1 - threshold:
+            regressions.append(name)
+
+    return regressions
+
+
+def load_run(path: Path) -> dict:
+    """
+    Load a single run, or the last run of a history file.
+    """
+    data = json.loads(path.read_text())
+    return data[-1] if isinstance(data, list) else data
+
+
+def main() -> int:
+    args = parse_args()
+    metrics = run_benchmarks(args.filter, args.min_time)
+    run = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "metrics": metrics,
+    }
+
+    history = json.loads(args.history.read_text()) if args.history.exists() else []
+    history.append(run)
+    args.history.parent.mkdir(parents=True, exist_ok=True)
+    args.history.write_text(json.dumps(history, indent=2))
+
+    if args.save_baseline is not None:
+        args.save_baseline.write_text(json.dumps(run, indent=2))
+
+    if args.compare is not None:
+        print(f"\nComparing against {args.compare}:")
+        regressions = compare(
+            metrics, load_run(args.compare)["metrics"], args.threshold
+        )
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed: {', '.join(regressions)}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,40 @@
 """
 A Python package for card games.
+
+Submodules are imported on first attribute access (PEP 562), so that
+`import cardgames` or `import cardgames.utils` does not load gymnasium or
+plotly.
 """
 
-from pathlib import Path as _Path
-import toml as _toml
+import importlib as _importlib
+
+from cardgames._version import __version__
+
+_submodules = (
+    "agents",
+    "games",
+    "parallel",
+    "planners",
+    "plotting",
+    "poker",
+    "profiling",
+    "replay",
+    "sb3",
+    "solvers",
+    "stats",
+    "utils",
+    "vector",
+)
+
+__all__ = ["__version__", *_submodules]
+
+
+def __getattr__(name):
+    if name in _submodules:
+        return _importlib.import_module(f"cardgames.{name}")
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-_data = _toml.load(_Path(__file__).parent.parent / "pyproject.toml")
-__version__ = _data["project"]["version"]
+def __dir__():
+    return __all__
@@ -0,0 +1,2 @@
+# Kept in sync with pyproject.toml by commitizen (see tool.commitizen.version_files)
+__version__ = "0.2.0"
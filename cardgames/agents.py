@@ -0,0 +1,358 @@
+"""
+Module for tabular reinforcement learning agents trained on vectorized games.
+"""
+
+### Imports ###
+import json
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import numpy as np
+
+from cardgames.games import GameSimulator
+from cardgames.vector import VectorGameEnv
+
+### Constants ###
+# Ways of keying the Q-table by state (see TabularAgent)
+state_types = ("observation", "counts")
+
+
+### Agent Classes ###
+class TabularAgent(ABC):
+    """
+    Temporal-difference agent with a NumPy Q-table, updated in batches from
+    many environments of a `VectorGameEnv` stepped in parallel. Subclasses
+    define the bootstrapped value of the next state.
+    """
+
+    def __init__(
+        self,
+        n_decks: int,
+        rank_scores: dict,
+        n_actions=None,
+        state_type="observation",
+        n_bins=64,
+        learning_rate=None,
+        discount=0.0,
+        epsilon=0.1,
+        reward_func=None,
+        seed=None,
+    ) -> None:
+        """
+        Params
+        ------
+        n_decks : int
+            Number of decks in the shoe
+        rank_scores : dict
+            Mapping of rank to observed score, as for `GameBase`
+        n_actions : int (default = None)
+            Number of actions, as for `GameBase`
+        state_type : str (default = "observation")
+            "observation" keys states by the observed score of the last card.
+            "counts" compresses the remaining rank counts to the mean score of
+            the remaining Cards, in `n_bins` bins between the lowest and
+            highest scores, and trains on "counts" observations.
+        n_bins : int (default = 64)
+            Number of states with `state_type="counts"`
+        learning_rate : float (default = None)
+            Step size towards the mean target of each (state, action) pair in
+            a batch. By default, each Q-value is the running mean of its
+            targets (a step size of one over its number of visits).
+        discount : float (default = 0.0)
+            Discount factor of the bootstrapped next-state value. The cards
+            dealt do not depend on the actions, so the greedy policy is the
+            same for any discount, and 0 learns it with the least variance.
+        epsilon : float (default = 0.1)
+            Probability of a uniformly random action while training
+        reward_func : callable (default = None)
+            Reward function of the environments, as for `GameBase`. It is not
+            saved with `save`.
+        seed : Any (default = None)
+            Seed for exploration and for shuffling the training shoes
+        """
+        if state_type not in state_types:
+            raise ValueError(f"Unknown state_type {state_type!r}.")
+
+        self.n_decks = n_decks
+        self.rank_scores = rank_scores
+        self.state_type = state_type
+        self.n_bins = n_bins
+        self.learning_rate = learning_rate
+        self.discount = discount
+        self.epsilon = epsilon
+        self.reward_func = reward_func
+        self.history = []
+
+        env = GameSimulator(n_decks, rank_scores, n_actions, reward_func=reward_func)
+        self.n_actions = env.n_actions
+        self._rank_score_array = env._rank_score_array
+        self._rng = np.random.default_rng(seed)
+
+        if state_type == "observation":
+            self.n_states = env.n_observations
+        else:
+            self.n_states = n_bins
+            self._low = self._rank_score_array.min()
+            self._bin_width = max(self._rank_score_array.max() - self._low, 1) / n_bins
+
+        self.q_table = np.zeros((self.n_states, self.n_actions))
+        self.visits = np.zeros((self.n_states, self.n_actions), dtype=np.int64)
+
+    @classmethod
+    def load(cls, path, reward_func=None) -> "TabularAgent":
+        """
+        Load an agent saved with `save`.
+        """
+        path = Path(path).with_suffix(".npy")
+        metadata = json.loads(path.with_suffix(".json").read_text())
+        visits = metadata.pop("visits")
+        history = metadata.pop("history")
+
+        agent = cls(**metadata, reward_func=reward_func)
+        agent.q_table = np.load(path)
+        agent.visits = np.array(visits, dtype=np.int64)
+        agent.history = history
+
+        return agent
+
+    def save(self, path) -> None:
+        """
+        Save the Q-table as a `.npy` file, with a `.json` file of the same name
+        holding the settings, visit counts and evaluation history, so that
+        training can resume from a checkpoint.
+        """
+        path = Path(path).with_suffix(".npy")
+        np.save(path, self.q_table)
+        metadata = {
+            "n_decks": self.n_decks,
+            "rank_scores": self.rank_scores,
+            "n_actions": self.n_actions,
+            "state_type": self.state_type,
+            "n_bins": self.n_bins,
+            "learning_rate": self.learning_rate,
+            "discount": self.discount,
+            "epsilon": self.epsilon,
+            "visits": self.visits.tolist(),
+            "history": self.history,
+        }
+        path.with_suffix(".json").write_text(json.dumps(metadata))
+
+    def make_envs(self, num_envs: int) -> VectorGameEnv:
+        """
+        Vector environments matching the agent, with "counts" observations
+        for `state_type="counts"`.
+        """
+        return VectorGameEnv(
+            num_envs,
+            self.n_decks,
+            self.rank_scores,
+            self.n_actions,
+            reward_func=self.reward_func,
+            observation_mode="score" if self.state_type == "observation" else "counts",
+        )
+
+    def states(self, observations) -> np.ndarray:
+        """
+        State index of each observation of a batch.
+        """
+        observations = np.asarray(observations)
+        if self.state_type == "observation":
+            if observations.ndim > 1:
+                observations = observations[..., -1]  # Score of count observations
+            return observations.astype(np.int64)
+
+        counts = observations[..., :-1]
+        return self._mean_states(counts @ self._rank_score_array, counts.sum(axis=-1))
+
+    def greedy_actions(self, states) -> np.ndarray:
+        """
+        Action with the highest Q-value in each state.
+        """
+        return np.argmax(self.q_table[states], axis=-1)
+
+    def train(
+        self,
+        n_steps: int,
+        num_envs=64,
+        envs=None,
+        eval_every=None,
+        eval_episodes=1000,
+        checkpoint=None,
+        seed=None,
+    ) -> list:
+        """
+        Step `num_envs` environments `n_steps` times with epsilon-greedy
+        actions, updating the Q-table once per step from the whole batch of
+        transitions. Episodes are not bootstrapped past their last step.
+
+        Params
+        ------
+        n_steps : int
+            Number of batched steps
+        num_envs : int (default = 64)
+            Number of environments, unless `envs` is given
+        envs : VectorGameEnv (default = None)
+            Environments to train on, e.g. from `make_envs`
+        eval_every : int (default = None)
+            Number of steps between evaluations with `evaluate`. By default,
+            the agent is only evaluated after training.
+        eval_episodes : int (default = 1000)
+            Number of episodes per evaluation
+        checkpoint : str or Path (default = None)
+            Where to `save` the agent after each evaluation
+        seed : Any (default = None)
+            Seed for the training shoes and evaluations
+
+        Returns
+        -------
+        history : list
+            Dicts of "step", "n_transitions" (trained on so far) and
+            "mean_reward" of every evaluation
+        """
+        if envs is None:
+            envs = self.make_envs(num_envs)
+        env_seed, eval_seed = np.random.default_rng(seed).integers(2**63, size=2)
+
+        observations, infos = envs.reset(seed=int(env_seed))
+        states = self.states(observations)
+        actions = self._explore(states)
+        for step in range(1, n_steps + 1):
+            observations, rewards, terminations, truncations, infos = envs.step(actions)
+            next_states = self.states(observations)
+            next_actions = self._explore(next_states)
+
+            # Reset environments start a new episode: no bootstrap
+            values = self._next_values(next_states, next_actions)
+            values[terminations | truncations] = 0
+            self._update(states, actions, rewards + self.discount * values)
+            states, actions = next_states, next_actions
+
+            if (eval_every is not None and step % eval_every == 0) or step == n_steps:
+                self.history.append(
+                    {
+                        "step": step,
+                        "n_transitions": int(self.visits.sum()),
+                        "mean_reward": float(
+                            self.evaluate(eval_episodes, seed=int(eval_seed)).mean()
+                        ),
+                    }
+                )
+                if checkpoint is not None:
+                    self.save(checkpoint)
+
+        return self.history
+
+    def evaluate(self, n_episodes: int, seed=None) -> np.ndarray:
+        """
+        Total rewards of `n_episodes` greedy episodes, simulated on shuffled
+        shoes by `GameSimulator.compare`.
+        """
+        env = GameSimulator(
+            self.n_decks, self.rank_scores, self.n_actions, reward_func=self.reward_func
+        )
+        return env.compare({"agent": self}, n_episodes, seed=seed)["agent"]
+
+    def episode_actions(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Greedy action before each card of a batch of shoes dealt from full,
+        given their card codes with shape `(n_episodes, n_cards)`. Used by
+        `GameSimulator.compare`.
+        """
+        scores = self._rank_score_array[codes >> 2]
+        if self.state_type == "observation":
+            # The last observed score, and 0 as the first dummy observation
+            states = np.zeros_like(scores)
+            states[:, 1:] = scores[:, :-1]
+        else:
+            n_cards = scores.shape[1]
+            dealt = np.cumsum(scores, axis=1) - scores
+            remaining = scores.sum(axis=1, keepdims=True) - dealt
+            states = self._mean_states(remaining, np.arange(n_cards, 0, -1))
+
+        return self.greedy_actions(states)
+
+    def action_func(self, env: GameSimulator):
+        """
+        Action function for `GameSimulator.simulate_run`, acting greedily on
+        the last observed score or the remaining rank counts of `env`.
+        """
+        if self.state_type == "observation":
+
+            def action():
+                score = env._rank_score_list[env.card.rank_index] if env.n_steps else 0
+                return int(np.argmax(self.q_table[score]))
+
+        else:
+
+            def action():
+                counts = env.remaining_rank_counts()
+                return int(self.greedy_actions(self.states(np.append(counts, 0))))
+
+        return action
+
+    # Private methods
+    def _mean_states(self, score_sums, n_cards) -> np.ndarray:
+        """
+        Bin of the mean score of the remaining Cards. Empty decks (terminal
+        observations) fall in the first bin.
+        """
+        means = score_sums / np.maximum(n_cards, 1)
+        bins = np.floor((means - self._low) / self._bin_width).astype(np.int64)
+        return np.clip(bins, 0, self.n_bins - 1)
+
+    def _explore(self, states: np.ndarray) -> np.ndarray:
+        """
+        Epsilon-greedy actions for a batch of states.
+        """
+        actions = self.greedy_actions(states)
+        explore = self._rng.random(len(states)) < self.epsilon
+        actions[explore] = self._rng.integers(
+            0, self.n_actions, size=int(np.count_nonzero(explore))
+        )
+        return actions
+
+    @abstractmethod
+    def _next_values(self, next_states, next_actions) -> np.ndarray:
+        """
+        Bootstrapped value of each next state, given the next actions taken.
+        """
+
+    def _update(self, states, actions, targets) -> None:
+        """
+        Move the Q-value of each (state, action) pair of the batch towards the
+        mean of its targets, so that pairs visited by many environments at
+        once do not overshoot.
+        """
+        pairs = states * self.n_actions + actions
+        q_values = self.q_table.reshape(-1)
+        n_visits = np.bincount(pairs, minlength=q_values.size)
+        errors = np.bincount(
+            pairs, weights=targets - q_values[pairs], minlength=q_values.size
+        )
+
+        visited = n_visits > 0
+        self.visits.reshape(-1)[visited] += n_visits[visited]
+        if self.learning_rate is None:
+            step_sizes = 1 / self.visits.reshape(-1)[visited]
+        else:
+            step_sizes = self.learning_rate / n_visits[visited]
+        q_values[visited] += step_sizes * errors[visited]
+
+
+class QLearning(TabularAgent):
+    """
+    Off-policy Q-learning: bootstraps from the best action of the next state.
+    """
+
+    def _next_values(self, next_states, next_actions) -> np.ndarray:
+        return self.q_table[next_states].max(axis=1)
+
+
+class SARSA(TabularAgent):
+    """
+    On-policy SARSA: bootstraps from the epsilon-greedy action taken in the
+    next state.
+    """
+
+    def _next_values(self, next_states, next_actions) -> np.ndarray:
+        return self.q_table[next_states, next_actions]
@@ -3,62 +3,239 @@ Module containing various card games.
 """
 
 ### Imports ###
+import copy
+import math
+import time
 import numpy as np
 import gymnasium as gym
 from gymnasium import spaces
 
-from cardgames.utils import Card, Hand, Deck, ranks
+from cardgames.utils import (
+    Card,
+    Hand,
+    _clone_generator,
+    Deck,
+    CountDeck,
+    InfiniteDeck,
+    Shoe,
+    ranks,
+    suits,
+    all_codes,
+    N_CARDS_PER_DECK,
+)
+from cardgames.profiling import PhaseStats
+from cardgames.replay import TrajectoryStore, TrajectoryWriter
+from cardgames.stats import RunningStats, difference_half_width
 
 ### Constants ###
 simple_rank_scores = {
     rank: score for rank, score in zip(ranks.keys(), range(len(ranks)))
 }
 
+# Number of dealt cards per chunk in GameSimulator.simulate_many
+_chunk_n_cards = 2**20
+
+# Number of episodes between precision checks for stepped simulations
+_stepped_chunk_size = 1000
+
+# Scalar types looked up directly in the reward table
+_integer_types = (int, np.integer)
+
 
 ### Game Classes ###
 class GameBase(gym.Env):
     """Base Game Environment that follows gym interface."""
 
+    # Observations: the score of the dealt card, or rank counts (see __init__)
+    observation_modes = ("score", "counts", "seen")
+
     def __init__(
         self,
         n_decks: int,
         rank_scores: dict,
         n_actions=None,
+        deck_type="array",
+        max_steps=None,
+        lazy_shuffle=False,
+        instrument=False,
+        reward_func=None,
+        observation_mode="score",
+        penetration=0.75,
     ) -> None:
+        """
+        Params
+        ------
+        n_decks : int or None
+            Number of decks in the shoe. `None` deals from an `InfiniteDeck`
+            (sampling with replacement), which requires `max_steps`.
+        rank_scores : dict
+            Mapping of rank to observed score
+        n_actions : int (default = None)
+            Number of actions. Defaults to the number of ranks.
+        deck_type : str (default = "array")
+            Finite deck backend: "array" for a shuffled `Deck`, "counts" for a
+            `CountDeck` that draws each card from remaining counts, or "shoe"
+            for a `Shoe` that persists across episodes. With a Shoe, an
+            episode ends when the cut card comes out (or after `max_steps`),
+            and the next reset only reshuffles after the cut card.
+        max_steps : int (default = None)
+            Number of steps after which an episode is truncated
+        lazy_shuffle : bool (default = False)
+            Whether an "array" deck is shuffled lazily, one card per step (see
+            `Deck`), which makes `reset` O(1)
+        instrument : bool (default = False)
+            Whether to record call counts and timings of each phase of `reset`
+            and `step`, and deck allocations (see `stats`)
+        reward_func : callable (default = None)
+            Function of `(observation, action)` returning the reward. It is
+            tabulated once over all observations and actions, and only called
+            directly for non-integer actions (e.g. `mean_observation`).
+            Functions of broadcastable arrays are called once per table or
+            batch; scalar-only functions are wrapped with `np.vectorize`.
+            Defaults to `normalized_reward`.
+        observation_mode : str (default = "score")
+            "score" observes the score of the dealt card (`Discrete`).
+            "counts" and "seen" observe a `Box` of the number of remaining
+            (respectively dealt) Cards of each rank, in `ranks` order,
+            followed by the score of the dealt card. The vector is kept in a
+            preallocated float32 buffer updated in O(1) per step, and a
+            read-only view of it is returned, so copy observations that must
+            outlive the next step.
+        penetration : float (default = 0.75)
+            Fraction of a "shoe" dealt before the cut card
+        """
+        if n_decks is None and max_steps is None:
+            raise ValueError("An infinite deck (n_decks=None) needs max_steps.")
+        if deck_type not in ("array", "counts", "shoe"):
+            raise ValueError(f"Unknown deck_type {deck_type!r}.")
+        if observation_mode not in self.observation_modes:
+            raise ValueError(f"Unknown observation_mode {observation_mode!r}.")
+
         self.n_decks = n_decks
         self.rank_scores = rank_scores
+        self.deck_type = deck_type
+        self.max_steps = max_steps
+        self.lazy_shuffle = lazy_shuffle
+        self.observation_mode = observation_mode
+        self.penetration = penetration
+
+        # The deck is built on the first reset and then reused in place
+        self.deck = None
+        self._own_deck = None
+        self._installed_deck = False  # True for a deck passed to reset
+        self._phase_stats = PhaseStats() if instrument else None
 
         super().__init__()
 
         if n_actions is None:
             self.n_actions = len(rank_scores)
+        else:
+            self.n_actions = n_actions
 
+        self.n_observations = len(rank_scores)
         self.action_space = spaces.Discrete(self.n_actions)
-        self.observation_space = spaces.Discrete(len(rank_scores))
+        self.observation_space = self._make_observation_space()
+
+        # Count observations: buffer updated in place, returned as a view
+        if observation_mode == "score":
+            self._count_buffer = None
+        else:
+            self._count_buffer = np.zeros(len(ranks) + 1, dtype=np.float32)
+            self._count_sign = -1 if observation_mode == "counts" else 1
+            self._count_view = self._make_count_view()
+
+        # Rank -> score lookup, indexed by Card.rank_index. The list is used for
+        # scalar lookups in step, the array for batched ones.
+        self._rank_score_array = np.array([rank_scores[rank] for rank in ranks])
+        self._rank_score_list = self._rank_score_array.tolist()
+        self._mean_score = np.mean(self._rank_score_array)
+        if not np.all(
+            (self._rank_score_array >= 0)
+            & (self._rank_score_array < self.n_observations)
+        ):
+            raise ValueError(
+                f"Scores must lie in [0, {self.n_observations}) to be observations."
+            )
+
+        # Reward of every (observation, action) pair, evaluated once. Scalar
+        # functions fail on (or do not broadcast over) arrays, and are
+        # vectorized for batched calls instead.
+        self.reward_func = (
+            self.normalized_reward if reward_func is None else reward_func
+        )
+        self._array_reward_func = self.reward_func
+        table_shape = (self.n_observations, self.n_actions)
+        grid = (
+            np.arange(self.n_observations)[:, None],
+            np.arange(self.n_actions)[None, :],
+        )
+        try:
+            table = np.asarray(self.reward_func(*grid), dtype=np.float64)
+            table = np.broadcast_to(table, table_shape)
+        except (TypeError, ValueError):
+            self._array_reward_func = np.vectorize(
+                self.reward_func, otypes=[np.float64]
+            )
+            table = self._array_reward_func(*grid)
+        self._reward_table = np.array(table)
+        self._reward_rows = self._reward_table.tolist()
 
     def normalize_action(self, val: int) -> float:
         mean = (self.action_space.n - 1) / 2
         return (val - mean) / mean
 
     def normalize_observation(self, val: int) -> float:
-        mean = (self.observation_space.n - 1) / 2
+        mean = (self.n_observations - 1) / 2
         return (val - mean) / mean
 
-    def reward(self, observation: int, action: int) -> float:
+    def normalized_reward(self, observation, action):
         obs_norm = self.normalize_observation(observation)
         action_norm = self.normalize_action(action)
 
         return 1 - abs(obs_norm - action_norm) / 2
 
+    def reward(self, observation, action):
+        """
+        Reward of `action` given `observation`, as scalars or broadcastable
+        arrays. Integer inputs are looked up in the reward table; others are
+        passed to `reward_func`. Integer actions must lie in
+        `[0, n_actions)`.
+        """
+        if isinstance(observation, _integer_types):
+            if isinstance(action, _integer_types):
+                if not 0 <= action < self.n_actions:
+                    raise ValueError(
+                        f"Action {action} is not in [0, {self.n_actions})."
+                    )
+                return self._reward_rows[observation][action]
+            if isinstance(action, float):
+                return self.reward_func(observation, action)
+
+        observation = np.asarray(observation)
+        action = np.asarray(action)
+        if observation.dtype.kind in "iu" and action.dtype.kind in "iu":
+            if action.size and (action.min() < 0 or action.max() >= self.n_actions):
+                raise ValueError(f"Actions must lie in [0, {self.n_actions}).")
+            return self._reward_table[observation, action]
+
+        return self._array_reward_func(observation, action)
+
     def step(self, action):
+        if self._phase_stats is not None:
+            return self._step_instrumented(action)
+
         self.card = self.deck.deal()[0]  # Deal a single card and store it
-        observation = self.rank_scores[self.card.rank]
+        observation = self._rank_score_list[self.card.rank_index]
+        self.n_steps += 1
 
         terminated = bool(self.deck.n_cards == 0)
-        truncated = False
+        truncated = self.max_steps is not None and self.n_steps >= self.max_steps
         reward = self.reward(observation, action)
         info = {}
 
+        if self._count_buffer is not None:
+            observation = self._observe_counts(observation)
+
         return (
             observation,
             reward,
@@ -68,10 +245,42 @@ class GameBase(gym.Env):
         )
 
     def reset(self, seed=None, options=None):
-        self.deck = Deck(self.n_decks, seed)
+        stats = self._phase_stats
+        if stats is not None:
+            start = time.perf_counter()
+
+        # Seeds self.np_random when a seed is passed (gymnasium-style)
+        super().reset(seed=seed)
+
+        if options is not None and "deck" in options:
+            # Deal from a given deck (e.g. a ReplayDeck) from now on
+            self.deck = self._own_deck = options["deck"]
+            self._installed_deck = True
+        elif (
+            self.deck is not None
+            and self.deck is self._own_deck
+            and (seed is None or self._installed_deck)
+        ):
+            # Reuse the deck storage in place. Seeded resets build a new deck,
+            # so that the same seed always deals the same cards, unless the
+            # deck was passed to reset: the seed then only seeds np_random.
+            self.deck.reset()
+        else:
+            self.deck = self._make_deck()
+            self._own_deck = self.deck
+            self._installed_deck = False
+            if stats is not None:
+                stats.deck_allocations += 1
         self.deck.shuffle()
+        self.n_steps = 0
 
         observation = 0  # 0 as first dummy observation
+        if self._count_buffer is not None:
+            observation = self._reset_counts()
+
+        if stats is not None:
+            stats.add("reset", time.perf_counter() - start)
+
         return observation, {}  # Empty info dict
 
     def render(self):
@@ -80,45 +289,714 @@ class GameBase(gym.Env):
     def close(self):
         pass
 
+    def get_state(self) -> tuple:
+        """
+        Snapshot of the episode: the deck state (see `Deck.get_state`), step
+        count, current card, environment generator state and count
+        observation. The snapshot is a small, picklable tuple of arrays and
+        ints.
+        """
+        rng_state = None
+        if self._np_random is not None and self._np_random is not getattr(
+            self.deck, "_rng", None
+        ):
+            rng_state = self._np_random.bit_generator.state
+
+        card = getattr(self, "card", None)
+        return (
+            self.deck.get_state(),
+            self.n_steps,
+            None if card is None else card.code,
+            rng_state,
+            None if self._count_buffer is None else self._count_buffer.copy(),
+        )
+
+    def set_state(self, state: tuple) -> None:
+        """
+        Restore a snapshot from `get_state` of an environment with the same
+        settings. This is a copy of the deck's code array at most.
+        """
+        deck_state, self.n_steps, card_code, rng_state, counts = state
+        self.deck.set_state(deck_state)
+        self.card = None if card_code is None else Card.from_code(card_code)
+        if rng_state is not None:
+            self._np_random.bit_generator.state = rng_state
+        if counts is not None:
+            np.copyto(self._count_buffer, counts)
+
+    def clone(self) -> "GameBase":
+        """
+        Independent copy of the environment in its current state, e.g. to
+        branch an episode for lookahead search. Lookup tables and spaces are
+        shared; the deck and generators are copied.
+        """
+        env = copy.copy(self)
+        if self.deck is not None:
+            env.deck = self.deck.clone()
+            if self.deck is self._own_deck:
+                env._own_deck = env.deck
+        if self._np_random is not None:
+            # Decks built by the env share its generator (see _make_deck)
+            if self._np_random is getattr(self.deck, "_rng", None):
+                env._np_random = getattr(env.deck, "_rng")
+            else:
+                env._np_random = _clone_generator(self._np_random)
+        if self._phase_stats is not None:
+            env._phase_stats = PhaseStats()
+        if self._count_buffer is not None:
+            env._count_buffer = self._count_buffer.copy()
+            env._count_view = env._make_count_view()
+
+        return env
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the call counts, cumulative and mean timings (in seconds)
+        of the "reset", "deal", "observe", "reward" and "step" phases, and of
+        the number of decks allocated. Requires `instrument=True`.
+        """
+        if self._phase_stats is None:
+            raise RuntimeError("Instrumentation is disabled; pass instrument=True.")
+
+        return self._phase_stats.snapshot()
+
+    def clear_stats(self) -> None:
+        if self._phase_stats is not None:
+            self._phase_stats.clear()
+
+    def _step_instrumented(self, action):
+        """
+        `step`, timing each phase. Kept separate so that uninstrumented
+        environments only pay for a single attribute check.
+        """
+        stats = self._phase_stats
+        clock = time.perf_counter
+
+        start = clock()
+        self.card = self.deck.deal()[0]
+        dealt = clock()
+        score = self._rank_score_list[self.card.rank_index]
+        observation = score
+        if self._count_buffer is not None:
+            observation = self._observe_counts(score)
+        observed = clock()
+        self.n_steps += 1
+
+        terminated = bool(self.deck.n_cards == 0)
+        truncated = self.max_steps is not None and self.n_steps >= self.max_steps
+        rewarded = clock()
+        reward = self.reward(score, action)
+        stop = clock()
+
+        stats.add("deal", dealt - start)
+        stats.add("observe", observed - dealt)
+        stats.add("reward", stop - rewarded)
+        stats.add("step", stop - start)
+
+        return observation, reward, terminated, truncated, {}
+
+    def _make_observation_space(self):
+        if self.observation_mode == "score":
+            return spaces.Discrete(self.n_observations)
+
+        if self.observation_mode == "counts" or self.n_decks is not None:
+            max_count = len(suits) * (1 if self.n_decks is None else self.n_decks)
+        else:
+            max_count = self.max_steps  # Dealt cards of a rank, with replacement
+        high = np.full(len(ranks) + 1, max_count, dtype=np.float32)
+        high[-1] = self.n_observations - 1
+
+        return spaces.Box(0, high, dtype=np.float32)
+
+    def _make_count_view(self) -> np.ndarray:
+        view = self._count_buffer.view()
+        view.flags.writeable = False
+        return view
+
+    def _reset_counts(self) -> np.ndarray:
+        """
+        Fill the count observation for a new episode: the rank counts of the
+        deck, or for "seen" the Cards dealt since the last shuffle of a `Shoe`
+        (zeros otherwise), and 0 as the dummy dealt score.
+        """
+        if self._count_sign < 0:
+            self._count_buffer[:-1] = self.deck.rank_counts()
+        elif hasattr(self.deck, "dealt_rank_counts"):
+            self._count_buffer[:-1] = self.deck.dealt_rank_counts()
+        else:
+            self._count_buffer[:-1] = 0
+        self._count_buffer[-1] = 0
+
+        return self._count_view
+
+    def _observe_counts(self, score: int) -> np.ndarray:
+        """
+        Count the dealt card in place and return the observation view.
+        """
+        buffer = self._count_buffer
+        buffer[self.card.rank_index] += self._count_sign
+        buffer[-1] = score
+
+        return self._count_view
+
+    def _make_deck(self):
+        """
+        Build the deck for this environment, dealing with `self.np_random`.
+        """
+        if self.n_decks is None:
+            return InfiniteDeck(self.np_random)
+        if self.deck_type == "counts":
+            return CountDeck(self.n_decks, self.np_random)
+        if self.deck_type == "shoe":
+            return Shoe(self.n_decks, self.np_random, penetration=self.penetration)
+        return Deck(self.n_decks, self.np_random, lazy=self.lazy_shuffle)
+
 
 class GameSimulator(GameBase):
+    # Built-in strategies, usable by name in simulate_many
+    strategies = ("random", "mean_observation", "expected_observation")
+
     def __init__(
         self,
         n_decks: int,
         rank_scores: dict,
         n_actions=None,
+        deck_type="array",
+        max_steps=None,
+        lazy_shuffle=False,
+        instrument=False,
+        reward_func=None,
+        observation_mode="score",
+        penetration=0.75,
     ):
-        super().__init__(n_decks, rank_scores, n_actions)
+        super().__init__(
+            n_decks,
+            rank_scores,
+            n_actions,
+            deck_type,
+            max_steps,
+            lazy_shuffle,
+            instrument,
+            reward_func,
+            observation_mode,
+            penetration,
+        )
+
+        # Running statistics of the remaining deck, updated in step and reset
+        self._stats_deck = None
+        self._rank_counts = np.zeros(len(ranks), dtype=np.int64)
+        self._n_remaining = 0
+        self._score_sum = 0
+        self._depleting = True  # False for an InfiniteDeck
+
+    def step(self, action):
+        results = super().step(action)
+
+        if self._depleting:
+            rank_index = self.card.rank_index
+            self._rank_counts[rank_index] -= 1
+            self._n_remaining -= 1
+            self._score_sum -= self._rank_score_array[rank_index]
+
+        return results
+
+    def reset(self, seed=None, options=None):
+        results = super().reset(seed=seed, options=options)
+        self._sync_deck_stats()
+
+        return results
+
+    def get_state(self) -> tuple:
+        return super().get_state(), self._rank_counts.copy(), self._n_remaining
+
+    def set_state(self, state: tuple) -> None:
+        base_state, rank_counts, self._n_remaining = state
+        super().set_state(base_state)
+        np.copyto(self._rank_counts, rank_counts)
+        self._score_sum = self._rank_counts @ self._rank_score_array
+        self._stats_deck = self.deck
+
+    def clone(self) -> "GameSimulator":
+        env = super().clone()
+        env._rank_counts = self._rank_counts.copy()
+        if self._stats_deck is self.deck:
+            env._stats_deck = env.deck
+
+        return env
 
     def observation_distribution(self):
-        ranks = [card.rank for card in self.deck.cards]
-        observations = [self.rank_scores[rank] for rank in ranks]
+        """
+        Observed score of each remaining Card, in dealing order. For a Shoe,
+        the unseen Cards (including those behind the cut card) by rank, so
+        that the cut card is not revealed.
+        """
+        self._check_deck_stats()
+        if isinstance(self.deck, Shoe):
+            return np.repeat(self._rank_score_array, self._rank_counts)
+        return self._rank_score_array[self.deck.codes >> 2]
 
-        return np.array(observations)
+    def remaining_rank_counts(self):
+        """
+        Number of Cards of each rank remaining in the deck, in `ranks` order.
+        """
+        self._check_deck_stats()
+        return self._rank_counts.copy()
 
     def random(self):
-        return self.deck._rng.integers(0, self.n_actions)
+        return self.np_random.integers(0, self.n_actions)
 
     def expected_observation(self):
-        return np.mean(self.observation_distribution())
+        self._check_deck_stats()
+        return self._score_sum / self._n_remaining
 
     def mean_observation(self):
-        return np.mean(list(self.rank_scores.values()))
+        return self._mean_score
 
     def simulate_run(self, action_func, seed=None, verbose=False):
         self.reset(seed=seed)
-        n_cards = self.deck.n_cards
+        terminated = truncated = False
         score_rank = {v: k for k, v in self.rank_scores.items()}
 
         rewards = []
-        while n_cards > 0:
+        while not (terminated or truncated):
             action = action_func()
             tup = self.step(action)
             rewards.append(tup[1])  # Add current reward to rewards
-            n_cards = self.deck.n_cards
+            terminated, truncated = tup[2], tup[3]
 
             if verbose == True:
                 self.render()
                 print(f"Player guessed {score_rank[action]}\n")
 
         return np.array(rewards, dtype=np.float64)
+
+    def simulate_many(self, strategy, n_episodes: int, seed=None, chunk_size=None):
+        """
+        Simulate `n_episodes` full episodes of a built-in strategy with array
+        operations instead of stepping the environment.
+
+        Episodes are processed in chunks of `chunk_size` shuffled shoes, so
+        memory is bounded by the chunk size rather than by `n_episodes`.
+
+        Params
+        ------
+        strategy : str or method
+            One of `GameSimulator.strategies` ("random", "mean_observation",
+            "expected_observation"), or the corresponding bound method
+        n_episodes : int
+            Number of episodes to simulate
+        seed : Any (default = None)
+            Seed for shuffling decks and drawing random actions
+        chunk_size : int (default = None)
+            Number of episodes per chunk. By default, chunks hold about
+            `2**20` dealt cards.
+
+        Returns
+        -------
+        rewards : np.ndarray
+            Total reward of each episode, with shape `(n_episodes,)`
+        """
+        name = self._strategy_name(strategy)
+        rng = np.random.default_rng(seed)
+        if chunk_size is None:
+            chunk_size = max(1, _chunk_n_cards // self._episode_length())
+
+        rewards = np.empty(n_episodes, dtype=np.float64)
+        for start in range(0, n_episodes, chunk_size):
+            stop = min(start + chunk_size, n_episodes)
+            rewards[start:stop] = self._episode_totals(name, rng, stop - start)
+
+        return rewards
+
+    def compare(self, strategies, n_episodes: int, seed=None, chunk_size=None):
+        """
+        Simulate several strategies on the same shuffled shoes (common random
+        numbers). Each chunk of shoes is shuffled once and replayed against
+        every strategy, so per-episode rewards are paired and differences
+        between strategies have much lower variance than with independent
+        shoes.
+
+        Params
+        ------
+        strategies : list or dict
+            Built-in strategies (see `simulate_many`) or policy tables with an
+            `episode_actions(codes)` method, such as `OptimalPolicy`. A dict
+            maps result names to strategies.
+        n_episodes : int
+            Number of episodes to simulate
+        seed : Any (default = None)
+            Seed for shuffling decks and drawing random actions. Shoes only
+            depend on the seed, not on which strategies are compared.
+        chunk_size : int (default = None)
+            Number of episodes per chunk, as for `simulate_many`
+
+        Returns
+        -------
+        rewards : dict
+            Total reward of each episode, with shape `(n_episodes,)`, for each
+            strategy name
+        """
+        if not isinstance(strategies, dict):
+            strategies = {self._strategy_key(s): s for s in strategies}
+        names = {}  # Built-in strategy names, or None for policy tables
+        for key, strategy in strategies.items():
+            if hasattr(strategy, "episode_actions"):
+                names[key] = None
+            else:
+                names[key] = self._strategy_name(strategy)
+
+        deck_rng, action_rng = np.random.default_rng(seed).spawn(2)
+        if chunk_size is None:
+            chunk_size = max(1, _chunk_n_cards // self._episode_length())
+
+        rewards = {key: np.empty(n_episodes, dtype=np.float64) for key in strategies}
+        for start in range(0, n_episodes, chunk_size):
+            stop = min(start + chunk_size, n_episodes)
+            codes = self._shuffled_codes(deck_rng, stop - start)
+            observations = self._rank_score_array[codes >> 2]
+
+            for key, strategy in strategies.items():
+                if names[key] is None:
+                    episode_rewards = self._policy_rewards(
+                        strategy, codes, observations
+                    )
+                else:
+                    episode_rewards = self._episode_rewards(
+                        observations, names[key], action_rng
+                    )
+                rewards[key][start:stop] = episode_rewards.sum(axis=1)
+
+        return rewards
+
+    def record(self, path, n_episodes: int, strategy=None, seed=None, chunk_size=None):
+        """
+        Shuffle `n_episodes` shoes and append them to a trajectory store, so
+        they can be replayed with `ReplayDeck` (pass
+        `options={"deck": ReplayDeck(path)}` to `reset`).
+
+        Params
+        ------
+        path : str or Path
+            Directory of the store, created or appended to
+        n_episodes : int
+            Number of shoes to record
+        strategy : str or method (default = None)
+            Built-in strategy (see `simulate_many`) whose per-step actions and
+            rewards on each shoe are recorded too. By default, only the shoes
+            are recorded. "random" actions are stored with the smallest
+            integer dtype that holds them, others as floats.
+        seed : Any (default = None)
+            Seed for shuffling decks and drawing random actions
+        chunk_size : int (default = None)
+            Number of episodes shuffled at a time, as for `simulate_many`
+
+        Returns
+        -------
+        store : TrajectoryStore
+            The store, opened read-only
+        """
+        name = None if strategy is None else self._strategy_name(strategy)
+        rng = np.random.default_rng(seed)
+        n_steps = self._episode_length()
+        if chunk_size is None:
+            chunk_size = max(1, _chunk_n_cards // n_steps)
+
+        n_cards = n_steps if self.n_decks is None else self.n_decks * N_CARDS_PER_DECK
+        # Discrete actions are stored compactly; mean-based ones are floats
+        action_dtype = None
+        if name == "random":
+            action_dtype = np.min_scalar_type(self.n_actions - 1)
+        elif name is not None:
+            action_dtype = np.float64
+        with TrajectoryWriter(
+            path, n_cards, n_steps, name is not None, action_dtype=action_dtype
+        ) as writer:
+            for start in range(0, n_episodes, chunk_size):
+                codes = self._shuffled_codes(rng, min(chunk_size, n_episodes - start))
+                if name is None:
+                    writer.append(codes)
+                    continue
+
+                observations = self._rank_score_array[codes >> 2]
+                actions = self._episode_actions(observations, name, rng)
+                actions = np.broadcast_to(actions, observations.shape)[:, :n_steps]
+                rewards = self.reward(observations[:, :n_steps], actions)
+                writer.append(codes, actions, rewards)
+
+        return TrajectoryStore(path)
+
+    def simulate_stats(
+        self,
+        strategy,
+        max_episodes: int,
+        seed=None,
+        precision=None,
+        confidence=0.95,
+        chunk_size=None,
+        stats=None,
+    ) -> RunningStats:
+        """
+        Simulate up to `max_episodes` episodes and accumulate their total
+        rewards in a `RunningStats`, without keeping per-episode arrays.
+
+        Built-in strategies are simulated in chunks with array operations, as
+        in `simulate_many`; other action functions are stepped with
+        `simulate_run`. After each chunk, simulation stops early once the
+        confidence interval of the mean total reward is narrower than
+        `precision`.
+
+        Params
+        ------
+        strategy : str or callable
+            A built-in strategy (see `simulate_many`), or an action function
+            as for `simulate_run`
+        max_episodes : int
+            Largest number of episodes to simulate
+        seed : Any (default = None)
+            Seed for shuffling decks and drawing random actions
+        precision : float (default = None)
+            Target half-width of the confidence interval of the mean. By
+            default, all `max_episodes` episodes are simulated.
+        confidence : float (default = 0.95)
+            Confidence level of the interval
+        chunk_size : int (default = None)
+            Number of episodes between precision checks, as for
+            `simulate_many`
+        stats : RunningStats (default = None)
+            Accumulator to add to. By default, a new one with a histogram over
+            the range of possible totals is created.
+
+        Returns
+        -------
+        stats : RunningStats
+            Statistics of the total reward of each simulated episode
+        """
+        rng = np.random.default_rng(seed)
+        if stats is None:
+            stats = self._new_stats()
+
+        for totals in self._stream_totals(strategy, max_episodes, rng, chunk_size):
+            stats.update(totals)
+            if precision is not None and stats.half_width(confidence) <= precision:
+                break
+
+        return stats
+
+    def simulate_difference(
+        self,
+        strategy_a,
+        strategy_b,
+        max_episodes: int,
+        seed=None,
+        precision=None,
+        confidence=0.95,
+        chunk_size=None,
+    ) -> tuple:
+        """
+        Simulate two strategies on independent decks, alternating chunks of
+        episodes, until the confidence interval of the difference of their
+        mean total rewards is narrower than `precision` or each strategy has
+        run `max_episodes` episodes. Parameters are as for `simulate_stats`.
+
+        Returns
+        -------
+        stats_a, stats_b : RunningStats
+            Statistics of the total rewards of each strategy
+        """
+        rng_a, rng_b = np.random.default_rng(seed).spawn(2)
+        stats_a, stats_b = self._new_stats(), self._new_stats()
+
+        chunks = zip(
+            self._stream_totals(strategy_a, max_episodes, rng_a, chunk_size),
+            self._stream_totals(strategy_b, max_episodes, rng_b, chunk_size),
+        )
+        for totals_a, totals_b in chunks:
+            stats_a.update(totals_a)
+            stats_b.update(totals_b)
+            if (
+                precision is not None
+                and difference_half_width(stats_a, stats_b, confidence) <= precision
+            ):
+                break
+
+        return stats_a, stats_b
+
+    # Private methods
+    def _sync_deck_stats(self):
+        """
+        Rebuild the running statistics from the current deck.
+        """
+        self._stats_deck = self.deck
+        self._rank_counts = self.deck.rank_counts().astype(np.int64)
+        self._n_remaining = int(self._rank_counts.sum())
+        self._score_sum = self._rank_counts @ self._rank_score_array
+        self._depleting = math.isfinite(self.deck.n_cards)
+
+    def _check_deck_stats(self):
+        """
+        Resync the running statistics if the deck was replaced since the last
+        reset (e.g. by assigning a Hand to `deck` directly).
+        """
+        if self._stats_deck is not self.deck:
+            self._sync_deck_stats()
+
+    def _strategy_name(self, strategy) -> str:
+        """
+        Name of a built-in strategy, given by name or as a bound method.
+        """
+        name = getattr(strategy, "__name__", strategy)
+        if name not in self.strategies:
+            raise ValueError(
+                f"Unknown strategy {strategy!r}. " f"Expected one of {self.strategies}."
+            )
+
+        return name
+
+    def _episode_length(self) -> int:
+        """
+        Number of steps in an episode.
+        """
+        if self.n_decks is None:
+            return self.max_steps
+        if self.max_steps is None:
+            return self._n_playable_cards()
+        return min(self.max_steps, self._n_playable_cards())
+
+    def _n_playable_cards(self) -> int:
+        """
+        Number of cards dealt from a fresh shoe before the deck runs out, or
+        before the cut card of a "shoe" comes out.
+        """
+        n_cards = self.n_decks * N_CARDS_PER_DECK
+        if self.deck_type == "shoe":
+            return max(round(self.penetration * n_cards), 1)  # As in Shoe
+        return n_cards
+
+    def _strategy_key(self, strategy) -> str:
+        """
+        Name of a strategy in the results of `compare`.
+        """
+        if isinstance(strategy, str):
+            return strategy
+        return getattr(strategy, "__name__", type(strategy).__name__)
+
+    def _policy_rewards(self, policy, codes, observations) -> np.ndarray:
+        """
+        Per-step rewards of a policy table (e.g. `OptimalPolicy`) for a batch
+        of episodes, given their card codes and observations.
+        """
+        if (policy.n_decks, policy.rank_scores) != (self.n_decks, self.rank_scores):
+            raise ValueError("The policy was solved for a different shoe.")
+
+        actions = policy.episode_actions(codes)
+        return self.reward(observations, actions)[:, : self._episode_length()]
+
+    def _new_stats(self) -> RunningStats:
+        """
+        Accumulator for episode totals, with a histogram bin per unit of reward
+        over the range of possible totals.
+        """
+        n_steps = self._episode_length()
+        low = min(self._reward_table.min(), 0) * n_steps
+        high = max(self._reward_table.max(), 1) * n_steps
+        bins = max(1, min(int(np.ceil(high - low)), 100_000))
+
+        return RunningStats((low, high), bins)
+
+    def _episode_totals(self, name: str, rng, n_episodes: int) -> np.ndarray:
+        """
+        Total rewards of `n_episodes` episodes of a built-in strategy.
+        """
+        observations = self._shuffled_observations(rng, n_episodes)
+        return self._episode_rewards(observations, name, rng).sum(axis=1)
+
+    def _stream_totals(self, strategy, max_episodes: int, rng, chunk_size=None):
+        """
+        Yield total rewards of `max_episodes` episodes of `strategy`, one chunk
+        of episodes at a time.
+        """
+        name = getattr(strategy, "__name__", strategy)
+        if name in self.strategies:
+            if chunk_size is None:
+                chunk_size = max(1, _chunk_n_cards // self._episode_length())
+            for start in range(0, max_episodes, chunk_size):
+                n_episodes = min(chunk_size, max_episodes - start)
+                yield self._episode_totals(name, rng, n_episodes)
+            return
+
+        if not callable(strategy):
+            self._strategy_name(strategy)  # Raises for unknown names
+        if chunk_size is None:
+            chunk_size = _stepped_chunk_size
+
+        # Seed the deck once, then keep dealing from its random stream
+        seed = int(rng.integers(2**63))
+        for start in range(0, max_episodes, chunk_size):
+            n_episodes = min(chunk_size, max_episodes - start)
+            totals = np.empty(n_episodes, dtype=np.float64)
+            for i in range(n_episodes):
+                totals[i] = self.simulate_run(strategy, seed=seed).sum()
+                seed = None
+            yield totals
+
+    def _shuffled_codes(self, rng, n_episodes: int) -> np.ndarray:
+        """
+        Card codes of `n_episodes` independently shuffled shoes, with shape
+        `(n_episodes, n_decks * N_CARDS_PER_DECK)`. For an infinite deck,
+        `max_steps` cards are drawn i.i.d. for each episode instead.
+
+        Each shoe is dealt from full, so a "shoe" deck whose episodes end at
+        `max_steps` before the cut card (and resume from the same shoe) is
+        rejected.
+        """
+        if self.n_decks is None:
+            return rng.integers(
+                0, N_CARDS_PER_DECK, size=(n_episodes, self.max_steps), dtype=np.uint8
+            )
+        if (
+            self.deck_type == "shoe"
+            and self._episode_length() < self._n_playable_cards()
+        ):
+            raise ValueError(
+                "Episodes of a shoe must run to the cut card to be simulated "
+                "with array operations; step it with simulate_run instead."
+            )
+
+        full_deck = np.tile(all_codes, self.n_decks)
+        return rng.permuted(
+            np.broadcast_to(full_deck, (n_episodes, full_deck.size)), axis=1
+        )
+
+    def _shuffled_observations(self, rng, n_episodes: int) -> np.ndarray:
+        """
+        Observations of `n_episodes` shoes shuffled by `_shuffled_codes`.
+        """
+        return self._rank_score_array[self._shuffled_codes(rng, n_episodes) >> 2]
+
+    def _episode_actions(self, observations, name: str, rng):
+        """
+        Actions of a built-in strategy before each step of a batch of episodes,
+        given their observations with shape `(n_episodes, n_cards)`. Constant
+        actions are returned as a scalar.
+        """
+        if name == "random":
+            return rng.integers(0, self.n_actions, size=observations.shape)
+        if name == "mean_observation" or self.n_decks is None:
+            # The remaining cards of an infinite deck always match one deck
+            return self.mean_observation()
+
+        # Mean of the cards remaining before each step is dealt
+        n_cards = observations.shape[1]
+        dealt = np.cumsum(observations, axis=1) - observations
+        remaining = observations.sum(axis=1, keepdims=True) - dealt
+        return remaining / np.arange(n_cards, 0, -1)
+
+    def _episode_rewards(self, observations, name: str, rng) -> np.ndarray:
+        """
+        Per-step rewards of a built-in strategy for a batch of episodes, given
+        their observations with shape `(n_episodes, n_cards)`. Episodes are
+        truncated to `max_steps`.
+        """
+        actions = self._episode_actions(observations, name, rng)
+        n_steps = self._episode_length()
+        return self.reward(observations, actions)[:, :n_steps]
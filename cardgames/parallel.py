@@ -0,0 +1,110 @@
+"""
+Module for running card game simulations across processes.
+"""
+
+### Imports ###
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from cardgames.games import GameSimulator
+
+### Constants ###
+# Number of episodes per shard. Shards, not workers, own the random streams,
+# so results only depend on the shard size.
+default_shard_size = 4096
+max_shard_size = 100_000
+
+# GameSimulator settings forwarded to workers, besides "strategy" and "seed"
+_env_keys = (
+    "n_decks",
+    "rank_scores",
+    "n_actions",
+    "deck_type",
+    "max_steps",
+    "lazy_shuffle",
+    "reward_func",
+    "observation_mode",
+    "penetration",
+)
+
+
+### Low-Level Functions ###
+def _run_shard(config: dict, n_episodes: int, seed) -> np.ndarray:
+    env = GameSimulator(**{key: config[key] for key in _env_keys if key in config})
+    return env.simulate_many(config["strategy"], n_episodes, seed=seed)
+
+
+def _shard_lengths(n_episodes: int, shard_size=None) -> list:
+    """
+    Number of episodes of each shard, of `shard_size` episodes (by default
+    `default_shard_size`) capped at `max_shard_size`.
+    """
+    if shard_size is None:
+        shard_size = default_shard_size
+    shard_size = min(shard_size, max_shard_size)
+
+    n_shards = -(-n_episodes // shard_size)  # Ceiling division
+    return [min(shard_size, n_episodes - i * shard_size) for i in range(n_shards)]
+
+
+### High-Level Functions ###
+def run_simulations(
+    config: dict,
+    n_episodes: int,
+    workers=None,
+    shard_size=None,
+) -> np.ndarray:
+    """
+    Simulate `n_episodes` episodes of a built-in `GameSimulator` strategy on a
+    process pool, and return the total reward of each episode.
+
+    Episodes are split into shards of `shard_size` episodes. Each shard gets an
+    independent random stream from `np.random.SeedSequence(seed).spawn`, and
+    results are merged in shard order, so the output is bit-for-bit identical
+    for any number of workers.
+
+    Params
+    ------
+    config : dict
+        Simulation settings with keys "n_decks", "rank_scores" and "strategy"
+        (a name in `GameSimulator.strategies`), optional "seed", and other
+        optional `GameSimulator` arguments ("n_actions", "deck_type",
+        "max_steps", "reward_func", ...). A "reward_func" must be picklable.
+    n_episodes : int
+        Number of episodes to simulate
+    workers : int (default = None)
+        Number of worker processes. Defaults to `os.cpu_count()`. With one
+        worker, shards are run in the current process.
+    shard_size : int (default = None)
+        Number of episodes per shard, at most `max_shard_size`. Defaults to
+        `default_shard_size`. Results depend on the shard size, but not on
+        `workers`.
+
+    Returns
+    -------
+    rewards : np.ndarray
+        Total reward of each episode, with shape `(n_episodes,)`
+    """
+    unknown = set(config) - set(_env_keys) - {"strategy", "seed"}
+    if unknown:
+        raise ValueError(f"Unknown config keys: {sorted(unknown)}.")
+    if workers is None:
+        workers = os.cpu_count()
+
+    shard_lengths = _shard_lengths(n_episodes, shard_size)
+    n_shards = len(shard_lengths)
+    seeds = np.random.SeedSequence(config.get("seed")).spawn(n_shards)
+    configs = [config] * n_shards
+
+    if workers == 1 or n_shards <= 1:
+        results = list(map(_run_shard, configs, shard_lengths, seeds))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, n_shards)) as executor:
+            results = list(executor.map(_run_shard, configs, shard_lengths, seeds))
+
+    if not results:
+        return np.empty(0, dtype=np.float64)
+
+    return np.concatenate(results)
@@ -0,0 +1,248 @@
+"""
+Module for search-based policies that plan over the remaining deck.
+"""
+
+### Imports ###
+import math
+import time
+
+import numpy as np
+
+from cardgames.utils import ranks
+
+
+### Low-Level Classes ###
+class _Node:
+    """
+    Decision node of the search tree. The state is the remaining count of each
+    rank: the next state only depends on the card drawn, not on the action, so
+    children are keyed by the rank index of the drawn card.
+
+    For the same reason, the value of an action is its mean reward plus the
+    value of the next state, which is shared by all actions. Actions are
+    credited with their own rewards (`action_w`), and the node with the
+    returns from it (`w`), so that the estimates of early actions are not
+    biased by the subtree improving over later iterations.
+    """
+
+    __slots__ = ("counts", "n", "w", "action_n", "action_w", "children")
+
+    def __init__(self, counts: np.ndarray, n_actions: int) -> None:
+        self.counts = counts
+        self.n = 0
+        self.w = 0.0
+        self.action_n = np.zeros(n_actions, dtype=np.int64)
+        self.action_w = np.zeros(n_actions)
+        self.children = {}
+
+
+### Planner Classes ###
+class RolloutPlanner:
+    def __init__(
+        self,
+        n_rollouts=256,
+        time_budget=None,
+        tree=False,
+        depth=10,
+        exploration=1.0,
+        batch_size=256,
+        seed=None,
+    ) -> None:
+        """
+        Monte Carlo planner over completions of the hidden remaining deck.
+
+        The planner sees the remaining count of each rank (as the
+        "expected_observation" strategy does) but not their order. By default
+        it samples `n_rollouts` next cards from the remaining Cards in batches
+        and picks the action with the highest mean reward. With `tree=True`,
+        it runs UCT over remaining-deck states up to `depth` cards ahead,
+        evaluating new leaves with a rollout of the "expected_observation"
+        strategy on a random completion of the deck, and keeps the subtree of
+        the card actually dealt for the next decision.
+
+        Use `action_func(env)` with `GameSimulator.simulate_run`.
+
+        Params
+        ------
+        n_rollouts : int (default = 256)
+            Number of rollouts (tree iterations with `tree=True`) per decision
+        time_budget : float (default = None)
+            Largest time in seconds per decision. At least one batch (or tree
+            iteration) is run.
+        tree : bool (default = False)
+            Whether to search a UCT tree instead of one step ahead
+        depth : int (default = 10)
+            Number of cards looked ahead by the tree and its rollouts
+        exploration : float (default = 1.0)
+            UCT exploration constant, in units of the reward of one step
+        batch_size : int (default = 256)
+            Number of one-step rollouts sampled at a time
+        seed : Any (default = None)
+            Seed for sampling completions of the deck
+        """
+        self.n_rollouts = n_rollouts
+        self.time_budget = time_budget
+        self.tree = tree
+        self.depth = depth
+        self.exploration = exploration
+        self.batch_size = batch_size
+
+        self._rng = np.random.default_rng(seed)
+        self._env = None
+        self._root = None
+
+    def action_func(self, env):
+        """
+        Action function for `GameSimulator.simulate_run`.
+        """
+        return lambda: self.act(env)
+
+    def act(self, env) -> int:
+        """
+        Plan the next action of `env` from its remaining rank counts.
+        """
+        if env is not self._env:
+            self._bind(env)
+
+        counts = env.remaining_rank_counts()
+        if self.tree:
+            return self._tree_action(counts)
+        return self._flat_action(counts)
+
+    # Private methods
+    def _bind(self, env) -> None:
+        """
+        Tabulate the reward of each action for a card of each rank.
+        """
+        self._env = env
+        self._root = None
+        self._rank_scores = env._rank_score_array
+        self._rewards = np.asarray(
+            env.reward(self._rank_scores[:, None], np.arange(env.n_actions)[None, :])
+        )
+
+    def _deadline(self) -> float:
+        if self.time_budget is None:
+            return math.inf
+        return time.perf_counter() + self.time_budget
+
+    def _flat_action(self, counts: np.ndarray) -> int:
+        """
+        Mean reward of each action over sampled next cards, in batches.
+        """
+        deadline = self._deadline()
+        probs = counts / counts.sum()
+        totals = np.zeros(self._rewards.shape[1])
+
+        n_done = 0
+        while n_done < self.n_rollouts:
+            n = min(self.batch_size, self.n_rollouts - n_done)
+            next_ranks = self._rng.choice(len(ranks), size=n, p=probs)
+            totals += self._rewards[next_ranks].sum(axis=0)
+            n_done += n
+            if time.perf_counter() > deadline:
+                break
+
+        return int(np.argmax(totals))
+
+    def _tree_action(self, counts: np.ndarray) -> int:
+        """
+        Run UCT from the node of `counts`, reusing the previous subtree.
+        """
+        root = self._reuse_root(counts)
+        deadline = self._deadline()
+
+        for i in range(self.n_rollouts):
+            self._iterate(root)
+            if i % 16 == 15 and time.perf_counter() > deadline:
+                break
+
+        # Most visited action, which is less noisy than the best mean reward
+        return int(np.argmax(root.action_n))
+
+    def _reuse_root(self, counts: np.ndarray) -> _Node:
+        """
+        The child of the previous root for the card dealt since the last
+        decision, or a new root if the deck does not follow from it.
+        """
+        root = self._root
+        if root is not None:
+            dealt = root.counts - counts
+            if dealt.sum() == 1 and np.all(dealt >= 0):
+                root = root.children.get(int(np.argmax(dealt)))
+            elif dealt.any():
+                root = None
+
+        if root is None:
+            root = _Node(counts.copy(), self._rewards.shape[1])
+        self._root = root
+
+        return root
+
+    def _iterate(self, root: _Node) -> None:
+        """
+        One UCT iteration: select actions and sample cards down the tree, add
+        one node, evaluate it with a rollout and back up the returns.
+        """
+        node = root
+        path = []
+        value = 0.0
+        for step in range(self.depth):
+            cumulative = np.cumsum(node.counts)
+            if cumulative[-1] == 0:
+                break
+
+            action = self._select(node)
+            rank = int(
+                np.searchsorted(cumulative, self._rng.integers(cumulative[-1]), "right")
+            )
+            path.append((node, action, self._rewards[rank, action]))
+
+            child = node.children.get(rank)
+            if child is None:
+                counts = node.counts.copy()
+                counts[rank] -= 1
+                child = node.children[rank] = _Node(counts, len(node.action_n))
+                value = self._rollout(counts, self.depth - step - 1)
+                break
+            node = child
+
+        for node, action, reward in reversed(path):
+            value += reward
+            node.n += 1
+            node.w += value
+            node.action_n[action] += 1
+            node.action_w[action] += reward
+
+    def _select(self, node: _Node) -> int:
+        """
+        UCB1 action of a node, trying each action once first.
+        """
+        # Each visit adds one action, so the first `n` actions were tried
+        if node.n < len(node.action_n):
+            return node.n
+
+        means = node.action_w / node.action_n
+        bonus = self.exploration * np.sqrt(math.log(node.n) / node.action_n)
+        return int(np.argmax(means + bonus))
+
+    def _rollout(self, counts: np.ndarray, depth: int) -> float:
+        """
+        Return of the "expected_observation" strategy over the next `depth`
+        cards of a random completion of the remaining deck.
+        """
+        n_cards = int(counts.sum())
+        depth = min(depth, n_cards)
+        if depth == 0:
+            return 0.0
+
+        remaining = np.repeat(np.arange(len(ranks)), counts)
+        drawn = self._rng.permutation(remaining)[:depth]
+        scores = self._rank_scores[drawn]
+
+        # Mean score of the remaining cards before each draw
+        score_sum = counts @ self._rank_scores
+        dealt = np.cumsum(scores) - scores
+        actions = (score_sum - dealt) / np.arange(n_cards, n_cards - depth, -1)
+
+        return float(np.sum(self._env.reward(scores, actions)))
@@ -1,20 +1,20 @@
 ### Imports ###
-import numpy as np
-import collections
+# plotly and gymnasium (via cardgames.games) are imported where they are used,
+# to keep `import cardgames.plotting` fast
+from typing import TYPE_CHECKING
 
-import plotly.graph_objects as go
+from cardgames.utils import ranks
 
-from cardgames.games import GameSimulator
-from cardgames.games import simple_rank_scores
-from cardgames.utils import ranks, Card, Hand, Deck
+if TYPE_CHECKING:
+    from cardgames.games import GameSimulator
 
 
 ### Plotting Functions ###
-def plot_distribution(game: GameSimulator):
+def plot_distribution(game: "GameSimulator"):
+    import plotly.graph_objects as go
+
     x = list(ranks.keys())
-    observations = np.sort(game.observation_distribution())
-    counter = collections.Counter(observations)
-    y = list(counter.values())
+    y = game.remaining_rank_counts()
 
     fig = go.Figure()
     fig.add_trace(go.Bar(x=x, y=y, name="Number of Cards", marker_color="red"))
@@ -34,6 +34,8 @@ def plot_distribution(game: GameSimulator):
 
 
 if __name__ == "__main__":
+    from cardgames.games import GameSimulator, simple_rank_scores
+
     game = GameSimulator(1, simple_rank_scores)
     game.reset()
 
@@ -0,0 +1,317 @@
+"""
+Module for ranking 5- to 7-card poker hands with precomputed lookup tables.
+
+Hands are arrays of card codes (see `cardgames.utils.all_codes`) from a single
+deck. Each hand is ranked by a strength from 1 (7-5-4-3-2 offsuit) to 7462
+(royal flush), one per class of equivalent 5-card hands, so that the best
+hand has the largest strength and equal hands tie.
+
+Ranking looks up two tables. Hands without a flush are ranked by their rank
+multiset, identified by a sum of per-rank keys that is unique among the
+multisets of each hand size (at most 4 of each rank), with one table per hand
+size. Hands with a flush are ranked by the bitmask of the ranks of their
+flush suit: with at most 7 cards, a flush rules out quads and full houses, so
+the flush suit alone decides.
+The per-card rank and suit keys are packed into one integer, so a batch of
+hands is ranked with one gather and one sum per card.
+"""
+
+### Imports ###
+import collections
+import functools
+import itertools
+import os
+from pathlib import Path
+
+import numpy as np
+
+from cardgames.utils import ranks, suits, all_codes, _to_code
+
+### Constants ###
+categories = (
+    "High Card",
+    "Pair",
+    "Two Pair",
+    "Three of a Kind",
+    "Straight",
+    "Flush",
+    "Full House",
+    "Four of a Kind",
+    "Straight Flush",
+)
+
+# Number of strengths in each category, and the first strength of each
+category_sizes = (1277, 2860, 858, 858, 10, 1277, 156, 156, 10)
+category_starts = np.cumsum((1,) + category_sizes[:-1])
+n_strengths = sum(category_sizes)
+
+# Tables are stored in `default_cache_dir`, under a versioned name
+default_cache_dir = Path(
+    os.environ.get("CARDGAMES_CACHE_DIR", Path.home() / ".cache" / "cardgames")
+)
+table_version = 1
+
+min_hand_size = 5
+max_hand_size = 7
+
+# Per-rank keys whose sums are unique among multisets of 5, 6 or 7 cards
+_rank_keys = np.array(
+    [0, 1, 5, 22, 98, 453, 2031, 8698, 22854, 83661, 262349, 636345, 1479181],
+    dtype=np.uint64,
+)
+_rank_key_bits = 23  # Sums of 7 rank keys are below 2**23
+
+# Suit counts packed in 3-bit fields, above the rank key sum
+_suit_bits = 3
+
+# Packed rank and suit key, and rank bit, of each card code
+_code_keys = _rank_keys[all_codes >> 2] + (
+    np.uint64(1) << (_rank_key_bits + _suit_bits * (all_codes & 3)).astype(np.uint64)
+)
+_code_rank_bits = np.uint16(1) << (all_codes >> 2).astype(np.uint16)
+
+# Flush suit (or -1) of each packed suit count
+_packed_suits = np.arange(2 ** (_suit_bits * len(suits)))
+_suit_fields = _packed_suits[:, None] >> (_suit_bits * np.arange(len(suits)))
+_suit_fields &= 2**_suit_bits - 1
+_flush_suits = np.where(
+    (_suit_fields >= min_hand_size).any(axis=1), _suit_fields.argmax(axis=1), -1
+).astype(np.int8)
+
+
+### Low-Level Functions ###
+def _straight_high(rank_indices: set):
+    """
+    Rank index of the highest card of a straight, or None. The Ace plays low
+    in A-2-3-4-5.
+    """
+    if len(rank_indices) != 5:
+        return None
+    if max(rank_indices) - min(rank_indices) == 4:
+        return max(rank_indices)
+    if rank_indices == {12, 0, 1, 2, 3}:
+        return 3
+    return None
+
+
+def _five_card_score(rank_indices, flush: bool) -> tuple:
+    """
+    Sortable score of a 5-card hand: category, then tie-breaking ranks.
+    """
+    counts = collections.Counter(rank_indices)
+    groups = sorted(counts.items(), key=lambda item: (item[1], item[0]), reverse=True)
+    shape = tuple(count for rank, count in groups)
+    order = tuple(rank for rank, count in groups)
+    straight = _straight_high(set(rank_indices))
+
+    if straight is not None:
+        return (8 if flush else 4, straight)
+    if flush:
+        return (5,) + order
+
+    category_index = {
+        (4, 1): 7,
+        (3, 2): 6,
+        (3, 1, 1): 3,
+        (2, 2, 1): 2,
+        (2, 1, 1, 1): 1,
+    }.get(shape, 0)
+    return (category_index,) + order
+
+
+def _rank_multisets(n_cards: int):
+    """
+    Rank count tuples of every hand of `n_cards` Cards from a single deck.
+    """
+    for combo in itertools.combinations_with_replacement(range(len(ranks)), n_cards):
+        counts = [0] * len(ranks)
+        for rank_index in combo:
+            counts[rank_index] += 1
+        if max(counts) <= len(suits):
+            yield tuple(counts)
+
+
+def _rank_key(counts) -> int:
+    return int(np.dot(counts, _rank_keys))
+
+
+def generate_tables() -> dict:
+    """
+    Build the lookup tables from scratch.
+
+    Returns
+    -------
+    tables : dict
+        "rank5", "rank6" and "rank7" hold the strength of the best non-flush
+        hand of each size, indexed by rank key sum. "flush" holds the
+        strength of the best flush, indexed by the rank bitmask of the suit.
+    """
+    # Strength of every 5-card class, by dense rank of the scores
+    five_card = {}
+    for counts in _rank_multisets(min_hand_size):
+        rank_indices = [r for r, count in enumerate(counts) for i in range(count)]
+        five_card[counts, False] = _five_card_score(rank_indices, False)
+    for combo in itertools.combinations(range(len(ranks)), min_hand_size):
+        counts = tuple(int(r in combo) for r in range(len(ranks)))
+        five_card[counts, True] = _five_card_score(combo, True)
+
+    strengths = {
+        score: strength
+        for strength, score in enumerate(sorted(set(five_card.values())), start=1)
+    }
+    best = {key: strengths[score] for key, score in five_card.items()}
+
+    # Larger hands are as strong as their best hand with one Card less
+    tables = {"flush": np.zeros(2 ** len(ranks), dtype=np.uint16)}
+    for n_cards in range(min_hand_size, max_hand_size + 1):
+        multisets = list(_rank_multisets(n_cards))
+        rank_table = np.zeros(
+            max(_rank_key(counts) for counts in multisets) + 1, dtype=np.uint16
+        )
+        tables[f"rank{n_cards}"] = rank_table
+
+        for counts in multisets:
+            for flush in (False, True):
+                if flush and max(counts) > 1:
+                    continue
+                if n_cards > min_hand_size:
+                    best[counts, flush] = max(
+                        best[counts[:r] + (count - 1,) + counts[r + 1 :], flush]
+                        for r, count in enumerate(counts)
+                        if count
+                    )
+
+                if flush:
+                    mask = sum(1 << r for r, count in enumerate(counts) if count)
+                    tables["flush"][mask] = best[counts, flush]
+                else:
+                    rank_table[_rank_key(counts)] = best[counts, flush]
+
+    return tables
+
+
+def _table_path(cache_dir: Path, name: str) -> Path:
+    return cache_dir / f"poker_{name}_table_v{table_version}.npy"
+
+
+@functools.lru_cache(maxsize=None)
+def _load_tables(cache_dir) -> dict:
+    """
+    Tables from `cache_dir`, generated and saved there on first use. Without
+    `cache_dir`, tables are generated in memory.
+    """
+    if cache_dir is None:
+        return generate_tables()
+
+    names = ["flush"] + [
+        f"rank{n_cards}" for n_cards in range(min_hand_size, max_hand_size + 1)
+    ]
+    if not all(_table_path(cache_dir, name).exists() for name in names):
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        for name, table in generate_tables().items():
+            # Write atomically, so concurrent first uses never read half a table
+            path = _table_path(cache_dir, name)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp.npy")
+            np.save(tmp_path, table)
+            os.replace(tmp_path, path)
+
+    # Memory-mapped, so only the tables of the hand sizes in use are read
+    return {
+        name: np.load(_table_path(cache_dir, name), mmap_mode="r") for name in names
+    }
+
+
+### Functions ###
+def category(strengths):
+    """
+    Index in `categories` of each strength.
+    """
+    index = np.searchsorted(category_starts, strengths, side="right") - 1
+    return int(index) if np.ndim(index) == 0 else index
+
+
+### Classes ###
+class HandEvaluator:
+    def __init__(self, cache_dir=default_cache_dir) -> None:
+        """
+        Poker hand evaluator. Lookup tables are generated on first use (in a
+        few seconds) and saved in `cache_dir`, then loaded from there.
+
+        Params
+        ------
+        cache_dir : str or Path (default = default_cache_dir)
+            Directory of the cached tables, `None` to keep them in memory
+            only. Defaults to `$CARDGAMES_CACHE_DIR`, or `~/.cache/cardgames`.
+        """
+        if cache_dir is not None:
+            cache_dir = Path(cache_dir)
+        tables = _load_tables(cache_dir)
+
+        self.flush_table = tables["flush"]
+        self.rank_tables = {
+            n_cards: tables[f"rank{n_cards}"]
+            for n_cards in range(min_hand_size, max_hand_size + 1)
+        }
+
+    def evaluate(self, codes) -> np.ndarray:
+        """
+        Strengths of a batch of hands.
+
+        Params
+        ------
+        codes : np.ndarray
+            Card codes of shape `(..., n_cards)`, with 5 to 7 distinct codes
+            per hand
+
+        Returns
+        -------
+        strengths : np.ndarray
+            `uint16` strengths of shape `(...)`, larger for better hands
+        """
+        codes = np.asarray(codes)
+        n_cards = codes.shape[-1]
+        if not min_hand_size <= n_cards <= max_hand_size:
+            raise ValueError(
+                f"Hands must have {min_hand_size} to {max_hand_size} cards."
+            )
+        hands = codes.reshape(-1, n_cards)
+
+        # Sum the packed keys card by card, which is faster than a reduction
+        # over the short last axis
+        keys = _code_keys[hands[:, 0]]
+        for i in range(1, n_cards):
+            keys += _code_keys[hands[:, i]]
+
+        rank_table = self.rank_tables[n_cards]
+        strengths = rank_table[keys & np.uint64(2**_rank_key_bits - 1)]
+        flush_suits = _flush_suits[keys >> np.uint64(_rank_key_bits)]
+
+        flush = np.flatnonzero(flush_suits >= 0)
+        if flush.size:
+            flush_hands = hands[flush]
+            in_suit = (flush_hands & 3) == flush_suits[flush, None]
+            masks = np.bitwise_or.reduce(
+                np.where(in_suit, _code_rank_bits[flush_hands], 0), axis=1
+            )
+            strengths[flush] = self.flush_table[masks]
+
+        return strengths.reshape(codes.shape[:-1])
+
+    def evaluate_hand(self, hand) -> int:
+        """
+        Strength of one hand: a `Hand`, `BitHand`, or sequence of Cards, card
+        ids or card codes.
+        """
+        if hasattr(hand, "codes"):
+            codes = hand.codes
+        else:
+            codes = [_to_code(card) for card in hand]
+
+        return int(self.evaluate(np.asarray(codes, dtype=np.uint8)))
+
+    def compare(self, codes_a, codes_b) -> np.ndarray:
+        """
+        Showdown of two batches of hands: 1 where `a` wins, -1 where `b`
+        wins and 0 for ties.
+        """
+        return np.sign(self.evaluate(codes_a).astype(np.int32) - self.evaluate(codes_b))
@@ -0,0 +1,87 @@
+"""
+Module for instrumenting and profiling card game environments.
+"""
+
+### Imports ###
+import contextlib
+import cProfile
+import io
+import pstats
+from pathlib import Path
+
+### Constants ###
+# Phases timed by an instrumented GameBase. "step" is the total of a step.
+phases = ("reset", "deal", "observe", "reward", "step")
+
+
+### Classes ###
+class PhaseStats:
+    """
+    Call counts and cumulative timings (in seconds) of the phases of an
+    environment, and the number of decks it allocated.
+    """
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        self.counts = dict.fromkeys(phases, 0)
+        self.times = dict.fromkeys(phases, 0.0)
+        self.deck_allocations = 0
+
+    def add(self, phase: str, elapsed: float) -> None:
+        self.counts[phase] += 1
+        self.times[phase] += elapsed
+
+    def snapshot(self) -> dict:
+        """
+        Copy of the statistics, with the mean time per call of each phase.
+        """
+        stats = {
+            phase: {
+                "count": self.counts[phase],
+                "time": self.times[phase],
+                "mean": self.times[phase] / max(self.counts[phase], 1),
+            }
+            for phase in phases
+        }
+        stats["deck_allocations"] = self.deck_allocations
+
+        return stats
+
+
+### Functions ###
+@contextlib.contextmanager
+def profile(path=None, sort="cumulative", limit=30):
+    """
+    Run `cProfile` around the body of a `with` block, e.g. a batch of
+    `simulate_run` calls, and write a report of the `limit` most expensive
+    functions.
+
+    Params
+    ------
+    path : str or Path (default = None)
+        File the report is written to. By default, the report is printed.
+    sort : str (default = "cumulative")
+        `pstats` sort key
+    limit : int (default = 30)
+        Number of functions in the report
+
+    Returns
+    -------
+    profiler : cProfile.Profile
+        The profiler, yielded to the `with` block
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats(sort).print_stats(limit)
+        if path is None:
+            print(stream.getvalue())
+        else:
+            Path(path).write_text(stream.getvalue())
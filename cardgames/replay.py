@@ -0,0 +1,439 @@
+"""
+Module for recording dealt shoes and replaying them from memory-mapped files.
+
+A trajectory store is a directory of append-only chunks. Each chunk holds the
+card codes of a batch of shoes (`codes_<chunk>.npy`, `uint8` with shape
+`(n_episodes, n_cards)`) and, optionally, the per-step actions and rewards of
+the episodes played on them. `index.json` lists the chunks and is rewritten
+only after a chunk is complete, so a store is never left half-written.
+"""
+
+### Imports ###
+import copy
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from cardgames.utils import Card, Hand, ranks, N_CARDS_PER_DECK
+
+### Constants ###
+format_version = 1
+
+# Number of episodes per chunk file
+default_chunk_size = 65536
+
+index_name = "index.json"
+step_fields = ("actions", "rewards")
+
+
+### Low-Level Functions ###
+def _chunk_path(path: Path, field: str, chunk: int) -> Path:
+    return path / f"{field}_{chunk:06d}.npy"
+
+
+def _read_index(path: Path):
+    index_path = path / index_name
+    if not index_path.exists():
+        return None
+
+    return json.loads(index_path.read_text())
+
+
+def _write_index(path: Path, index: dict) -> None:
+    """
+    Replace the index atomically.
+    """
+    tmp_path = path / (index_name + ".tmp")
+    tmp_path.write_text(json.dumps(index))
+    os.replace(tmp_path, path / index_name)
+
+
+### Classes ###
+class TrajectoryWriter:
+    def __init__(
+        self,
+        path,
+        n_cards: int,
+        n_steps=None,
+        record_steps=False,
+        chunk_size=default_chunk_size,
+        action_dtype=None,
+    ) -> None:
+        """
+        Open a trajectory store for appending, creating it if needed.
+
+        Params
+        ------
+        path : str or Path
+            Directory of the store
+        n_cards : int
+            Number of cards in each recorded shoe
+        n_steps : int (default = None)
+            Number of steps per episode, for per-step actions and rewards.
+            Defaults to `n_cards`.
+        record_steps : bool (default = False)
+            Whether per-step actions and rewards are recorded
+        chunk_size : int (default = default_chunk_size)
+            Number of episodes buffered before a chunk is written
+        action_dtype : dtype (default = None)
+            dtype of recorded actions: an integer dtype for discrete actions,
+            or a float dtype for actions such as "mean_observation". Defaults
+            to the dtype of an existing store, or `float64`.
+        """
+        self.path = Path(path)
+        self.n_cards = n_cards
+        self.n_steps = n_cards if n_steps is None else n_steps
+        self.fields = ("codes",) + (step_fields if record_steps else ())
+        self.chunk_size = chunk_size
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._index = _read_index(self.path)
+        if self._index is None:
+            self.action_dtype = np.dtype(
+                np.float64 if action_dtype is None else action_dtype
+            )
+            self._index = {
+                "format": format_version,
+                "n_cards": self.n_cards,
+                "n_steps": self.n_steps,
+                "fields": list(self.fields),
+                "action_dtype": self.action_dtype.str,
+                "chunks": [],
+            }
+        else:
+            # Stores written before actions had their own dtype hold floats
+            self.action_dtype = np.dtype(self._index.get("action_dtype", "<f8"))
+            if (
+                self._index["n_cards"],
+                self._index["n_steps"],
+                tuple(self._index["fields"]),
+            ) != (self.n_cards, self.n_steps, self.fields) or (
+                action_dtype is not None and np.dtype(action_dtype) != self.action_dtype
+            ):
+                raise ValueError(f"{self.path} holds trajectories of another shape.")
+
+        self._buffers = {"codes": np.empty((chunk_size, n_cards), dtype=np.uint8)}
+        if record_steps:
+            self._buffers["actions"] = np.empty(
+                (chunk_size, self.n_steps), dtype=self.action_dtype
+            )
+            self._buffers["rewards"] = np.empty((chunk_size, self.n_steps))
+        self._n_buffered = 0
+
+    def append(self, codes, actions=None, rewards=None) -> None:
+        """
+        Append one episode (1-D arrays) or a batch of episodes (2-D arrays).
+        Scalar or 1-D actions and rewards are broadcast over the batch.
+        """
+        codes = np.asarray(codes, dtype=np.uint8)
+        codes = codes.reshape(-1, codes.shape[-1])
+        if codes.shape[1] != self.n_cards:
+            raise ValueError(f"Expected shoes of {self.n_cards} cards.")
+
+        batch = {"codes": codes}
+        if len(self.fields) > 1:
+            if actions is None or rewards is None:
+                raise ValueError("This store records per-step actions and rewards.")
+            shape = (len(codes), self.n_steps)
+            actions = np.asarray(actions)
+            if self.action_dtype.kind in "iu" and actions.dtype.kind not in "iu":
+                raise ValueError("This store records integer actions.")
+            batch["actions"] = np.broadcast_to(actions, shape)
+            batch["rewards"] = np.broadcast_to(rewards, shape)
+
+        start = 0
+        while start < len(codes):
+            n = min(self.chunk_size - self._n_buffered, len(codes) - start)
+            for field, values in batch.items():
+                buffer = self._buffers[field]
+                buffer[self._n_buffered : self._n_buffered + n] = values[
+                    start : start + n
+                ]
+            self._n_buffered += n
+            start += n
+
+            if self._n_buffered == self.chunk_size:
+                self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the buffered episodes as a new chunk.
+        """
+        if self._n_buffered == 0:
+            return
+
+        chunk = len(self._index["chunks"])
+        for field, buffer in self._buffers.items():
+            np.save(_chunk_path(self.path, field, chunk), buffer[: self._n_buffered])
+
+        self._index["chunks"].append(self._n_buffered)
+        _write_index(self.path, self._index)
+        self._n_buffered = 0
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "TrajectoryWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class TrajectoryStore:
+    def __init__(self, path) -> None:
+        """
+        Open a trajectory store read-only. Chunks are memory-mapped, so
+        episodes are read lazily and shared between processes through the
+        page cache.
+
+        Params
+        ------
+        path : str or Path
+            Directory of the store
+        """
+        self.path = Path(path)
+        index = _read_index(self.path)
+        if index is None:
+            raise FileNotFoundError(f"No trajectory store at {self.path}.")
+
+        self.n_cards = index["n_cards"]
+        self.n_steps = index["n_steps"]
+        self.fields = tuple(index["fields"])
+
+        n_chunks = len(index["chunks"])
+        self._chunks = {
+            field: [
+                np.load(_chunk_path(self.path, field, chunk), mmap_mode="r")
+                for chunk in range(n_chunks)
+            ]
+            for field in self.fields
+        }
+        self._starts = np.concatenate(([0], np.cumsum(index["chunks"], dtype=np.int64)))
+
+    @property
+    def n_episodes(self) -> int:
+        return int(self._starts[-1])
+
+    def codes(self, episode: int) -> np.ndarray:
+        """
+        Card codes of a recorded shoe, as a read-only memory-mapped view.
+        """
+        return self._row("codes", episode)
+
+    def actions(self, episode: int) -> np.ndarray:
+        return self._row("actions", episode)
+
+    def rewards(self, episode: int) -> np.ndarray:
+        return self._row("rewards", episode)
+
+    def chunks(self, field="codes"):
+        """
+        Iterate over the memory-mapped chunks of a field, for batch processing.
+        """
+        return iter(self._chunks[field])
+
+    def __len__(self) -> int:
+        return self.n_episodes
+
+    # Private methods
+    def _row(self, field: str, episode: int) -> np.ndarray:
+        if field not in self._chunks:
+            raise ValueError(f"The store does not record {field}.")
+        if not 0 <= episode < self.n_episodes:
+            raise IndexError(f"Episode {episode} is not in the store.")
+
+        chunk = int(np.searchsorted(self._starts, episode, side="right")) - 1
+        return self._chunks[field][chunk][episode - self._starts[chunk]]
+
+
+class ReplayDeck:
+    def __init__(
+        self,
+        source,
+        start=0,
+        loop=False,
+    ) -> None:
+        """
+        Deck that deals the shoes of a trajectory store in recorded order,
+        without copying them into memory.
+
+        The Deck starts on shoe `start`. Each `shuffle` moves to the next
+        recorded shoe (the first `shuffle` keeps shoe `start`, so that a
+        `GameBase.reset` deals it), and `reset` rewinds the current shoe.
+
+        Params
+        ------
+        source : TrajectoryStore, str or Path
+            Store, or directory of a store
+        start : int (default = 0)
+            First shoe to deal
+        loop : bool (default = False)
+            Whether to wrap around to the first shoe after the last one.
+            Otherwise, shuffling past the last shoe raises IndexError.
+        """
+        if not isinstance(source, TrajectoryStore):
+            source = TrajectoryStore(source)
+
+        self.store = source
+        self.loop = loop
+        self.n_decks = source.n_cards // N_CARDS_PER_DECK
+        self.cut_cards = Hand()
+
+        self.episode = start
+        self._next_episode = start
+        self._load(start)
+
+    # Class Properties
+    @property
+    def codes(self) -> np.ndarray:
+        """
+        Codes of the remaining Cards, in dealing order.
+        """
+        return self._codes[self._cursor : self._end]
+
+    @property
+    def cards(self) -> list[Card]:
+        return [Card.from_code(code) for code in self.codes]
+
+    @property
+    def ids(self) -> list[str]:
+        return [card.id for card in self.cards]
+
+    @property
+    def n_cards(self) -> int:
+        """
+        Number of Cards currently in the Deck.
+        """
+        return self._end - self._cursor
+
+    # Public methods
+    def rank_counts(self) -> np.ndarray:
+        """
+        Number of remaining Cards of each rank, in `ranks` order.
+        """
+        return np.bincount(self.codes >> 2, minlength=len(ranks))
+
+    def get_state(self) -> tuple:
+        """
+        Snapshot of the Deck: the current and next shoe, cursors and cut
+        Cards. The snapshot is small and picklable.
+        """
+        cut_codes = self.cut_cards.codes if self.cut_cards.n_cards else None
+        return self.episode, self._next_episode, self._cursor, self._end, cut_codes
+
+    def set_state(self, state: tuple) -> None:
+        """
+        Restore a snapshot from `get_state`. The shoe is mapped, not copied.
+        """
+        episode, self._next_episode, cursor, end, cut_codes = state
+        if episode != self.episode:
+            self._load(episode)
+        self._cursor, self._end = cursor, end
+
+        self.cut_cards = Hand()
+        if cut_codes is not None:
+            self.cut_cards.add_codes(cut_codes)
+
+    def clone(self) -> "ReplayDeck":
+        """
+        Independent copy of the Deck, sharing the memory-mapped store.
+        """
+        deck = copy.copy(self)
+        deck.set_state(self.get_state())
+        return deck
+
+    def shuffle(self) -> None:
+        """
+        Move to the next recorded shoe.
+        """
+        episode = self._next_episode
+        if episode >= self.store.n_episodes:
+            if not self.loop:
+                raise IndexError("No more recorded shoes to replay.")
+            episode = 0
+
+        self._load(episode)
+        self._next_episode = episode + 1
+
+    def reset(self) -> None:
+        """
+        Returns all dealt and cut Cards of the current shoe to the Deck.
+        """
+        self._cursor = 0
+        self._end = self._codes.size
+        if self.cut_cards.n_cards:
+            self.cut_cards = Hand()
+
+    def deal_codes(
+        self,
+        n=1,
+    ) -> np.ndarray:
+        """
+        Deals `n` card codes from the top of the recorded shoe.
+
+        Params
+        ------
+        n : int (default = 1)
+            Number of cards to be dealt
+
+        Returns
+        -------
+        codes : np.ndarray
+            Read-only memory-mapped view of the codes that were dealt
+        """
+        if n > self._end - self._cursor:
+            raise ValueError("Cannot deal more cards than Deck contains.")
+
+        start = self._cursor
+        self._cursor += n
+
+        return self._codes[start : self._cursor]
+
+    def deal(
+        self,
+        n=1,
+    ) -> list[Card]:
+        """
+        Deals `n` Cards from the top of the recorded shoe.
+
+        Params
+        ------
+        n : int (default = 1)
+            Number of Cards to be dealt
+
+        Returns
+        -------
+        cards : list[Card]
+            Cards that were dealt
+        """
+        return [Card.from_code(code) for code in self.deal_codes(n)]
+
+    def cut(
+        self,
+        n: int,
+    ) -> None:
+        """
+        Cuts the last n Cards out of the Deck.
+
+        Cut Cards are stored as a Hand in the Deck.cut_cards attribute.
+
+        Params
+        ------
+        n : int
+            Number of Cards to cut
+        """
+        if n > self.n_cards:
+            raise ValueError("Cannot cut more cards than Deck contains.")
+
+        self._end -= n
+        self.cut_cards = Hand()
+        self.cut_cards.add_codes(self._codes[self._end : self._end + n])
+
+    # Private methods
+    def _load(self, episode: int) -> None:
+        self.episode = episode
+        self._codes = self.store.codes(episode)
+        self.reset()
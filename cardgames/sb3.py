@@ -0,0 +1,80 @@
+"""
+Module adapting cardgames vector environments to stable-baselines3.
+"""
+
+### Imports ###
+import numpy as np
+from stable_baselines3.common.vec_env import VecEnv
+
+
+### Classes ###
+class SB3VecEnv(VecEnv):
+    """
+    stable-baselines3 `VecEnv` over a gymnasium vector environment with
+    same-step autoreset, such as `VectorGameEnv` or `SharedMemoryVectorEnv`.
+
+    Terminal observations are moved from `infos["final_obs"]` to the
+    per-environment `"terminal_observation"` info that stable-baselines3
+    expects, and truncations to `"TimeLimit.truncated"`.
+
+    Observations are copied, since vector environments may return views of a
+    buffer that the next step overwrites, while stable-baselines3 keeps the
+    last observation by reference until the transition is stored.
+    """
+
+    def __init__(self, venv) -> None:
+        self.venv = venv
+        self._actions = None
+        super().__init__(
+            venv.num_envs, venv.single_observation_space, venv.single_action_space
+        )
+
+    def reset(self):
+        seeds = [seed for seed in self._seeds if seed is not None]
+        observations, infos = self.venv.reset(seed=seeds[0] if seeds else None)
+        self._reset_seeds()
+        self._reset_options()
+
+        return np.array(observations)
+
+    def step_async(self, actions: np.ndarray) -> None:
+        if hasattr(self.venv, "step_async"):
+            self.venv.step_async(actions)
+        else:
+            self._actions = actions
+
+    def step_wait(self):
+        if hasattr(self.venv, "step_wait"):
+            results = self.venv.step_wait()
+        else:
+            results = self.venv.step(self._actions)
+        observations, rewards, terminations, truncations, infos = results
+
+        dones = terminations | truncations
+        env_infos = [{} for _ in range(self.num_envs)]
+        for i in np.flatnonzero(dones):
+            env_infos[i]["terminal_observation"] = np.array(infos["final_obs"][i])
+            env_infos[i]["TimeLimit.truncated"] = bool(
+                truncations[i] and not terminations[i]
+            )
+
+        return np.array(observations), rewards.astype(np.float32), dones, env_infos
+
+    def close(self) -> None:
+        self.venv.close()
+
+    def get_attr(self, attr_name: str, indices=None) -> list:
+        """
+        Attribute of the vector environment, once per selected environment.
+        """
+        return [getattr(self.venv, attr_name, None)] * len(self._get_indices(indices))
+
+    def set_attr(self, attr_name: str, value, indices=None) -> None:
+        setattr(self.venv, attr_name, value)
+
+    def env_method(self, method_name: str, *args, indices=None, **kwargs) -> list:
+        method = getattr(self.venv, method_name)
+        return [method(*args, **kwargs) for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None) -> list:
+        return [False] * len(self._get_indices(indices))
@@ -0,0 +1,370 @@
+"""
+Module for exact analysis of card game strategies over deck compositions.
+"""
+
+### Imports ###
+import functools
+import json
+from pathlib import Path
+
+import numpy as np
+
+from cardgames.games import GameSimulator
+from cardgames.utils import ranks, suits
+
+### Constants ###
+# Number of (strategy, n_decks, rank_scores, n_actions) results kept in memory
+cache_size = 128
+
+# Largest number of compositions OptimalPolicy.solve enumerates by default
+max_policy_states = 2**31
+
+
+### Low-Level Functions ###
+def _score_groups(rank_scores: dict, n_decks: int):
+    """
+    Group ranks with equal scores. The reward only depends on scores, so deck
+    compositions only need to be tracked per score.
+
+    Returns
+    -------
+    scores : np.ndarray
+        Unique scores
+    counts : np.ndarray
+        Number of Cards with each score in a full shoe
+    """
+    rank_score_array = np.array([rank_scores[rank] for rank in ranks])
+    scores, n_ranks = np.unique(rank_score_array, return_counts=True)
+
+    return scores, n_ranks * len(suits) * n_decks
+
+
+def _composition_radix(counts: np.ndarray) -> np.ndarray:
+    """
+    Mixed-radix weights that encode a composition (remaining count per score
+    group) as a single integer index.
+    """
+    radix = np.cumprod(np.concatenate(([1], counts[:-1] + 1)), dtype=np.int64)
+    if int(radix[-1]) * int(counts[-1] + 1) >= 2**63:
+        raise ValueError("Too many deck compositions to enumerate.")
+
+    return radix
+
+
+def _add_cards(sum_probs, n_cards, max_sum, score, count):
+    """
+    Add `count` cards with score `score` to the subset-sum distribution
+    `sum_probs[k, sum]` of a random k-subset of `n_cards` cards, in place.
+    Adding one card maps the distribution P of n cards to
+    `P'[k] = (n + 1 - k) / (n + 1) * P[k] + k / (n + 1) * shift(P[k - 1])`.
+    """
+    for _ in range(count):
+        n_cards += 1
+        max_sum += score
+        k = np.arange(1, n_cards + 1)[:, None]
+        shifted = sum_probs[:n_cards, : max_sum + 1 - score].copy()
+        rows = sum_probs[1 : n_cards + 1, : max_sum + 1]
+        rows *= (n_cards - k) / n_cards
+        rows[:, score:] += k / n_cards * shifted
+
+    return n_cards, max_sum
+
+
+def _leave_one_out_sums(sum_probs, n_cards, max_sum, scores, counts):
+    """
+    For every score group, the subset-sum distribution of the shoe without one
+    card of that group. Groups are split in halves recursively, so each card
+    is added O(log(n_groups)) times rather than once per group.
+    """
+    if len(scores) == 1:
+        _add_cards(sum_probs, n_cards, max_sum, scores[0], counts[0] - 1)
+        return [sum_probs]
+
+    half = len(scores) // 2
+    results = []
+    for keep, add in [
+        (slice(None, half), slice(half, None)),
+        (slice(half, None), slice(None, half)),
+    ]:
+        branch = sum_probs.copy()
+        branch_n, branch_max = n_cards, max_sum
+        for score, count in zip(scores[add], counts[add]):
+            branch_n, branch_max = _add_cards(
+                branch, branch_n, branch_max, score, count
+            )
+        results.extend(
+            _leave_one_out_sums(
+                branch, branch_n, branch_max, scores[keep], counts[keep]
+            )
+        )
+
+    return results
+
+
+@functools.lru_cache(maxsize=cache_size)
+def _exact_expected_reward(
+    strategy: str,
+    n_decks: int,
+    rank_score_items: tuple,
+    n_actions,
+) -> float:
+    rank_scores = dict(rank_score_items)
+    env = GameSimulator(n_decks, rank_scores, n_actions)
+    scores, counts = _score_groups(rank_scores, n_decks)
+    if not np.issubdtype(scores.dtype, np.integer):
+        raise ValueError("Rank scores must be integers.")
+    n_steps = int(counts.sum())
+
+    # Every step deals a uniformly random card of the full shoe (marginally),
+    # and these actions do not depend on the deck composition
+    if strategy == "random":
+        actions = np.arange(env.n_actions)
+        step_rewards = env.reward(scores[:, None], actions[None, :]).mean(axis=1)
+        return float(counts @ step_rewards)
+    if strategy == "mean_observation":
+        step_rewards = env.reward(scores, env.mean_observation())
+        return float(counts @ step_rewards)
+
+    # Expected-remaining strategy. With m cards remaining, the remaining cards
+    # are a uniformly random m-subset of the shoe and the next card is uniform
+    # among them. Equivalently, the next card is uniform over the shoe and the
+    # other m - 1 remaining cards are a random subset of the rest, so only the
+    # distribution of subset sums is needed (instead of every composition).
+    sum_probs = np.zeros((n_steps, int(scores @ counts) + 1))
+    sum_probs[0, 0] = 1
+    subset_sums = _leave_one_out_sums(sum_probs, 0, 0, scores, counts)
+
+    total = 0.0
+    k = np.arange(n_steps)[:, None]
+    for score, count, sum_probs in zip(scores, counts, subset_sums):
+        # Reward of dealing a card with this score while k other cards remain
+        actions = (score + np.arange(sum_probs.shape[1])[None, :]) / (k + 1)
+        step_rewards = env.reward(score, actions)
+        total += count / n_steps * np.sum(sum_probs * step_rewards)
+
+    return float(total)
+
+
+### High-Level Functions ###
+def exact_expected_reward(strategy, n_decks: int, rank_scores: dict, n_actions=None):
+    """
+    Exact expected total reward of an episode for a built-in `GameSimulator`
+    strategy, computed with `GameBase.reward` instead of Monte Carlo.
+
+    For "random" and "mean_observation", the action does not depend on the
+    cards dealt so far, and the expectation has a closed form. For
+    "expected_observation", the action only depends on the deck composition
+    through the number and score sum of the remaining cards. Instead of
+    recursing over every composition (`(4 * n_decks + 1) ** 13` of them), the
+    expectation is computed by dynamic programming over (number of cards,
+    score sum) of random subsets of the shoe, built one score group at a time.
+    This takes well under a second for one or two decks and a few seconds for
+    eight. Ranks with equal scores are grouped, and scores must be integers.
+
+    Results are kept in a bounded LRU cache (`cache_size` entries).
+
+    Params
+    ------
+    strategy : str or method
+        One of `GameSimulator.strategies`, or the corresponding bound method
+    n_decks : int
+        Number of decks in the shoe
+    rank_scores : dict
+        Mapping of rank to observed score, as for `GameBase`
+    n_actions : int (default = None)
+        Number of actions, as for `GameBase`
+
+    Returns
+    -------
+    expected_reward : float
+        Expected total reward of an episode
+    """
+    name = GameSimulator(n_decks, rank_scores, n_actions)._strategy_name(strategy)
+    return _exact_expected_reward(name, n_decks, tuple(rank_scores.items()), n_actions)
+
+
+### Policy Classes ###
+class OptimalPolicy:
+    def __init__(self, table: np.ndarray, n_decks: int, rank_scores: dict) -> None:
+        """
+        Bayes-optimal policy over remaining-deck compositions, as a table of
+        actions indexed by composition.
+
+        The cards still to come do not depend on the actions taken, so the
+        optimal action for a composition `c` (remaining count per score group)
+        maximizes the expected reward of the next card,
+        `sum_g c[g] * reward(score[g], action)`.
+
+        Use `OptimalPolicy.solve` to build a table and `OptimalPolicy.load` to
+        memory-map a saved one.
+
+        Params
+        ------
+        table : np.ndarray
+            Optimal action of every composition, indexed by composition index
+        n_decks : int
+            Number of decks in the shoe
+        rank_scores : dict
+            Mapping of rank to observed score, as for `GameBase`
+        """
+        self.table = table
+        self.n_decks = n_decks
+        self.rank_scores = rank_scores
+
+        scores, counts = _score_groups(rank_scores, n_decks)
+        radix = _composition_radix(counts)
+        if table.shape != (int(radix[-1] * (counts[-1] + 1)),):
+            raise ValueError("Table does not match the deck compositions.")
+
+        # Composition index weight of each rank (indexed by rank_index)
+        rank_score_array = np.array([rank_scores[rank] for rank in ranks])
+        self._rank_radix = radix[np.searchsorted(scores, rank_score_array)]
+
+    @classmethod
+    def solve(
+        cls,
+        n_decks: int,
+        rank_scores: dict,
+        n_actions=None,
+        path=None,
+        chunk_size=2**22,
+        max_states=max_policy_states,
+    ) -> "OptimalPolicy":
+        """
+        Enumerate every composition reachable from a full shoe and compute its
+        optimal action with `GameBase.reward`, `chunk_size` compositions at a
+        time. Ranks with equal scores share a composition entry.
+
+        With `path`, the table is written to disk in chunks (see `save`) and
+        returned memory-mapped, so tables larger than memory can be built.
+
+        Params
+        ------
+        n_decks : int
+            Number of decks in the shoe
+        rank_scores : dict
+            Mapping of rank to observed score, as for `GameBase`
+        n_actions : int (default = None)
+            Number of actions, as for `GameBase`
+        path : str or Path (default = None)
+            Where to save the table
+        chunk_size : int (default = 2**22)
+            Number of compositions evaluated at a time
+        max_states : int (default = max_policy_states)
+            Largest number of compositions to enumerate
+
+        Returns
+        -------
+        policy : OptimalPolicy
+        """
+        env = GameSimulator(n_decks, rank_scores, n_actions)
+        scores, counts = _score_groups(rank_scores, n_decks)
+        radix = _composition_radix(counts)
+        n_states = int(radix[-1] * (counts[-1] + 1))
+        if n_states > max_states:
+            raise ValueError(
+                f"{n_states} compositions exceed max_states={max_states}. "
+                "Group ranks with equal scores to shrink the table."
+            )
+
+        # Expected reward of each action for one card of each score group
+        rewards = env.reward(scores[:, None], np.arange(env.n_actions)[None, :])
+        dtype = np.min_scalar_type(env.n_actions - 1)
+
+        if path is None:
+            table = np.empty(n_states, dtype=dtype)
+        else:
+            path = Path(path).with_suffix(".npy")
+            table = np.lib.format.open_memmap(
+                path, mode="w+", dtype=dtype, shape=(n_states,)
+            )
+            cls._save_metadata(path, n_decks, rank_scores)
+
+        # Split the groups so the low part of the composition index spans at
+        # most `chunk_size` states. The expected reward of a composition is
+        # then the sum of a low-part and a high-part value, each tabulated once.
+        n_low = 1
+        while n_low < len(counts) and np.prod(counts[: n_low + 1] + 1) <= chunk_size:
+            n_low += 1
+        low_values = cls._composition_values(counts[:n_low], rewards[:n_low])
+        high_values = cls._composition_values(counts[n_low:], rewards[n_low:])
+        n_low_states = len(low_values)
+
+        rows = max(1, chunk_size // n_low_states)
+        for start in range(0, len(high_values), rows):
+            values = high_values[start : start + rows, None, :] + low_values[None]
+            # Round so that ties break to the lowest action for any split
+            actions = np.argmax(values.round(decimals=9), axis=2).ravel()
+            table[start * n_low_states : start * n_low_states + actions.size] = actions
+
+        if path is not None:
+            table.flush()
+            return cls.load(path)
+
+        return cls(table, n_decks, rank_scores)
+
+    @classmethod
+    def load(cls, path) -> "OptimalPolicy":
+        """
+        Load a table saved with `save` (or `solve`), memory-mapped read-only.
+        """
+        path = Path(path).with_suffix(".npy")
+        metadata = json.loads(path.with_suffix(".json").read_text())
+        table = np.load(path, mmap_mode="r")
+
+        return cls(table, metadata["n_decks"], metadata["rank_scores"])
+
+    def save(self, path) -> None:
+        """
+        Save the table as a `.npy` file, with a `.json` file of the same name
+        holding `n_decks` and `rank_scores`.
+        """
+        path = Path(path).with_suffix(".npy")
+        np.save(path, self.table)
+        self._save_metadata(path, self.n_decks, self.rank_scores)
+
+    def action(self, rank_counts) -> int:
+        """
+        Optimal action for the remaining count of each rank (in `ranks` order).
+        """
+        return int(self.table[int(np.dot(rank_counts, self._rank_radix))])
+
+    def episode_actions(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Optimal action before each card of a batch of shoes dealt from full,
+        given their card codes with shape `(n_episodes, n_cards)`. Used by
+        `GameSimulator.compare`.
+        """
+        weights = self._rank_radix[codes >> 2]
+        full_index = len(suits) * self.n_decks * int(self._rank_radix.sum())
+        index = full_index - (np.cumsum(weights, axis=1) - weights)
+
+        return self.table[index]
+
+    def action_func(self, env: GameSimulator):
+        """
+        Action function for `GameSimulator.simulate_run`, reading the remaining
+        rank counts of `env` in O(ranks) and looking up the action in O(1).
+        """
+        return lambda: self.action(env.remaining_rank_counts())
+
+    # Private methods
+    @staticmethod
+    def _composition_values(counts: np.ndarray, rewards: np.ndarray) -> np.ndarray:
+        """
+        Expected reward of each action (times the number of cards) for every
+        composition of the given score groups, in composition index order.
+        """
+        if len(counts) == 0:
+            return np.zeros((1, rewards.shape[1]))
+
+        index = np.arange(int(np.prod(counts + 1)))
+        radix = _composition_radix(counts)
+        compositions = (index[:, None] // radix[None, :]) % (counts + 1)
+
+        return compositions @ rewards
+
+    @staticmethod
+    def _save_metadata(path: Path, n_decks: int, rank_scores: dict) -> None:
+        metadata = {"n_decks": n_decks, "rank_scores": rank_scores}
+        path.with_suffix(".json").write_text(json.dumps(metadata))
@@ -0,0 +1,168 @@
+"""
+Module for streaming statistics of simulated rewards.
+"""
+
+### Imports ###
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+### Constants ###
+default_bins = 1000
+
+
+### Functions ###
+def z_score(confidence: float) -> float:
+    """
+    Two-sided standard normal critical value for a confidence level.
+    """
+    return NormalDist().inv_cdf((1 + confidence) / 2)
+
+
+def difference_half_width(a, b, confidence=0.95) -> float:
+    """
+    Half-width of the confidence interval of `a.mean - b.mean`, for two
+    `RunningStats` of independent samples.
+    """
+    return z_score(confidence) * math.hypot(a.sem, b.sem)
+
+
+### Classes ###
+class RunningStats:
+    """
+    Streaming mean, variance, extrema and histogram of a sequence of values,
+    fed in batches without keeping the values.
+
+    The mean and variance are updated with the batched form of Welford's
+    algorithm (Chan et al.), so results do not depend on the batch sizes.
+    Quantiles are estimated from a fixed-range histogram, with an error of at
+    most one bin width; values outside the range are counted in the edge bins.
+    """
+
+    def __init__(self, value_range=None, bins=default_bins) -> None:
+        """
+        Params
+        ------
+        value_range : tuple (default = None)
+            `(low, high)` range of the histogram. Without it, no histogram
+            (and no quantiles) is kept.
+        bins : int (default = default_bins)
+            Number of histogram bins
+        """
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0  # Sum of squared deviations from the mean
+        self.min = math.inf
+        self.max = -math.inf
+
+        self.value_range = value_range
+        self.bins = bins
+        if value_range is None:
+            self.histogram = None
+        else:
+            self.histogram = np.zeros(bins, dtype=np.int64)
+
+    @property
+    def variance(self) -> float:
+        """
+        Sample variance, or NaN for fewer than two values.
+        """
+        if self.count < 2:
+            return math.nan
+        return self._m2 / (self.count - 1)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def sem(self) -> float:
+        """
+        Standard error of the mean.
+        """
+        return self.std / math.sqrt(self.count) if self.count else math.nan
+
+    def update(self, values) -> None:
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.size == 0:
+            return
+
+        mean = values.mean()
+        self._combine(values.size, mean, np.sum((values - mean) ** 2))
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        if self.histogram is not None:
+            low, high = self.value_range
+            bin_ix = np.floor((values - low) / (high - low) * self.bins)
+            bin_ix = np.clip(bin_ix, 0, self.bins - 1).astype(np.int64)
+            self.histogram += np.bincount(bin_ix, minlength=self.bins)
+
+    def merge(self, other: "RunningStats") -> None:
+        """
+        Add the values summarized by `other`, e.g. from another process.
+        """
+        if (self.histogram is None) != (other.histogram is None) or (
+            self.histogram is not None
+            and (self.value_range, self.bins) != (other.value_range, other.bins)
+        ):
+            raise ValueError("Cannot merge RunningStats with different histograms.")
+        if other.count == 0:
+            return
+
+        self._combine(other.count, other.mean, other._m2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if self.histogram is not None:
+            self.histogram += other.histogram
+
+    def half_width(self, confidence=0.95) -> float:
+        """
+        Half-width of the normal confidence interval of the mean.
+        """
+        return z_score(confidence) * self.sem
+
+    def confidence_interval(self, confidence=0.95) -> tuple:
+        half_width = self.half_width(confidence)
+        return self.mean - half_width, self.mean + half_width
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the `q` quantile by linear interpolation within the histogram
+        bin that contains it.
+        """
+        if self.histogram is None:
+            raise ValueError("Quantiles need a histogram; pass value_range.")
+        if self.count == 0:
+            return math.nan
+
+        low, high = self.value_range
+        width = (high - low) / self.bins
+        cumulative = np.cumsum(self.histogram)
+        target = q * self.count
+        bin_ix = min(int(np.searchsorted(cumulative, target)), self.bins - 1)
+
+        below = cumulative[bin_ix - 1] if bin_ix > 0 else 0
+        fraction = (target - below) / max(self.histogram[bin_ix], 1)
+        estimate = low + (bin_ix + fraction) * width
+
+        return float(np.clip(estimate, self.min, self.max))
+
+    def summary(self, confidence=0.95) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "ci": self.confidence_interval(confidence),
+            "min": self.min,
+            "max": self.max,
+        }
+
+    # Private methods
+    def _combine(self, count: int, mean: float, m2: float) -> None:
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self._m2 += m2 + delta**2 * self.count * count / total
+        self.count = total
@@ -3,6 +3,9 @@ Utilities for card games, such as Cards, Hands, and Decks.
 """
 
 ### Imports ###
+import collections
+import copy
+import math
 import numpy as np
 
 ### Constants ###
@@ -33,12 +36,56 @@ all_ids = [rank + suit for rank in ranks.keys() for suit in suits.keys()]
 
 N_CARDS_PER_DECK = len(all_ids)
 
+# Integer card codes (rank_index * 4 + suit_index), aligned with all_ids
+all_codes = np.arange(N_CARDS_PER_DECK, dtype=np.uint8)
+
+# Hi-Lo card counting weights, the default count of a Shoe
+hi_lo_weights = {
+    **dict.fromkeys(["2", "3", "4", "5", "6"], 1),
+    **dict.fromkeys(["7", "8", "9"], 0),
+    **dict.fromkeys(["10", "J", "Q", "K", "A"], -1),
+}
+
+# Bit positions of card codes in a BitHand mask, and the mask of each suit
+_code_shifts = all_codes.astype(np.uint64)
+_suit_masks = tuple(
+    sum(1 << int(code) for code in all_codes[suit :: len(suits)])
+    for suit in range(len(suits))
+)
+
+# Fixed seed for the bit generators of cloned Decks, whose state is then
+# overwritten. Seeding from a SeedSequence is cheaper than from OS entropy.
+_clone_seed = np.random.SeedSequence(0)
+
 
 ### Low-Level Classes ###
 class Card:
-    def __init__(self, card: str) -> None:
+    """
+    A playing Card. Cards are interned flyweights: there is exactly one Card
+    instance per id, built once at import, so `Card("4H") is Card("4H")`.
+    Equality and hashing are by identity, which lets Cards go straight into
+    sets and dicts. Cards are immutable.
+
+    Besides the string fields, each Card exposes integer fields for hot paths:
+    `code` (`rank_index * 4 + suit_index`), `rank_index` (position of the rank
+    in `ranks`) and `suit_index` (position of the suit in `suits`).
+    """
+
+    __slots__ = (
+        "rank",
+        "suit",
+        "rank_name",
+        "suit_name",
+        "name",
+        "id",
+        "code",
+        "rank_index",
+        "suit_index",
+    )
+
+    def __new__(cls, card: str) -> "Card":
         """
-        Initialize a Card. Input string should be of the format RankSuit.
+        Look up a Card. Input string should be of the format RankSuit.
 
         Examples:
             - Card("4H") == Four of Hearts
@@ -50,30 +97,111 @@ class Card:
         card : str
             Desired card in RankSuit format
         """
-        input_as_list = list(card)
+        try:
+            return _cards_by_id[card]
+        except KeyError:
+            raise ValueError(f"{card!r} is not a valid card id.") from None
+
+    @classmethod
+    def from_code(cls, code: int) -> "Card":
+        """
+        Look up a Card by its integer code (`rank_index * 4 + suit_index`).
+        """
+        return _cards_by_code[code]
+
+    @classmethod
+    def _build(cls, code: int) -> "Card":
+        # Only called while building the lookup tables at import
+        card = object.__new__(cls)
+        rank_index, suit_index = divmod(code, len(suits))
+        rank = list(ranks.keys())[rank_index]
+        suit = list(suits.keys())[suit_index]
+
+        fields = {
+            "rank": rank,
+            "suit": suit,
+            "rank_name": ranks[rank],
+            "suit_name": suits[suit],
+            "name": f"{ranks[rank]} of {suits[suit]}",
+            "id": rank + suit,
+            "code": code,
+            "rank_index": rank_index,
+            "suit_index": suit_index,
+        }
+        for attr, value in fields.items():
+            object.__setattr__(card, attr, value)
+
+        return card
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Cards are immutable.")
 
-        # Capture 0th up to 2nd-to-last element as str
-        # Store as rank
-        # Rank is captured this way to support 2-digit '10' rank
-        self.rank = "".join(input_as_list[0:-1])
-        # Capture last element of list for suit
-        self.suit = "".join(input_as_list[-1])
+    def __reduce__(self):
+        # Unpickle (and copy) to the interned instance
+        return (Card, (self.id,))
 
-        # Generate rank name and suit name
-        self.rank_name = ranks[self.rank]
-        self.suit_name = suits[self.suit]
+    def __repr__(self) -> str:
+        return f"Card({self.id!r})"
 
-        # Generate card name and ID
-        self.name = f"{self.rank_name} of {self.suit_name}"
-        self.id = self.rank + self.suit
+
+# Lookup tables of interned Cards, built once at import
+_cards_by_code = tuple(Card._build(code) for code in range(N_CARDS_PER_DECK))
+_cards_by_id = {card.id: card for card in _cards_by_code}
 
 
 ### High-Level Classes ###
+def _clone_generator(rng: np.random.Generator) -> np.random.Generator:
+    """
+    Independent Generator in the same state as `rng`.
+    """
+    clone = np.random.Generator(type(rng.bit_generator)(_clone_seed))
+    clone.bit_generator.state = rng.bit_generator.state
+    return clone
+
+
+def _cut_codes(cut_cards) -> np.ndarray:
+    """
+    Codes of cut Cards for a Deck state, or None if there are none.
+    """
+    return cut_cards.codes if cut_cards.n_cards else None
+
+
+def _cut_hand(codes) -> "Hand":
+    """
+    Hand of cut Cards restored from a Deck state.
+    """
+    hand = Hand()
+    if codes is not None:
+        hand.add_codes(codes)
+    return hand
+
+
+def _to_code(card) -> int:
+    """
+    Convert a Card, card id or card code to a card code.
+    """
+    if isinstance(card, Card):
+        return card.code
+    if isinstance(card, str):
+        return Card(card).code
+    return int(card)
+
+
+def _mask_from_counts(counts: np.ndarray) -> int:
+    """
+    BitHand mask of the codes with a nonzero count.
+    """
+    return sum(1 << code for code in np.flatnonzero(counts).tolist())
+
+
 class Hand:
     def __init__(self, *args: Card) -> None:
         """
         Initialize a Hand. Input args must be Cards.
 
+        Alongside the ordered Cards, a Hand keeps a per-code count array and a
+        code -> positions index, so membership, counting and removal are O(1).
+
         Examples:
             - `Hand(Card("4H"), Card("8C"), Card("AS"))` initializes a Hand
               containing Four of Hearts, Eight of Clubs, and Ace of Spades.
@@ -84,10 +212,28 @@ class Hand:
             Variable number of Cards, where each Card is input in the format
             `Card("RankSuit")`
         """
-        self.cards = [arg for arg in args]
-        ids = self.ids  # Generate ids to make sure args are Cards
+        self.cards = args
 
     # Class Properties
+    @property
+    def cards(self) -> tuple[Card, ...]:
+        """
+        Cards currently in hand, in the order they were added. The tuple is a
+        snapshot: change the Hand with `add_cards` and `remove_cards` (or by
+        assigning `cards`).
+        """
+        if self._n_removed:
+            self._compact()
+        return tuple(self._slots)
+
+    @cards.setter
+    def cards(self, cards) -> None:
+        self._slots = []  # Cards in insertion order, None for removed Cards
+        self._positions = {}  # Card code -> ascending slot indices
+        self._counts = np.zeros(N_CARDS_PER_DECK, dtype=np.int64)
+        self._n_removed = 0
+        self.add_cards(*cards)
+
     @property
     def ids(self) -> list[str]:
         """
@@ -95,27 +241,83 @@ class Hand:
         """
         return [card.id for card in self.cards]
 
+    @property
+    def codes(self) -> np.ndarray:
+        """
+        Codes associated with each Card.
+        """
+        return np.array([card.code for card in self.cards], dtype=np.uint8)
+
     @property
     def n_cards(self) -> int:
         """
         Number of Cards currently in hand.
         """
-        return len(self.cards)
+        return len(self._slots) - self._n_removed
 
     # Public methods
+    def contains(self, card) -> bool:
+        """
+        Whether the Hand contains `card` (a Card, card id or card code).
+        """
+        return bool(self._counts[_to_code(card)])
+
+    def count(self, card) -> int:
+        """
+        Number of occurrences of `card` (a Card, card id or card code).
+        """
+        return int(self._counts[_to_code(card)])
+
+    def counts(self) -> np.ndarray:
+        """
+        Copy of the per-code count array, indexed by card code.
+        """
+        return self._counts.copy()
+
+    def rank_counts(self) -> np.ndarray:
+        """
+        Number of Cards of each rank, in `ranks` order.
+        """
+        return self._counts.reshape(len(ranks), len(suits)).sum(axis=1)
+
     def add_cards(self, *args: Card) -> None:
         for arg in args:
-            self.cards.append(arg)
+            code = arg.code  # Make sure args are Cards
+            self._positions.setdefault(code, collections.deque()).append(
+                len(self._slots)
+            )
+            self._slots.append(arg)
+            self._counts[code] += 1
+
+    def add_codes(self, codes) -> None:
+        """
+        Add Cards in bulk from an array of card codes.
+        """
+        self.add_cards(*[_cards_by_code[code] for code in np.asarray(codes).tolist()])
 
     def remove_cards(self, *args: Card) -> None:
-        for arg in args:
-            ix = self.ids.index(arg.id)
-            self.cards.pop(ix)
+        self.remove_codes([arg.code for arg in args])
 
     def remove_by_id(self, *args: str) -> None:
-        for arg in args:
-            ix = self.ids.index(arg)
-            self.cards.pop(ix)
+        self.remove_codes([Card(arg).code for arg in args])
+
+    def remove_codes(self, codes) -> None:
+        """
+        Remove Cards in bulk from an array of card codes. The first remaining
+        occurrence of each code is removed.
+        """
+        for code in np.asarray(codes).tolist():
+            positions = self._positions.get(code)
+            if not positions:
+                raise ValueError(f"{all_ids[code]} is not in Hand.")
+
+            self._slots[positions.popleft()] = None
+            self._counts[code] -= 1
+            self._n_removed += 1
+
+        # Keep removed slots to at most half of the storage (amortized O(1))
+        if self._n_removed > len(self._slots) // 2:
+            self._compact()
 
     def print_cardnames(self) -> None:
         names = [card.name for card in self.cards]
@@ -127,35 +329,438 @@ class Hand:
         string = ", ".join(ids)
         print(string)
 
+    # Private methods
+    def _compact(self) -> None:
+        """
+        Drop removed slots and rebuild the positions index.
+        """
+        self._slots = [card for card in self._slots if card is not None]
+        self._positions = {}
+        for ix, card in enumerate(self._slots):
+            self._positions.setdefault(card.code, collections.deque()).append(ix)
+        self._n_removed = 0
+
+    def __contains__(self, card) -> bool:
+        return self.contains(card)
+
+    def __len__(self) -> int:
+        return self.n_cards
+
+
+class BitHand:
+    def __init__(self, *args: Card, n_decks=1) -> None:
+        """
+        Initialize an unordered Hand packed into a bitmask. Input args must be
+        Cards.
+
+        Bit `code` of `mask` is set when the Hand holds a Card of that code,
+        so union, intersection and membership are single integer operations.
+        A single-deck BitHand is a set of Cards, held in the mask alone. With
+        `n_decks > 1`, a per-code count array holds repeated Cards (up to
+        `n_decks` of each), and union and intersection take the larger and
+        smaller count of each code.
+
+        Params
+        ------
+        *args : Card
+            Variable number of Cards
+        n_decks : int (default = 1)
+            Number of decks the Cards are drawn from
+        """
+        self.n_decks = n_decks
+        self.mask = 0
+        self._counts = None if n_decks == 1 else np.zeros(N_CARDS_PER_DECK, np.uint8)
+        self.add_cards(*args)
+
+    @classmethod
+    def from_codes(cls, codes, n_decks=1) -> "BitHand":
+        """
+        Build a BitHand from an array of card codes.
+        """
+        hand = cls(n_decks=n_decks)
+        hand.add_codes(codes)
+        return hand
+
+    @classmethod
+    def from_mask(cls, mask: int) -> "BitHand":
+        """
+        Build a single-deck BitHand from a bitmask.
+        """
+        hand = cls()
+        hand.mask = int(mask)
+        return hand
+
+    # Class Properties
+    @property
+    def codes(self) -> np.ndarray:
+        """
+        Codes of the Cards in hand, in ascending order.
+        """
+        return np.repeat(all_codes, self.counts())
+
+    @property
+    def cards(self) -> list[Card]:
+        return [_cards_by_code[code] for code in self.codes.tolist()]
+
+    @property
+    def ids(self) -> list[str]:
+        return [card.id for card in self.cards]
+
+    @property
+    def n_cards(self) -> int:
+        if self._counts is None:
+            return self.mask.bit_count()
+        return int(self._counts.sum())
+
+    # Public methods
+    def contains(self, card) -> bool:
+        """
+        Whether the Hand contains `card` (a Card, card id or card code).
+        """
+        return bool(self.mask >> _to_code(card) & 1)
+
+    def count(self, card) -> int:
+        code = _to_code(card)
+        if self._counts is None:
+            return self.mask >> code & 1
+        return int(self._counts[code])
+
+    def counts(self) -> np.ndarray:
+        """
+        Per-code count array, indexed by card code.
+        """
+        if self._counts is None:
+            return (np.uint64(self.mask) >> _code_shifts & 1).astype(np.int64)
+        return self._counts.astype(np.int64)
+
+    def rank_counts(self) -> np.ndarray:
+        """
+        Number of Cards of each rank, in `ranks` order.
+        """
+        return self.counts().reshape(len(ranks), len(suits)).sum(axis=1)
+
+    def suit_counts(self) -> np.ndarray:
+        """
+        Number of Cards of each suit, in `suits` order.
+        """
+        if self._counts is None:
+            return np.array([(self.mask & mask).bit_count() for mask in _suit_masks])
+        return self.counts().reshape(len(ranks), len(suits)).sum(axis=0)
+
+    def add_cards(self, *args: Card) -> None:
+        self.add_codes([arg.code for arg in args])
+
+    def add_codes(self, codes) -> None:
+        """
+        Add Cards in bulk from an array of card codes.
+        """
+        for code in np.asarray(codes).tolist():
+            if self._counts is None:
+                if self.mask >> code & 1:
+                    raise ValueError(f"{all_ids[code]} is already in a 1-deck Hand.")
+            elif self._counts[code] == self.n_decks:
+                raise ValueError(f"{all_ids[code]} is in all {self.n_decks} decks.")
+            else:
+                self._counts[code] += 1
+            self.mask |= 1 << code
+
+    def remove_cards(self, *args: Card) -> None:
+        self.remove_codes([arg.code for arg in args])
+
+    def remove_codes(self, codes) -> None:
+        """
+        Remove one occurrence of each card code from the Hand.
+        """
+        for code in np.asarray(codes).tolist():
+            if not self.mask >> code & 1:
+                raise ValueError(f"{all_ids[code]} is not in Hand.")
+            if self._counts is not None:
+                self._counts[code] -= 1
+                if self._counts[code]:
+                    continue
+            self.mask &= ~(1 << code)
+
+    def union(self, other: "BitHand") -> "BitHand":
+        hand = self._like(other)
+        hand.mask = self.mask | other.mask
+        if hand._counts is not None:
+            np.maximum(self._counts, other._counts, out=hand._counts)
+        return hand
+
+    def intersection(self, other: "BitHand") -> "BitHand":
+        hand = self._like(other)
+        hand.mask = self.mask & other.mask
+        if hand._counts is not None:
+            np.minimum(self._counts, other._counts, out=hand._counts)
+            hand.mask = _mask_from_counts(hand._counts)
+        return hand
+
+    # Private methods
+    def _like(self, other: "BitHand") -> "BitHand":
+        if self.n_decks != other.n_decks:
+            raise ValueError("BitHands must be drawn from the same number of decks.")
+        return BitHand(n_decks=self.n_decks)
+
+    def __contains__(self, card) -> bool:
+        return self.contains(card)
+
+    def __len__(self) -> int:
+        return self.n_cards
+
+    def __or__(self, other: "BitHand") -> "BitHand":
+        return self.union(other)
+
+    def __and__(self, other: "BitHand") -> "BitHand":
+        return self.intersection(other)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, BitHand):
+            return NotImplemented
+        if self._counts is None or other._counts is None:
+            return (self.n_decks, self.mask) == (other.n_decks, other.mask)
+        return self.n_decks == other.n_decks and np.array_equal(
+            self._counts, other._counts
+        )
+
+    def __repr__(self) -> str:
+        return f"BitHand({', '.join(self.ids)})"
+
 
 class Deck(Hand):
     def __init__(
         self,
         n_decks=1,
         seed=None,
+        lazy=False,
     ) -> None:
         """
         Initialize a Deck containing `n_decks * N_CARDS_PER_DECK` Cards.
 
+        Cards are stored as a `uint8` array of card codes
+        (`rank_index * 4 + suit_index`, see `all_codes`). Dealing advances a
+        cursor through the array, and Card objects are only created when
+        requested through `cards`, `ids` or `deal`.
+
+        With `lazy=True`, `shuffle` is O(1): each dealt card is picked at
+        random from the remaining cards (an incremental Fisher-Yates shuffle),
+        so only the dealt part of the Deck is ever shuffled. Reading `codes`,
+        `cards` or `ids` first completes the pending shuffle, so the Deck looks
+        the same as an eagerly shuffled one.
+
         Params
         ------
         n_decks : int (default = 1)
             Number of decks to initialize with. Each of the Cards will have
             `n_decks` occurrences in the Deck.
         seed : Any (default = None)
-            Seed for shuffling deck
+            Seed for shuffling deck. A `np.random.Generator` is used as is.
+        lazy : bool (default = False)
+            Whether to shuffle lazily, one card at a time when dealt
         """
-        all_cards = [Card(id) for id in all_ids] * n_decks
-
-        super().__init__(*all_cards)
+        self.n_decks = n_decks
+        self.lazy = lazy
+        self._codes = np.tile(all_codes, n_decks)
+        self._cursor = 0  # Index of the top card of the Deck
+        self._end = self._codes.size  # One past the index of the bottom card
+        self._pending_shuffle = False  # Remaining cards not yet shuffled
+        self._storage_rank_counts = np.full(len(ranks), len(suits) * n_decks)
+        self.cut_cards = Hand()
 
         self._rng = np.random.default_rng(seed=seed)
 
+    # Class Properties
+    @property
+    def codes(self) -> np.ndarray:
+        """
+        Read-only view of the codes of the Cards remaining in the Deck, from
+        top to bottom.
+        """
+        self._complete_shuffle()
+        view = self._codes[self._cursor : self._end]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def cards(self) -> tuple[Card, ...]:
+        """
+        Cards remaining in the Deck, from top to bottom, as for `Hand.cards`.
+        """
+        self._complete_shuffle()
+        return tuple(
+            _cards_by_code[code] for code in self._codes[self._cursor : self._end]
+        )
+
+    @cards.setter
+    def cards(self, cards) -> None:
+        # Replace the Deck with `cards`, from top to bottom, undealt
+        self._codes = np.array([card.code for card in cards], dtype=np.uint8)
+        self._pending_shuffle = False
+        self._rebase()
+
+    @property
+    def ids(self) -> list[str]:
+        """
+        Alphanumeric IDs associated with each Card.
+        """
+        self._complete_shuffle()
+        return [all_ids[code] for code in self._codes[self._cursor : self._end]]
+
+    @property
+    def n_cards(self) -> int:
+        """
+        Number of Cards currently in the Deck.
+        """
+        return self._end - self._cursor
+
+    # Public methods
+    def contains(self, card) -> bool:
+        """
+        Whether the Deck contains `card` (a Card, card id or card code).
+        Unlike Hand, this scans the remaining Cards.
+        """
+        return bool(np.any(self._remaining() == _to_code(card)))
+
+    def count(self, card) -> int:
+        """
+        Number of occurrences of `card` (a Card, card id or card code).
+        Unlike Hand, this scans the remaining Cards.
+        """
+        return int(np.count_nonzero(self._remaining() == _to_code(card)))
+
+    def counts(self) -> np.ndarray:
+        """
+        Per-code count array of the remaining Cards, indexed by card code.
+        """
+        return np.bincount(self._remaining(), minlength=N_CARDS_PER_DECK)
+
+    def rank_counts(self) -> np.ndarray:
+        """
+        Number of remaining Cards of each rank, in `ranks` order. O(ranks)
+        when no Cards have been dealt or cut.
+        """
+        if self._cursor == 0 and self._end == self._codes.size:
+            return self._storage_rank_counts.copy()
+
+        return np.bincount(self._remaining() >> 2, minlength=len(ranks))
+
+    def add_cards(self, *args: Card) -> None:
+        self.add_codes([arg.code for arg in args])
+
+    def add_codes(self, codes) -> None:
+        """
+        Add Cards to the bottom of the Deck from an array of card codes.
+        """
+        codes = np.asarray(codes, dtype=np.uint8)
+        self._codes = np.concatenate((self.codes, codes))
+        self._rebase()
+
+    def remove_codes(self, codes) -> None:
+        """
+        Remove Cards from an array of card codes. The occurrence nearest the
+        top of the Deck is removed for each code.
+        """
+        remaining = self.codes
+        for code in np.asarray(codes).tolist():
+            ix = np.flatnonzero(remaining == code)
+            if ix.size == 0:
+                raise ValueError(f"{all_ids[code]} is not in Deck.")
+            remaining = np.delete(remaining, ix[0])
+
+        self._codes = remaining.copy()
+        self._rebase()
+
+    def get_state(self) -> tuple:
+        """
+        Snapshot of the Deck: a copy of its code array, cursors, cut Cards and
+        generator state. The snapshot is small and picklable.
+        """
+        return (
+            self._codes.copy(),
+            self._cursor,
+            self._end,
+            self._pending_shuffle,
+            self._storage_rank_counts.copy(),
+            _cut_codes(self.cut_cards),
+            self._rng.bit_generator.state,
+        )
+
+    def set_state(self, state: tuple) -> None:
+        """
+        Restore a snapshot from `get_state`, copying the codes into the
+        existing array when it has the same size.
+        """
+        codes, self._cursor, self._end, self._pending_shuffle = state[:4]
+        if codes.size == self._codes.size:
+            np.copyto(self._codes, codes)
+        else:
+            self._codes = codes.copy()
+        np.copyto(self._storage_rank_counts, state[4])
+        if state[5] is not None or self.cut_cards.n_cards:
+            self.cut_cards = _cut_hand(state[5])
+        self._rng.bit_generator.state = state[6]
+
+    def clone(self) -> "Deck":
+        """
+        Independent copy of the Deck, with its own code array and generator.
+        """
+        deck = copy.copy(self)
+        deck._codes = np.empty_like(self._codes)
+        deck._storage_rank_counts = np.empty_like(self._storage_rank_counts)
+        deck._rng = _clone_generator(self._rng)
+        deck.set_state(self.get_state())
+        return deck
+
     def shuffle(self) -> None:
         """
-        Shuffles card deck.
+        Shuffles card deck. In lazy mode, the shuffle is deferred to `deal`.
         """
-        self._rng.shuffle(self.cards)
+        if self.lazy:
+            self._pending_shuffle = True
+        else:
+            self._rng.shuffle(self._codes[self._cursor : self._end])
+
+    def reset(self) -> None:
+        """
+        Returns all dealt and cut Cards to the Deck, in place and without
+        shuffling. Cards removed with `add_codes`/`remove_codes` stay removed.
+        """
+        self._cursor = 0
+        self._end = self._codes.size
+        if self.cut_cards.n_cards:
+            self.cut_cards = Hand()
+
+    def deal_codes(
+        self,
+        n=1,
+    ) -> np.ndarray:
+        """
+        Deals `n` card codes from top of the deck. Removes the cards from the
+        Deck in O(n), independent of the number of Cards in the Deck.
+
+        Params
+        ------
+        n : int (default = 1)
+            Number of cards to be dealt
+
+        Returns
+        -------
+        codes : np.ndarray
+            View of the codes that were dealt. The view is only valid until
+            the Deck is shuffled or modified.
+        """
+        if n > self._end - self._cursor:
+            raise ValueError("Cannot deal more cards than Deck contains.")
+
+        start = self._cursor
+        if self._pending_shuffle:
+            # Incremental Fisher-Yates: swap a random remaining card to the top
+            codes = self._codes
+            for i in range(start, start + n):
+                j = self._rng.integers(i, self._end)
+                codes[i], codes[j] = codes[j], codes[i]
+        self._cursor += n
+
+        return self._codes[start : self._cursor]
 
     def deal(
         self,
@@ -175,20 +780,390 @@ class Deck(Hand):
         cards : list[Card]
             Cards that were dealt
         """
-        if n > len(self.cards):
+        return [_cards_by_code[code] for code in self.deal_codes(n)]
+
+    def cut(
+        self,
+        n: int,
+    ) -> None:
+        """
+        Cuts the last n Cards out of the Deck.
+
+        Cut Cards are stored as a Hand in the Deck.cut_cards attribute.
+
+        Params
+        ------
+        n : int
+            Number of Cards to cut
+        """
+        if n > self.n_cards:
+            raise ValueError("Cannot cut more cards than Deck contains.")
+
+        if self._pending_shuffle:
+            # Incremental Fisher-Yates from the bottom of the Deck
+            codes = self._codes
+            for i in range(self._end - 1, self._end - n - 1, -1):
+                j = self._rng.integers(self._cursor, i + 1)
+                codes[i], codes[j] = codes[j], codes[i]
+
+        self._end -= n
+        self.cut_cards = Hand(
+            *[_cards_by_code[code] for code in self._codes[self._end : self._end + n]]
+        )
+
+    # Private methods
+    def _remaining(self) -> np.ndarray:
+        """
+        View of the remaining codes, in storage order (which is not yet
+        shuffled while a lazy shuffle is pending).
+        """
+        return self._codes[self._cursor : self._end]
+
+    def _complete_shuffle(self) -> None:
+        """
+        Shuffle the remaining Cards now if a lazy shuffle is pending.
+        """
+        if self._pending_shuffle:
+            self._rng.shuffle(self._codes[self._cursor : self._end])
+            self._pending_shuffle = False
+
+    def _rebase(self) -> None:
+        """
+        Make the current storage the full Deck, after Cards were added or
+        removed.
+        """
+        self._cursor = 0
+        self._end = self._codes.size
+        self._storage_rank_counts = np.bincount(self._codes >> 2, minlength=len(ranks))
+
+
+class Shoe(Deck):
+    def __init__(
+        self,
+        n_decks=6,
+        seed=None,
+        penetration=0.75,
+        count_weights=None,
+    ) -> None:
+        """
+        Initialize a multi-deck Shoe that persists across rounds, as dealt in
+        a casino.
+
+        A cut card is placed after `penetration` of the Cards. `shuffle`
+        starts a new round: it reshuffles every Card in place once the cut
+        card has come out, and otherwise keeps dealing from the current shoe,
+        so a round only costs the Cards it deals. `reset` leaves the Shoe as
+        is. `n_cards` and `codes` cover the Cards before the cut card, so a
+        game's round ends when the cut card comes out.
+
+        The Cards behind the cut card are not revealed: `rank_counts`,
+        `counts` and `contains` cover every unseen Card. The count-to-date
+        under `count_weights` is a prefix sum over the shuffled Cards, so
+        `running_count` and `true_count` are O(1).
+
+        Params
+        ------
+        n_decks : int (default = 6)
+            Number of decks in the Shoe
+        seed : Any (default = None)
+            Seed for shuffling the Shoe. A `np.random.Generator` is used as is.
+        penetration : float (default = 0.75)
+            Fraction of the Cards dealt before the cut card, in (0, 1]
+        count_weights : dict (default = None)
+            Mapping of rank to count weight. Defaults to `hi_lo_weights`.
+        """
+        if not 0 < penetration <= 1:
+            raise ValueError("penetration must lie in (0, 1].")
+
+        self.penetration = penetration
+        self.n_shuffles = 0
+        weights = hi_lo_weights if count_weights is None else count_weights
+        self._code_weights = np.repeat([weights[rank] for rank in ranks], len(suits))
+
+        super().__init__(n_decks, seed)
+        self._rebase()
+
+    # Class Properties
+    @property
+    def n_dealt(self) -> int:
+        """
+        Number of Cards dealt since the last shuffle.
+        """
+        return self._cursor
+
+    @property
+    def n_unseen(self) -> int:
+        """
+        Number of Cards not dealt yet, including those behind the cut card.
+        """
+        return self._codes.size - self._cursor
+
+    @property
+    def needs_shuffle(self) -> bool:
+        """
+        Whether the cut card has come out (or the Shoe was never shuffled).
+        """
+        return self.n_shuffles == 0 or self._cursor >= self._end
+
+    @property
+    def running_count(self) -> int:
+        """
+        Sum of the count weights of the Cards dealt since the last shuffle.
+        """
+        return int(self._count_to_date[self._cursor])
+
+    @property
+    def true_count(self) -> float:
+        """
+        Running count per deck of unseen Cards, or 0.0 once every Card is dealt.
+        """
+        if self.n_unseen == 0:
+            return 0.0
+        return self.running_count * N_CARDS_PER_DECK / self.n_unseen
+
+    # Public methods
+    def dealt_rank_counts(self) -> np.ndarray:
+        """
+        Number of Cards of each rank dealt since the last shuffle.
+        """
+        return np.bincount(self._codes[: self._cursor] >> 2, minlength=len(ranks))
+
+    def get_state(self) -> tuple:
+        return super().get_state(), self.n_shuffles
+
+    def set_state(self, state: tuple) -> None:
+        deck_state, self.n_shuffles = state
+        super().set_state(deck_state)
+        self._index_counts()
+
+    def clone(self) -> "Shoe":
+        deck = super().clone()
+        deck._count_to_date = self._count_to_date.copy()
+        return deck
+
+    def shuffle(self) -> None:
+        """
+        Start a new round, reshuffling if the cut card has come out.
+        """
+        if self.needs_shuffle:
+            self.reshuffle()
+
+    def reshuffle(self) -> None:
+        """
+        Return every dealt Card to the Shoe and shuffle it in place.
+        """
+        self._cursor = 0
+        self._end = self.cut_index
+        self._rng.shuffle(self._codes)
+        self._index_counts()
+        self.n_shuffles += 1
+
+    def reset(self) -> None:
+        """
+        Keep the Shoe as is: dealt Cards only return with a reshuffle.
+        """
+
+    # Private methods
+    def _remaining(self) -> np.ndarray:
+        """
+        View of the unseen codes, including those behind the cut card.
+        """
+        return self._codes[self._cursor :]
+
+    def _index_counts(self) -> None:
+        """
+        Recompute the count-to-date before each Card of the shuffled Shoe.
+        """
+        if self._count_to_date.size != self._codes.size + 1:
+            self._count_to_date = np.zeros(self._codes.size + 1, dtype=np.int64)
+        np.cumsum(self._code_weights[self._codes], out=self._count_to_date[1:])
+
+    def _rebase(self) -> None:
+        """
+        Make the current storage the full Shoe and place the cut card.
+        """
+        super()._rebase()
+        self.cut_index = max(round(self.penetration * self._codes.size), 1)
+        self._end = self.cut_index
+        self._count_to_date = np.zeros(self._codes.size + 1, dtype=np.int64)
+        self._index_counts()
+
+
+class CountDeck:
+    def __init__(
+        self,
+        n_decks=1,
+        seed=None,
+    ) -> None:
+        """
+        Initialize a lazy shoe of `n_decks * N_CARDS_PER_DECK` Cards, stored as
+        a count per card code instead of a list of Cards.
+
+        The order of the Cards is never materialized: each dealt Card is drawn
+        uniformly (without replacement) from the remaining counts. Memory and
+        initialization are O(N_CARDS_PER_DECK), independent of `n_decks`.
+
+        Params
+        ------
+        n_decks : int (default = 1)
+            Number of decks to initialize with
+        seed : Any (default = None)
+            Seed for drawing Cards
+        """
+        self.n_decks = n_decks
+        self._counts = np.full(N_CARDS_PER_DECK, n_decks, dtype=np.int64)
+        self._n_cards = N_CARDS_PER_DECK * n_decks
+        self.cut_cards = Hand()
+
+        self._rng = np.random.default_rng(seed=seed)
+
+    # Class Properties
+    @property
+    def codes(self) -> np.ndarray:
+        """
+        Codes of the remaining Cards, sorted by code (the order is only decided
+        when Cards are dealt).
+        """
+        return np.repeat(all_codes, self._counts)
+
+    @property
+    def cards(self) -> list[Card]:
+        """
+        Remaining Cards, sorted by code.
+        """
+        return [_cards_by_code[code] for code in self.codes]
+
+    @property
+    def ids(self) -> list[str]:
+        """
+        Alphanumeric IDs of the remaining Cards, sorted by code.
+        """
+        return [all_ids[code] for code in self.codes]
+
+    @property
+    def n_cards(self) -> int:
+        """
+        Number of Cards currently in the Deck.
+        """
+        return self._n_cards
+
+    # Public methods
+    def counts(self) -> np.ndarray:
+        """
+        Per-code count array of the remaining Cards, indexed by card code.
+        """
+        return self._counts.copy()
+
+    def rank_counts(self) -> np.ndarray:
+        """
+        Number of remaining Cards of each rank, in `ranks` order.
+        """
+        return self._counts.reshape(len(ranks), len(suits)).sum(axis=1)
+
+    def get_state(self) -> tuple:
+        """
+        Snapshot of the Deck: a copy of its counts, cut Cards and generator
+        state. The snapshot is small and picklable.
+        """
+        return (
+            self._counts.copy(),
+            self._n_cards,
+            _cut_codes(self.cut_cards),
+            self._rng.bit_generator.state,
+        )
+
+    def set_state(self, state: tuple) -> None:
+        """
+        Restore a snapshot from `get_state`.
+        """
+        np.copyto(self._counts, state[0])
+        self._n_cards = state[1]
+        if state[2] is not None or self.cut_cards.n_cards:
+            self.cut_cards = _cut_hand(state[2])
+        self._rng.bit_generator.state = state[3]
+
+    def clone(self) -> "CountDeck":
+        """
+        Independent copy of the Deck, with its own counts and generator.
+        """
+        deck = copy.copy(self)
+        deck._counts = np.empty_like(self._counts)
+        deck._rng = _clone_generator(self._rng)
+        deck.set_state(self.get_state())
+        return deck
+
+    def shuffle(self) -> None:
+        """
+        No-op: Cards are drawn at random when dealt.
+        """
+
+    def reset(self) -> None:
+        """
+        Returns all dealt and cut Cards to the Deck, in place.
+        """
+        self._counts.fill(self.n_decks)
+        self._n_cards = N_CARDS_PER_DECK * self.n_decks
+        if self.cut_cards.n_cards:
+            self.cut_cards = Hand()
+
+    def deal_codes(
+        self,
+        n=1,
+    ) -> np.ndarray:
+        """
+        Deals `n` card codes, each drawn uniformly from the remaining Cards.
+        Each card costs O(N_CARDS_PER_DECK), independent of `n_decks`.
+
+        Params
+        ------
+        n : int (default = 1)
+            Number of cards to be dealt
+
+        Returns
+        -------
+        codes : np.ndarray
+            Codes that were dealt
+        """
+        if n > self._n_cards:
             raise ValueError("Cannot deal more cards than Deck contains.")
 
-        cards = self.cards[:n]
-        self.remove_cards(*cards)
+        codes = np.empty(n, dtype=np.uint8)
+        for i, position in enumerate(self._rng.random(n)):
+            # Position of the dealt Card among the remaining Cards
+            ix = int(position * self._n_cards)
+            code = np.searchsorted(np.cumsum(self._counts), ix, side="right")
+            self._counts[code] -= 1
+            self._n_cards -= 1
+            codes[i] = code
+
+        return codes
 
-        return cards
+    def deal(
+        self,
+        n=1,
+    ) -> list[Card]:
+        """
+        Deals `n` Cards, each drawn uniformly from the remaining Cards.
+
+        Params
+        ------
+        n : int (default = 1)
+            Number of Cards to be dealt
+
+        Returns
+        -------
+        cards : list[Card]
+            Cards that were dealt
+        """
+        return [_cards_by_code[code] for code in self.deal_codes(n)]
 
     def cut(
         self,
         n: int,
     ) -> None:
         """
-        Cuts the last n Cards out of the Deck.
+        Cuts n random Cards out of the Deck (the bottom of a shoe whose order
+        is not yet decided).
 
         Cut Cards are stored as a Hand in the Deck.cut_cards attribute.
 
@@ -200,11 +1175,146 @@ class Deck(Hand):
         if n > self.n_cards:
             raise ValueError("Cannot cut more cards than Deck contains.")
 
-        self.cut_cards = Hand(*self.cards[-n:])
-        self.cards = self.cards[:-n]
+        self.cut_cards = Hand()
+        self.cut_cards.add_codes(self.deal_codes(n))
 
 
-"""
-To-Do:
-- Consider implementing infinite deck (and how to do it)
-"""
+class InfiniteDeck:
+    def __init__(
+        self,
+        seed=None,
+        batch_size=1024,
+    ) -> None:
+        """
+        Initialize an infinite Deck, which deals Cards drawn i.i.d. uniformly
+        from a single deck (sampling with replacement). This is the limit of a
+        shoe with infinitely many decks.
+
+        Cards are drawn from the generator in batches of `batch_size` codes.
+        Memory and initialization are O(batch_size).
+
+        Params
+        ------
+        seed : Any (default = None)
+            Seed for drawing Cards
+        batch_size : int (default = 1024)
+            Number of card codes drawn from the generator at a time
+        """
+        self.n_decks = None
+        self._batch_size = batch_size
+        self._buffer = np.empty(0, dtype=np.uint8)
+        self._cursor = 0
+
+        self._rng = np.random.default_rng(seed=seed)
+
+    # Class Properties
+    @property
+    def codes(self) -> np.ndarray:
+        """
+        Codes of a single deck, which every Card is drawn from.
+        """
+        view = all_codes[:]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def n_cards(self) -> float:
+        """
+        Number of Cards in the Deck, which is infinite.
+        """
+        return math.inf
+
+    # Public methods
+    def rank_counts(self) -> np.ndarray:
+        """
+        Number of Cards of each rank in the single deck every Card is drawn
+        from, in `ranks` order.
+        """
+        return np.full(len(ranks), len(suits))
+
+    def get_state(self) -> tuple:
+        """
+        Snapshot of the Deck: the drawn but undealt codes and the generator
+        state. The snapshot is small and picklable.
+        """
+        return self._buffer[self._cursor :].copy(), self._rng.bit_generator.state
+
+    def set_state(self, state: tuple) -> None:
+        """
+        Restore a snapshot from `get_state`.
+        """
+        self._buffer = state[0].copy()
+        self._cursor = 0
+        self._rng.bit_generator.state = state[1]
+
+    def clone(self) -> "InfiniteDeck":
+        """
+        Independent copy of the Deck, with its own generator.
+        """
+        deck = copy.copy(self)
+        deck._rng = _clone_generator(self._rng)
+        deck.set_state(self.get_state())
+        return deck
+
+    def shuffle(self) -> None:
+        """
+        Discards Cards already drawn from the generator but not yet dealt.
+        """
+        self._cursor = self._buffer.size
+
+    def reset(self) -> None:
+        """
+        No-op: no Cards are ever removed from an infinite Deck.
+        """
+
+    def deal_codes(
+        self,
+        n=1,
+    ) -> np.ndarray:
+        """
+        Deals `n` card codes, drawn i.i.d. uniformly from a single deck.
+
+        Params
+        ------
+        n : int (default = 1)
+            Number of cards to be dealt
+
+        Returns
+        -------
+        codes : np.ndarray
+            View of the codes that were dealt. The view is only valid until
+            the next deal.
+        """
+        if self._cursor + n > self._buffer.size:
+            new_codes = self._rng.integers(
+                0,
+                N_CARDS_PER_DECK,
+                size=max(n, self._batch_size),
+                dtype=np.uint8,
+            )
+            self._buffer = np.concatenate((self._buffer[self._cursor :], new_codes))
+            self._cursor = 0
+
+        start = self._cursor
+        self._cursor += n
+
+        return self._buffer[start : self._cursor]
+
+    def deal(
+        self,
+        n=1,
+    ) -> list[Card]:
+        """
+        Deals `n` Cards, drawn i.i.d. uniformly from a single deck.
+
+        Params
+        ------
+        n : int (default = 1)
+            Number of Cards to be dealt
+
+        Returns
+        -------
+        cards : list[Card]
+            Cards that were dealt
+        """
+        return [_cards_by_code[code] for code in self.deal_codes(n)]
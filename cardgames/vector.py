@@ -0,0 +1,460 @@
+"""
+Module containing vectorized card game environments.
+"""
+
+### Imports ###
+import multiprocessing
+import os
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+from gymnasium.vector import VectorEnv, AutoresetMode
+from gymnasium.vector.utils import batch_space
+
+from cardgames.games import GameBase
+from cardgames.utils import all_codes, ranks, suits
+
+### Constants ###
+# Commands sent to SharedMemoryVectorEnv workers
+_reset_command = 1
+_step_command = 2
+_close_command = 3
+
+# Seconds between checks that workers are alive while waiting for them
+_poll_interval = 1.0
+
+
+### Vector Environment Classes ###
+class VectorGameEnv(VectorEnv):
+    """
+    Runs `num_envs` copies of `GameBase` with NumPy array operations.
+
+    The decks of all environments are held as a 2-D `uint8` array of card codes
+    (one shuffled shoe per row) with a cursor per environment, so a single
+    `step(actions)` deals, observes, rewards and terminates every environment
+    at once. Finished environments are reset in the same step (gymnasium's
+    `AutoresetMode.SAME_STEP`): their terminal observation is returned in
+    `infos["final_obs"]` and the returned observation is the reset one.
+
+    With a count `observation_mode`, observations are rows of a preallocated
+    `(num_envs, len(ranks) + 1)` float32 buffer, updated in place with one
+    scatter per step, and a read-only view of it is returned.
+    """
+
+    metadata = {"autoreset_mode": AutoresetMode.SAME_STEP}
+
+    def __init__(
+        self,
+        num_envs: int,
+        n_decks: int,
+        rank_scores: dict,
+        n_actions=None,
+        reward_func=None,
+        observation_mode="score",
+    ) -> None:
+        """
+        Initialize `num_envs` environments, each dealing from its own shoe of
+        `n_decks * N_CARDS_PER_DECK` cards.
+
+        Params
+        ------
+        num_envs : int
+            Number of environments stepped in parallel
+        n_decks : int
+            Number of decks in the shoe of each environment
+        rank_scores : dict
+            Mapping of rank to observed score, as for `GameBase`
+        n_actions : int (default = None)
+            Number of actions, as for `GameBase`
+        reward_func : callable (default = None)
+            Reward function, tabulated once as for `GameBase`
+        observation_mode : str (default = "score")
+            Observed score, or remaining ("counts") or dealt ("seen") rank
+            counts followed by the score, as for `GameBase`
+        """
+        game = GameBase(
+            n_decks,
+            rank_scores,
+            n_actions,
+            reward_func=reward_func,
+            observation_mode=observation_mode,
+        )
+
+        self.num_envs = num_envs
+        self.n_decks = n_decks
+        self.rank_scores = rank_scores
+        self.n_actions = game.n_actions
+        self.observation_mode = observation_mode
+
+        self.single_observation_space = game.observation_space
+        self.single_action_space = game.action_space
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+
+        # Rank -> score lookup (indexed by rank_index) and reward table
+        # (indexed by observation, action), shared with GameBase
+        self._rank_score_array = game._rank_score_array
+        self._reward_table = game._reward_table
+
+        self._deck_size = n_decks * all_codes.size
+        self._full_deck = np.tile(all_codes, n_decks)
+        self._codes = np.empty((num_envs, self._deck_size), dtype=np.uint8)
+        self._cursors = np.zeros(num_envs, dtype=np.int64)
+        self._env_ix = np.arange(num_envs)
+
+        # Count observations: buffer updated in place, returned as a view
+        if observation_mode == "score":
+            self._count_buffer = None
+        else:
+            self._count_buffer = np.zeros((num_envs, len(ranks) + 1), dtype=np.float32)
+            self._count_sign = -1 if observation_mode == "counts" else 1
+            self._count_view = self._count_buffer.view()
+            self._count_view.flags.writeable = False
+
+    def reset(self, *, seed=None, options=None):
+        """
+        Reset environments. All environments are reset unless
+        `options["reset_mask"]` selects a subset of them.
+        """
+        super().reset(seed=seed)
+
+        if options is not None and "reset_mask" in options:
+            mask = np.asarray(options["reset_mask"], dtype=bool)
+        else:
+            mask = np.ones(self.num_envs, dtype=bool)
+
+        self._reset_envs(mask)
+
+        if self._count_buffer is not None:
+            return self._count_view, {}
+
+        observations = np.zeros(self.num_envs, dtype=np.int64)
+        return observations, {}
+
+    def step(self, actions):
+        codes = self._codes[self._env_ix, self._cursors]
+        self._cursors += 1
+
+        rank_indices = codes >> 2
+        observations = self._rank_score_array[rank_indices]
+        rewards = self._reward_table[observations, actions]
+        terminations = self._cursors == self._deck_size
+        truncations = np.zeros(self.num_envs, dtype=bool)
+        infos = {}
+
+        if self._count_buffer is not None:
+            self._count_buffer[self._env_ix, rank_indices] += self._count_sign
+            self._count_buffer[:, -1] = observations
+            observations = self._count_view
+
+        if terminations.any():
+            final_obs = np.full(self.num_envs, None, dtype=object)
+            if self._count_buffer is None:
+                final_obs[terminations] = observations[terminations]
+            else:
+                for i in np.flatnonzero(terminations):
+                    final_obs[i] = observations[i].copy()
+            infos = {
+                "final_obs": final_obs,
+                "_final_obs": terminations.copy(),
+                "final_info": {},
+                "_final_info": terminations.copy(),
+            }
+
+            self._reset_envs(terminations)
+            if self._count_buffer is None:
+                observations[terminations] = 0  # 0 as first dummy observation
+
+        return observations, rewards, terminations, truncations, infos
+
+    def remaining_cards(self) -> np.ndarray:
+        """
+        Number of cards remaining in the deck of each environment.
+        """
+        return self._deck_size - self._cursors
+
+    # Private methods
+    def _reset_envs(self, mask: np.ndarray) -> None:
+        """
+        Deal fresh, independently shuffled shoes to the environments selected by
+        the boolean `mask`.
+        """
+        n_reset = int(np.count_nonzero(mask))
+        full_decks = np.broadcast_to(self._full_deck, (n_reset, self._deck_size))
+
+        self._codes[mask] = self.np_random.permuted(full_decks, axis=1)
+        self._cursors[mask] = 0
+
+        # Full remaining counts, or no seen cards, and 0 as the dummy score
+        if self._count_buffer is not None:
+            if self._count_sign < 0:
+                self._count_buffer[mask, :-1] = len(suits) * self.n_decks
+            else:
+                self._count_buffer[mask, :-1] = 0
+            self._count_buffer[mask, -1] = 0
+
+
+class SharedMemoryVectorEnv(VectorEnv):
+    """
+    Runs `num_envs` environments (e.g. `GameBase` or `GameSimulator`) in
+    groups across worker processes.
+
+    Actions, observations, rewards and done flags are exchanged through
+    preallocated `multiprocessing.shared_memory` buffers instead of pickled
+    pipe messages. Each step writes the actions, wakes every worker with a
+    semaphore and waits for them to finish, so the only per-step
+    synchronization is one semaphore release and acquire per worker.
+    Finished environments are reset in the same step, as in `VectorGameEnv`.
+    """
+
+    metadata = {"autoreset_mode": AutoresetMode.SAME_STEP}
+
+    def __init__(
+        self,
+        env_fn,
+        num_envs: int,
+        num_workers=None,
+        context=None,
+        copy=True,
+    ) -> None:
+        """
+        Params
+        ------
+        env_fn : callable
+            Function returning a new environment, e.g.
+            `functools.partial(GameBase, 1, simple_rank_scores)`. It must be
+            picklable for the "spawn" and "forkserver" start methods.
+        num_envs : int
+            Number of environments
+        num_workers : int (default = None)
+            Number of worker processes. Defaults to `os.cpu_count()`, and is
+            at most `num_envs`.
+        context : str (default = None)
+            `multiprocessing` start method. Defaults to the platform default.
+        copy : bool (default = True)
+            Whether `reset` and `step` return copies of the shared buffers.
+            Otherwise, they return views that the next call overwrites.
+        """
+        env = env_fn()
+        self.num_envs = num_envs
+        self.single_observation_space = env.observation_space
+        self.single_action_space = env.action_space
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+        env.close()
+
+        if num_workers is None:
+            num_workers = os.cpu_count()
+        num_workers = max(1, min(num_workers, num_envs))
+        self.num_workers = num_workers
+        self.copy = copy
+
+        # Shared buffers, indexed by environment (or worker for "commands")
+        obs_shape = self.single_observation_space.shape
+        obs_dtype = self.single_observation_space.dtype
+        specs = {
+            "actions": ((num_envs,), self.single_action_space.dtype),
+            "observations": ((num_envs, *obs_shape), obs_dtype),
+            "final_observations": ((num_envs, *obs_shape), obs_dtype),
+            "rewards": ((num_envs,), np.float64),
+            "terminations": ((num_envs,), np.bool_),
+            "truncations": ((num_envs,), np.bool_),
+            "reset_mask": ((num_envs,), np.bool_),
+            "seeds": ((num_envs,), np.int64),
+            "seeded": ((num_envs,), np.bool_),
+            "commands": ((num_workers,), np.int8),
+            "errors": ((num_workers,), np.bool_),
+        }
+        self._shms = {}
+        self._buffers = {}
+        for name, (shape, dtype) in specs.items():
+            size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            self._shms[name] = shm
+            self._buffers[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+        ctx = multiprocessing.get_context(context)
+        self._done = ctx.Semaphore(0)
+        self._error_queue = ctx.Queue()
+        self._starts = []
+        self._processes = []
+        bounds = np.linspace(0, num_envs, num_workers + 1).astype(int)
+        for worker_ix in range(num_workers):
+            start = ctx.Semaphore(0)
+            process = ctx.Process(
+                target=_worker,
+                args=(
+                    env_fn,
+                    worker_ix,
+                    int(bounds[worker_ix]),
+                    int(bounds[worker_ix + 1]),
+                    self._shms,
+                    specs,
+                    start,
+                    self._done,
+                    self._error_queue,
+                ),
+                daemon=True,
+            )
+            process.start()
+            self._starts.append(start)
+            self._processes.append(process)
+
+    def reset(self, *, seed=None, options=None):
+        """
+        Reset environments. An int `seed` seeds environment `i` with
+        `seed + i`; a list gives one seed per environment. All environments
+        are reset unless `options["reset_mask"]` selects a subset of them.
+        """
+        if isinstance(seed, (int, np.integer)):
+            seed = int(seed)
+            super().reset(seed=seed)
+        else:
+            super().reset()
+
+        buffers = self._buffers
+        if options is not None and "reset_mask" in options:
+            buffers["reset_mask"][:] = options["reset_mask"]
+        else:
+            buffers["reset_mask"][:] = True
+
+        if seed is None:
+            buffers["seeded"][:] = False
+        else:
+            if isinstance(seed, int):
+                seed = seed + np.arange(self.num_envs)
+            buffers["seeds"][:] = seed
+            buffers["seeded"][:] = True
+
+        self._dispatch(_reset_command)
+        self._wait()
+
+        return self._output("observations"), {}
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def step_async(self, actions) -> None:
+        """
+        Start stepping every environment, without waiting for the workers.
+        """
+        self._buffers["actions"][:] = actions
+        self._dispatch(_step_command)
+
+    def step_wait(self):
+        """
+        Wait for the step started by `step_async`, and return its results.
+        """
+        self._wait()
+
+        buffers = self._buffers
+        terminations = self._output("terminations")
+        truncations = self._output("truncations")
+        infos = {}
+
+        dones = terminations | truncations
+        if dones.any():
+            final_obs = np.full(self.num_envs, None, dtype=object)
+            for i in np.flatnonzero(dones):
+                final_obs[i] = buffers["final_observations"][i].copy()
+            infos = {
+                "final_obs": final_obs,
+                "_final_obs": dones,
+                "final_info": {},
+                "_final_info": dones.copy(),
+            }
+
+        return (
+            self._output("observations"),
+            self._output("rewards"),
+            terminations,
+            truncations,
+            infos,
+        )
+
+    def close_extras(self, **kwargs) -> None:
+        self._dispatch(_close_command)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+        self._buffers = {}
+        for shm in self._shms.values():
+            shm.close()
+            shm.unlink()
+        self._shms = {}
+
+    # Private methods
+    def _dispatch(self, command: int) -> None:
+        self._buffers["commands"][:] = command
+        for start in self._starts:
+            start.release()
+
+    def _wait(self) -> None:
+        """
+        Wait until every worker finished its command, and raise worker errors.
+        """
+        for _ in range(self.num_workers):
+            while not self._done.acquire(timeout=_poll_interval):
+                if not all(process.is_alive() for process in self._processes):
+                    raise RuntimeError("A worker process exited unexpectedly.")
+
+        if self._buffers["errors"].any():
+            self._buffers["errors"][:] = False
+            raise RuntimeError(f"Error in worker process:\n{self._error_queue.get()}")
+
+    def _output(self, name: str) -> np.ndarray:
+        buffer = self._buffers[name]
+        return buffer.copy() if self.copy else buffer
+
+
+### Worker Functions ###
+def _worker(env_fn, worker_ix, start, stop, shms, specs, start_sem, done_sem, errors):
+    """
+    Worker process loop of `SharedMemoryVectorEnv`, running environments
+    `start` to `stop`.
+    """
+    buffers = {
+        name: np.ndarray(shape, dtype=dtype, buffer=shms[name].buf)
+        for name, (shape, dtype) in specs.items()
+    }
+    envs = {i: env_fn() for i in range(start, stop)}
+
+    while True:
+        start_sem.acquire()
+        command = buffers["commands"][worker_ix]
+        if command == _close_command:
+            break
+
+        try:
+            if command == _reset_command:
+                for i, env in envs.items():
+                    if buffers["reset_mask"][i]:
+                        seed = (
+                            int(buffers["seeds"][i]) if buffers["seeded"][i] else None
+                        )
+                        buffers["observations"][i] = env.reset(seed=seed)[0]
+            else:
+                for i, env in envs.items():
+                    observation, reward, terminated, truncated, info = env.step(
+                        buffers["actions"][i]
+                    )
+                    if terminated or truncated:
+                        buffers["final_observations"][i] = observation
+                        observation = env.reset()[0]
+
+                    buffers["observations"][i] = observation
+                    buffers["rewards"][i] = reward
+                    buffers["terminations"][i] = terminated
+                    buffers["truncations"][i] = truncated
+        except Exception:
+            buffers["errors"][worker_ix] = True
+            errors.put(traceback.format_exc())
+
+        done_sem.release()
+
+    for env in envs.values():
+        env.close()
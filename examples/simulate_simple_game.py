@@ -1,71 +1,134 @@
 """
-Simulate and compare performance of RL agents vs statistical methods 
-for a simple card game. 
+Simulate and compare performance of RL agents vs statistical methods
+for a simple card game.
 """
 
 ### Imports ###
 import numpy as np
 import argparse
-from multiprocessing import Process, Lock
+import functools
 from stable_baselines3 import DQN
 
 from cardgames import games
+from cardgames.agents import QLearning
+from cardgames.sb3 import SB3VecEnv
+from cardgames.vector import SharedMemoryVectorEnv
+from cardgames.stats import RunningStats
 
 ### CONSTANTS ###
 n_decks = 1
-n_runs = int(1e4 / n_decks)
+max_runs = int(1e6 / n_decks)
+precision = 0.01  # Target half-width of the 95% confidence interval
+n_paired_runs = int(1e4 / n_decks)
 total_timesteps = int(1e5)
+tabular_steps = int(1e4)  # Batched steps of 64 environments
 
 
 ### Low-Level Functions ###
 def parse_args():
     parser = argparse.ArgumentParser(prog="Simulate Simple Card Game")
     parser.add_argument("-r", "--rl", action="store_true")
+    parser.add_argument(
+        "-n",
+        "--n-envs",
+        type=int,
+        default=1,
+        help="Number of environments stepped across worker processes for RL",
+    )
+    parser.add_argument(
+        "-c",
+        "--counts",
+        action="store_true",
+        help="Observe remaining rank counts for RL, so the agent can count cards",
+    )
+    parser.add_argument(
+        "-t",
+        "--tabular",
+        action="store_true",
+        help="Train a tabular Q-learning agent instead of DQN",
+    )
 
     return parser.parse_args()
 
 
-def simulate_run(l, env, name, action_func):
-    rewards = np.zeros((n_runs,))
-    for i in range(n_runs):
-        rewards[i] = sum(env.simulate_run(action_func))
+def simulate_run(name, strategy, seed=0):
+    env = games.GameSimulator(n_decks, games.simple_rank_scores)
+    stats = env.simulate_stats(strategy, max_runs, seed=seed, precision=precision)
+    low, high = stats.confidence_interval()
 
-    l.acquire()
-    try:
-        print(
-            f"Using {name} method: \n"
-            f"Mean reward per episode after {n_runs} runs:"
-            f" {rewards.mean() :.2f}\n"
-        )
-    finally:
-        l.release()
+    print(
+        f"Using {name} method: \n"
+        f"Mean reward per episode after {stats.count} runs:"
+        f" {stats.mean :.2f} (95% CI {low :.2f} to {high :.2f})\n"
+    )
+
+
+def compare_paired(stat_methods, baseline="random", seed=0):
+    env = games.GameSimulator(n_decks, games.simple_rank_scores)
+    rewards = env.compare(stat_methods, n_paired_runs, seed=seed)
+
+    print(f"Paired differences from the {baseline} method on the same decks:")
+    for name, totals in rewards.items():
+        if name == baseline:
+            continue
+
+        stats = RunningStats()
+        stats.update(totals - rewards[baseline])
+        low, high = stats.confidence_interval()
+        print(f"  {name}: {stats.mean :+.2f} (95% CI {low :+.2f} to {high :+.2f})")
 
 
 ### High-Level Functions ###
-def train_rl():
-    env = games.GameBase(n_decks, games.simple_rank_scores)
+def train_rl(n_envs=1, counts=False):
+    env_fn = functools.partial(
+        games.GameBase,
+        n_decks,
+        games.simple_rank_scores,
+        observation_mode="counts" if counts else "score",
+    )
+    if n_envs == 1:
+        env = env_fn()
+    else:
+        env = SB3VecEnv(SharedMemoryVectorEnv(env_fn, n_envs))
 
     model = DQN("MlpPolicy", env, verbose=1, seed=0, exploration_final_eps=0)
     model.learn(total_timesteps=total_timesteps)
 
 
+def train_tabular(counts=False):
+    agent = QLearning(
+        n_decks,
+        games.simple_rank_scores,
+        state_type="counts" if counts else "observation",
+        seed=0,
+    )
+    history = agent.train(tabular_steps, eval_every=tabular_steps // 10, seed=0)
+
+    for result in history:
+        print(
+            f"Q-learning after {result['n_transitions']} transitions:"
+            f" mean reward per episode {result['mean_reward'] :.2f}"
+        )
+
+
 def run_stats_methods():
-    env = games.GameSimulator(n_decks, games.simple_rank_scores)
-    env.reset()
     stat_methods = {
-        "random": env.random,
-        "mean score": env.mean_observation,
-        "expected score": env.expected_observation,
+        "random": "random",
+        "mean score": "mean_observation",
+        "expected score": "expected_observation",
     }
 
-    lock = Lock()
-    for name, func in stat_methods.items():
-        Process(target=simulate_run, args=(lock, env, name, func)).start()
+    for name, strategy in stat_methods.items():
+        simulate_run(name, strategy)
+
+    compare_paired(stat_methods)
 
 
 if __name__ == "__main__":
     args = parse_args()
-    if args.rl:
-        train_rl()
+    if args.tabular:
+        train_tabular(args.counts)
+    elif args.rl:
+        train_rl(args.n_envs, args.counts)
     else:
         run_stats_methods()
@@ -0,0 +1,115 @@
+"""
+Functions to test agents module.
+"""
+
+### Imports ###
+import numpy as np
+import pytest
+
+from cardgames.agents import QLearning, SARSA, TabularAgent
+from cardgames.games import GameSimulator, simple_rank_scores
+from cardgames.solvers import exact_expected_reward
+
+
+### Test Classes ###
+class TestTabularAgent:
+    @pytest.mark.parametrize("agent_type", [QLearning, SARSA])
+    @pytest.mark.parametrize("state_type", ["observation", "counts"])
+    def test_convergence(self, agent_type, state_type):
+        """
+        Assert that a short training run beats the "random" strategy and
+        comes close to "mean_observation".
+        """
+        agent = agent_type(1, simple_rank_scores, state_type=state_type, seed=0)
+        history = agent.train(1000, num_envs=32, eval_episodes=2000, seed=0)
+
+        mean_reward = history[-1]["mean_reward"]
+        random = exact_expected_reward("random", 1, simple_rank_scores)
+        mean = exact_expected_reward("mean_observation", 1, simple_rank_scores)
+        assert mean_reward > random + 3
+        assert mean_reward > mean - 1
+        assert history[-1]["n_transitions"] == 1000 * 32
+
+    def test_counts_beat_observation(self):
+        """
+        Assert that count states learn to count cards, beating the
+        "mean_observation" strategy, which observation states cannot.
+        """
+        agent = QLearning(1, simple_rank_scores, state_type="counts", seed=0)
+        history = agent.train(2000, eval_episodes=5000, seed=0)
+
+        mean = exact_expected_reward("mean_observation", 1, simple_rank_scores)
+        assert history[-1]["mean_reward"] > mean
+
+    def test_batched_update(self):
+        """
+        Assert that a batch of targets for the same (state, action) pair moves
+        its Q-value to their running mean, and leaves other pairs unchanged.
+        """
+        agent = QLearning(1, simple_rank_scores)
+        states = np.array([2, 2, 2, 5])
+        actions = np.array([1, 1, 1, 3])
+
+        agent._update(states, actions, np.array([1.0, 2.0, 3.0, 4.0]))
+        agent._update(states[:1], actions[:1], np.array([6.0]))
+
+        assert agent.q_table[2, 1] == pytest.approx(3.0)
+        assert agent.q_table[5, 3] == pytest.approx(4.0)
+        assert agent.visits[2, 1] == 4
+        assert agent.q_table.sum() == pytest.approx(7.0)
+
+    def test_next_values(self):
+        agent = SARSA(1, simple_rank_scores)
+        agent.q_table[4] = np.arange(agent.n_actions)
+        states = np.array([4, 4])
+        actions = np.array([0, 2])
+
+        assert np.all(agent._next_values(states, actions) == [0, 2])
+        assert np.all(QLearning._next_values(agent, states, actions) == 12)
+
+    @pytest.mark.parametrize("state_type", ["observation", "counts"])
+    def test_action_func(self, state_type):
+        """
+        Assert that stepping a `GameSimulator` with `action_func` gets the same
+        rewards as the vectorized evaluation on the same shoe.
+        """
+        agent = QLearning(1, simple_rank_scores, state_type=state_type, seed=0)
+        agent.train(200, seed=0)
+        env = GameSimulator(1, simple_rank_scores)
+
+        env.reset(seed=0)
+        codes = env.deck.codes[None, :].copy()  # The shoe in dealt order
+        rewards = env.simulate_run(agent.action_func(env), seed=0)
+
+        observations = env._rank_score_array[codes >> 2]
+        actions = agent.episode_actions(codes)
+        assert np.allclose(rewards, env.reward(observations, actions)[0])
+
+    def test_checkpoint(self, tmp_path):
+        """
+        Assert that checkpoints hold the Q-table, visit counts and history, and
+        that a loaded agent acts the same.
+        """
+        path = tmp_path / "agent"
+        agent = SARSA(1, simple_rank_scores, state_type="counts", seed=0)
+        agent.train(300, eval_every=100, eval_episodes=100, checkpoint=path, seed=0)
+
+        loaded = SARSA.load(path)
+        assert (tmp_path / "agent.npy").exists()
+        assert np.all(loaded.q_table == agent.q_table)
+        assert np.all(loaded.visits == agent.visits)
+        assert loaded.history == agent.history
+        assert len(loaded.history) == 3
+        assert np.all(loaded.evaluate(100, seed=1) == agent.evaluate(100, seed=1))
+
+    def test_state_type(self):
+        with pytest.raises(ValueError):
+            QLearning(1, simple_rank_scores, state_type="deck")
+
+    def test_abstract(self):
+        with pytest.raises(TypeError):
+            TabularAgent(1, simple_rank_scores)
+
+
+if __name__ == "__main__":
+    pytest.main()
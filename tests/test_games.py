@@ -3,12 +3,14 @@ Functions to test games module.
 """
 
 ### Imports ###
+import pickle
+
 import numpy as np
 import pytest
 from stable_baselines3.common.env_checker import check_env
 
 from cardgames.games import GameBase, GameSimulator, simple_rank_scores
-from cardgames.utils import Card, Hand, N_CARDS_PER_DECK
+from cardgames.utils import Card, Hand, N_CARDS_PER_DECK, ranks
 
 
 ### Test Classes ###
@@ -66,6 +68,68 @@ class TestGameBase:
                 assert calc_reward == calc_reward
                 assert 0 <= reward <= 1
 
+    def test_reward_table(self):
+        """
+        Assert that table lookups match `normalized_reward` for scalars and
+        arrays, and that float actions fall back to the formula.
+        """
+        env = GameBase(n_decks=1, rank_scores=simple_rank_scores)
+        observations = np.arange(env.observation_space.n)[:, None]
+        actions = np.arange(env.action_space.n)[None, :]
+        expected = env.normalized_reward(observations, actions)
+
+        assert np.array_equal(env.reward(observations, actions), expected)
+        assert env.reward(3, 5) == expected[3, 5]
+        assert env.reward(np.int64(3), np.int64(5)) == expected[3, 5]
+        assert env.reward(3, 5.5) == env.normalized_reward(3, 5.5)
+
+        # Integer actions outside the table are rejected, not wrapped around
+        for action in [-1, env.n_actions, np.int64(-1)]:
+            with pytest.raises(ValueError):
+                env.reward(3, action)
+            with pytest.raises(ValueError):
+                env.reward(observations, np.array([0, action]))
+
+    def test_reward_func(self):
+        """
+        Assert that a custom reward function is tabulated once at construction
+        and used by step.
+        """
+        calls = []
+
+        def reward_func(observation, action):
+            calls.append(1)
+            return (observation == action).astype(float)
+
+        env = GameBase(1, simple_rank_scores, reward_func=reward_func)
+        env.reset(seed=0)
+        for i in range(N_CARDS_PER_DECK):
+            observation, reward, terminated, truncated, info = env.step(4)
+            assert reward == float(observation == 4)
+
+        assert len(calls) == 1
+
+        with pytest.raises(ValueError):
+            GameBase(1, {**simple_rank_scores, "A": 13})
+
+    def test_scalar_reward_func(self):
+        """
+        Assert that a reward function of scalars only is vectorized, both for
+        the reward table and for batched non-integer actions.
+        """
+        env = GameSimulator(
+            1, simple_rank_scores, reward_func=lambda o, a: 1 if o > a else 0
+        )
+        observations = np.arange(env.n_observations)[:, None]
+        actions = np.arange(env.n_actions)[None, :]
+
+        assert np.array_equal(env._reward_table, observations > actions)
+        assert np.array_equal(
+            env.reward(observations, actions + 0.5), observations > actions
+        )
+        assert env.reward(3, 2.5) == 1
+        assert env.simulate_run(env.expected_observation, seed=0).sum() >= 0
+
     def test_reset(self):
         n_decks = 1
         env = GameBase(n_decks=n_decks, rank_scores=simple_rank_scores)
@@ -89,6 +153,165 @@ class TestGameBase:
             assert observation == next_score
             assert reward == 1  # Max reward
 
+    def test_reset_reuses_deck(self):
+        """
+        Assert that reset reuses the deck in place, and that resets with the
+        same seed deal the same cards (gymnasium-style seeding), with eager and
+        lazy shuffling.
+        """
+        for lazy_shuffle in [False, True]:
+            env = GameBase(2, simple_rank_scores, lazy_shuffle=lazy_shuffle)
+            check_env(env)
+
+            env.reset(seed=0)
+            deck = env.deck
+            observations1 = [env.step(0)[0] for i in range(20)]
+            env.reset()
+            assert env.deck is deck
+            assert env.deck.n_cards == 2 * N_CARDS_PER_DECK
+
+            env.reset(seed=0)
+            observations2 = [env.step(0)[0] for i in range(20)]
+            assert observations1 == observations2
+
+    def test_infinite_deck(self):
+        """
+        Assert that an infinite deck needs `max_steps`, passes the env checker,
+        and truncates episodes after `max_steps` steps.
+        """
+        with pytest.raises(ValueError):
+            GameBase(n_decks=None, rank_scores=simple_rank_scores)
+
+        max_steps = 500
+        env = GameBase(None, simple_rank_scores, max_steps=max_steps)
+        check_env(env)
+
+        env.reset(seed=0)
+        for i in range(max_steps):
+            observation, reward, terminated, truncated, info = env.step(0)
+
+            assert not terminated
+            assert truncated == (i == max_steps - 1)
+
+    def test_count_deck(self):
+        n_decks = 2
+        env = GameBase(n_decks, simple_rank_scores, deck_type="counts")
+        check_env(env)
+        env.reset(seed=0)
+
+        observations = []
+        terminated = False
+        while not terminated:
+            observation, reward, terminated, truncated, info = env.step(0)
+            observations.append(observation)
+
+        counts = np.bincount(observations, minlength=len(simple_rank_scores))
+        assert np.all(counts == 4 * n_decks)
+
+    def test_state(self):
+        """
+        Assert that restoring a snapshot replays the same steps, and that a
+        clone steps identically and independently, for each deck backend.
+        """
+        for kwargs in [
+            {},
+            {"lazy_shuffle": True},
+            {"deck_type": "counts"},
+            {"deck_type": "shoe"},
+            {"n_decks": None, "max_steps": 30},
+        ]:
+            env = GameBase(**{"n_decks": 1, **kwargs}, rank_scores=simple_rank_scores)
+            env.reset(seed=0)
+            env.step(0)
+
+            state = pickle.loads(pickle.dumps(env.get_state()))
+            steps = [env.step(3) for i in range(10)]
+            env.set_state(state)
+            assert [env.step(3) for i in range(10)] == steps
+            assert env.n_steps == 11
+
+            env.set_state(state)
+            clone = env.clone()
+            assert [clone.step(3) for i in range(10)] == steps
+            assert clone.deck is not env.deck
+            assert env.n_steps == 1
+            assert [env.step(3) for i in range(10)] == steps
+
+    def test_instrument(self):
+        """
+        Assert that an instrumented env matches an uninstrumented one, and
+        counts each phase once per step and each deck allocation.
+        """
+        env = GameBase(1, simple_rank_scores)
+        with pytest.raises(RuntimeError):
+            env.stats()
+
+        instrumented = GameBase(1, simple_rank_scores, instrument=True)
+        check_env(instrumented)
+        instrumented.clear_stats()
+
+        env.reset(seed=0)
+        instrumented.reset(seed=0)
+        for i in range(N_CARDS_PER_DECK):
+            assert env.step(3) == instrumented.step(3)
+        instrumented.reset()
+
+        stats = instrumented.stats()
+        assert stats["deck_allocations"] == 1
+        assert stats["reset"]["count"] == 2
+        for phase in ["deal", "observe", "reward", "step"]:
+            assert stats[phase]["count"] == N_CARDS_PER_DECK
+            assert 0 <= stats[phase]["time"] <= stats["step"]["time"]
+
+    def test_observation_counts(self):
+        """
+        Assert that count observations track the remaining and dealt rank
+        counts in one reused read-only buffer, with the same rewards as score
+        observations.
+        """
+        with pytest.raises(ValueError):
+            GameBase(1, simple_rank_scores, observation_mode="cards")
+
+        env = GameBase(1, simple_rank_scores)
+        remaining = GameBase(1, simple_rank_scores, observation_mode="counts")
+        seen = GameBase(2, simple_rank_scores, observation_mode="seen")
+        check_env(remaining)
+        check_env(seen)
+
+        env.reset(seed=0)
+        obs, info = remaining.reset(seed=0)
+        assert obs.dtype == np.float32
+        assert obs.shape == (len(ranks) + 1,)
+        assert np.array_equal(obs[:-1], np.full(len(ranks), 4))
+        assert obs[-1] == 0
+        with pytest.raises(ValueError):
+            obs[0] = 1
+
+        seen.reset(seed=0)
+        for i in range(N_CARDS_PER_DECK):
+            score, reward, terminated = env.step(3)[:3]
+            counts, counts_reward, counts_terminated = remaining.step(3)[:3]
+            seen_counts = seen.step(3)[0]
+
+            assert counts is obs
+            assert (counts_reward, counts_terminated) == (reward, terminated)
+            assert counts[-1] == score == env.card.rank_index
+            assert np.array_equal(counts[:-1], env.deck.rank_counts())
+            assert seen_counts[:-1].sum() == i + 1
+            assert remaining.observation_space.contains(counts)
+            assert seen.observation_space.contains(seen_counts)
+
+        # Snapshots and clones restore and copy the buffer
+        remaining.reset(seed=1)
+        remaining.step(0)
+        state = remaining.get_state()
+        clone = remaining.clone()
+        expected = remaining.step(0)[0].copy()
+        remaining.set_state(state)
+        assert np.array_equal(remaining.step(0)[0], expected)
+        assert np.array_equal(clone.step(0)[0], expected)
+        assert clone.step(0)[0] is not remaining.step(0)[0]
+
 
 class TestGameSimulator:
     def test_observation_distribution(self):
@@ -102,6 +325,124 @@ class TestGameSimulator:
         assert np.all(env.observation_distribution() == manual_observations)
         assert np.mean(env.observation_distribution()) == mean_observation
 
+    def test_remaining_rank_counts(self):
+        """
+        Step through most of an 8-deck shoe. Assert that the running rank
+        counts and expected observation match values recomputed from the
+        remaining Cards at every step.
+        """
+        n_decks = 8
+        env = GameSimulator(n_decks, simple_rank_scores)
+        env.reset(seed=0)
+
+        assert np.all(env.remaining_rank_counts() == 4 * n_decks)
+
+        for i in range(env.deck.n_cards - 1):
+            env.step(0)
+
+            if i % 50 == 0:
+                manual_ranks = [card.rank for card in env.deck.cards]
+                manual_counts = [manual_ranks.count(rank) for rank in ranks]
+                manual_observations = [env.rank_scores[r] for r in manual_ranks]
+
+                assert np.all(env.remaining_rank_counts() == manual_counts)
+                assert np.isclose(
+                    env.expected_observation(), np.mean(manual_observations)
+                )
+
+    def test_clone(self):
+        """
+        Assert that a clone keeps the running statistics of its own deck.
+        """
+        env = GameSimulator(1, simple_rank_scores)
+        env.reset(seed=0)
+        for i in range(10):
+            env.step(0)
+
+        clone = env.clone()
+        expected = env.expected_observation()
+        for i in range(20):
+            clone.step(0)
+
+        assert env.expected_observation() == expected
+        assert clone.remaining_rank_counts().sum() == N_CARDS_PER_DECK - 30
+        assert np.isclose(
+            clone.expected_observation(), np.mean(clone.observation_distribution())
+        )
+
+        state = env.get_state()
+        env.simulate_run(env.random)
+        env.set_state(state)
+        assert env.expected_observation() == expected
+
+    def test_shoe(self):
+        """
+        Play short episodes from a shoe, and assert that the shoe persists
+        across resets, that an episode ends when the cut card comes out, and
+        that the next reset reshuffles in place.
+        """
+        n_decks = 2
+        env = GameSimulator(
+            n_decks, simple_rank_scores, deck_type="shoe", max_steps=10, penetration=0.5
+        )
+        check_env(env)
+
+        env.reset(seed=0)
+        shoe = env.deck
+        n_steps = 0
+        terminated = False
+        while not terminated:
+            env.reset()
+            truncated = False
+            while not (terminated or truncated):
+                terminated, truncated = env.step(0)[2:4]
+                n_steps += 1
+
+            assert env.deck is shoe
+            assert env.remaining_rank_counts().sum() == shoe.n_unseen
+
+            # Unseen Cards behind the cut card are part of the distribution
+            scores = env.observation_distribution()
+            assert len(scores) == shoe.n_unseen
+            assert np.isclose(np.mean(scores), env.expected_observation())
+
+        assert n_steps == n_decks * N_CARDS_PER_DECK // 2
+        assert shoe.n_shuffles == 1
+
+        env.reset()
+        assert env.deck is shoe
+        assert shoe.n_shuffles == 2
+        assert shoe.running_count == 0
+        assert env.remaining_rank_counts().sum() == n_decks * N_CARDS_PER_DECK
+
+    @pytest.mark.parametrize("strategy", ["mean_observation", "expected_observation"])
+    def test_shoe_simulate_many(self, strategy):
+        """
+        Assert that array simulation of a shoe ends episodes at the cut card,
+        as stepping does, and rejects episodes that end before it.
+        """
+        n_decks = 2
+        env = GameSimulator(
+            n_decks, simple_rank_scores, deck_type="shoe", penetration=0.5
+        )
+        n_episodes = 200
+        rewards = env.simulate_many(strategy, n_episodes, seed=0)
+        stepped = np.array(
+            [
+                env.simulate_run(getattr(env, strategy), seed=seed)
+                for seed in range(n_episodes)
+            ]
+        )
+
+        assert stepped.shape == (n_episodes, n_decks * N_CARDS_PER_DECK // 2)
+        standard_error = np.hypot(rewards.std(), stepped.sum(axis=1).std())
+        standard_error /= np.sqrt(n_episodes)
+        assert abs(rewards.mean() - stepped.sum(axis=1).mean()) < 5 * standard_error
+
+        env = GameSimulator(n_decks, simple_rank_scores, deck_type="shoe", max_steps=10)
+        with pytest.raises(ValueError):
+            env.simulate_many(strategy, 1)
+
     def test_random(self):
         env = GameSimulator(1, simple_rank_scores)
         env.reset()
@@ -144,6 +485,125 @@ class TestGameSimulator:
 
         assert np.isclose(np.sum(rewards), expected_rewards)
 
+    def test_simulate_many(self):
+        """
+        Assert that `simulate_many` matches a step-by-step reference for the
+        "mean_observation" and "expected_observation" strategies, and that
+        "random" rewards are bounded by the number of steps.
+        """
+        env = GameSimulator(1, simple_rank_scores)
+        n_episodes = 20
+        n_steps = N_CARDS_PER_DECK
+
+        # Mean strategy: every episode earns the same total reward
+        expected_total = np.sum(env.simulate_run(env.mean_observation))
+        rewards = env.simulate_many(env.mean_observation, n_episodes, chunk_size=7)
+        assert rewards.shape == (n_episodes,)
+        assert np.allclose(rewards, expected_total)
+
+        # Expected strategy: replay the same shuffles step by step
+        rng = np.random.default_rng(0)
+        observations = env._shuffled_observations(rng, n_episodes)
+        rewards = env.simulate_many(
+            "expected_observation", n_episodes, seed=0, chunk_size=n_episodes
+        )
+        for episode, total in zip(observations, rewards):
+            manual_total = 0
+            for i, observation in enumerate(episode):
+                action = np.mean(episode[i:])
+                manual_total += env.reward(observation, action)
+
+            assert np.isclose(total, manual_total)
+
+        rewards = env.simulate_many("random", n_episodes, seed=0)
+        assert np.all((0 <= rewards) & (rewards <= n_steps))
+
+        with pytest.raises(ValueError):
+            env.simulate_many("unknown", n_episodes)
+
+    def test_compare(self):
+        """
+        Assert that strategies are replayed on the same shoes, which only
+        depend on the seed, and that results are paired per episode.
+        """
+        env = GameSimulator(1, simple_rank_scores)
+        n_episodes = 50
+        rewards = env.compare(
+            ["random", env.mean_observation, "expected_observation"],
+            n_episodes,
+            seed=0,
+            chunk_size=16,
+        )
+        assert list(rewards) == ["random", "mean_observation", "expected_observation"]
+        assert all(r.shape == (n_episodes,) for r in rewards.values())
+
+        # The same shoes, dealt without the random strategy
+        expected = env.compare({"expected": "expected_observation"}, n_episodes, 0)
+        assert np.array_equal(expected["expected"], rewards["expected_observation"])
+
+        # Replay the shoes step by step
+        deck_rng = np.random.default_rng(0).spawn(2)[0]
+        observations = env._shuffled_observations(deck_rng, n_episodes)
+        for episode, total in zip(observations, expected["expected"]):
+            actions = [np.mean(episode[i:]) for i in range(len(episode))]
+            assert np.isclose(total, sum(map(env.reward, episode, actions)))
+
+        with pytest.raises(ValueError):
+            env.compare(["unknown"], n_episodes)
+
+    def test_simulate_stats(self):
+        """
+        Assert that streamed statistics match `simulate_many` with the same
+        seed, that a precision target stops simulation early, and that action
+        functions are stepped.
+        """
+        env = GameSimulator(1, simple_rank_scores)
+        rewards = env.simulate_many("random", 500, seed=0, chunk_size=100)
+        stats = env.simulate_stats("random", 500, seed=0, chunk_size=100)
+        assert stats.count == 500
+        assert np.isclose(stats.mean, rewards.mean())
+        assert np.isclose(stats.variance, rewards.var(ddof=1))
+
+        stats = env.simulate_stats(
+            "random", 10**6, seed=0, precision=0.5, chunk_size=100
+        )
+        assert stats.count < 10**6
+        assert stats.half_width() <= 0.5
+
+        stats = env.simulate_stats(lambda: 6, 30, seed=0, chunk_size=10)
+        assert stats.count == 30
+        assert np.isclose(stats.mean, env.simulate_many("mean_observation", 1)[0])
+
+        with pytest.raises(ValueError):
+            env.simulate_stats("unknown", 10)
+
+    def test_simulate_difference(self):
+        env = GameSimulator(1, simple_rank_scores)
+        stats_a, stats_b = env.simulate_difference(
+            "expected_observation", "random", 10**6, seed=0, precision=1.0
+        )
+
+        assert stats_a.count == stats_b.count < 10**6
+        assert stats_a.mean > stats_b.mean
+
+    def test_simulate_infinite(self):
+        """
+        Assert that `simulate_run` and `simulate_many` play `max_steps` steps
+        per episode with an infinite deck, where the expected score strategy
+        is the mean score strategy.
+        """
+        max_steps = 100
+        env = GameSimulator(None, simple_rank_scores, max_steps=max_steps)
+
+        rewards = env.simulate_run(env.expected_observation)
+        assert len(rewards) == max_steps
+        assert env.expected_observation() == env.mean_observation()
+
+        expected = env.simulate_many("expected_observation", 50, seed=0)
+        mean = env.simulate_many("mean_observation", 50, seed=0)
+        assert np.array_equal(expected, mean)
+        assert np.all(expected <= max_steps)
+
 
 if __name__ == "__main__":
     pytest.main()
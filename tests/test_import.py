@@ -0,0 +1,74 @@
+"""
+Functions to test package import time and laziness.
+"""
+
+### Imports ###
+import json
+import subprocess
+import sys
+import tomllib
+from pathlib import Path
+
+import pytest
+
+import cardgames
+
+### Constants ###
+# Import time budget in seconds for light modules, including numpy
+import_budget = 1.0
+heavy_modules = ["gymnasium", "plotly", "toml", "torch"]
+
+
+### Functions ###
+def import_in_subprocess(module: str) -> dict:
+    """
+    Import `module` in a fresh interpreter, and return the import time and the
+    heavy modules it loaded.
+    """
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"loaded = [m for m in {heavy_modules!r} if m in sys.modules]\n"
+        "print(json.dumps({'time': elapsed, 'loaded': loaded}))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout)
+
+
+### Test Classes ###
+class TestImport:
+    def test_version(self):
+        """
+        Assert that the version constant matches pyproject.toml.
+        """
+        pyproject = Path(__file__).parent.parent / "pyproject.toml"
+        with open(pyproject, "rb") as f:
+            version = tomllib.load(f)["project"]["version"]
+
+        assert cardgames.__version__ == version
+
+    def test_light_modules(self):
+        """
+        Assert that light modules import within budget without loading heavy
+        dependencies.
+        """
+        for module in ["cardgames", "cardgames.utils", "cardgames.plotting"]:
+            result = import_in_subprocess(module)
+
+            assert result["loaded"] == []
+            assert result["time"] < import_budget
+
+    def test_lazy_submodules(self):
+        assert "games" in dir(cardgames)
+        assert cardgames.games.GameBase is not None
+
+        with pytest.raises(AttributeError):
+            cardgames.missing
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,85 @@
+"""
+Functions to test parallel module.
+"""
+
+### Imports ###
+import numpy as np
+import pytest
+
+from cardgames.games import GameSimulator, simple_rank_scores
+from cardgames.parallel import (
+    default_shard_size,
+    max_shard_size,
+    run_simulations,
+    _shard_lengths,
+)
+
+### Constants ###
+config = {
+    "n_decks": 1,
+    "rank_scores": simple_rank_scores,
+    "strategy": "random",
+    "seed": 0,
+}
+
+
+### Test Classes ###
+class TestRunSimulations:
+    def test_worker_invariance(self):
+        """
+        Assert that results are bit-for-bit identical for 1 and 3 workers, with
+        the default shard size and with one that does not divide the number of
+        episodes.
+        """
+        n_episodes = 2 * default_shard_size + 100
+        serial = run_simulations(config, n_episodes, workers=1)
+        parallel = run_simulations(config, n_episodes, workers=3)
+
+        assert serial.shape == (n_episodes,)
+        assert np.array_equal(serial, parallel)
+
+        serial = run_simulations(config, 1000, workers=1, shard_size=64)
+        parallel = run_simulations(config, 1000, workers=3, shard_size=64)
+        assert np.array_equal(serial, parallel)
+
+    def test_seed(self):
+        n_episodes = 100
+        rewards1 = run_simulations(config, n_episodes, workers=1, shard_size=32)
+        rewards2 = run_simulations({**config, "seed": 1}, n_episodes, workers=1)
+
+        assert not np.array_equal(rewards1, rewards2)
+        assert len(run_simulations(config, 0, workers=1)) == 0
+
+    def test_shard_lengths(self):
+        """
+        Assert that episodes are split in shards of `default_shard_size`
+        episodes by default, and of at most `max_shard_size` episodes.
+        """
+        assert _shard_lengths(1000) == [1000]
+        assert _shard_lengths(default_shard_size + 1) == [default_shard_size, 1]
+        assert _shard_lengths(10, shard_size=4) == [4, 4, 2]
+        assert _shard_lengths(max_shard_size + 1, shard_size=10 * max_shard_size) == [
+            max_shard_size,
+            1,
+        ]
+        assert _shard_lengths(0) == []
+
+    def test_env_config(self):
+        """
+        Assert that workers simulate the configured environment, matching
+        `simulate_many` on the same random stream, and that unknown settings
+        are rejected.
+        """
+        shoe_config = {**config, "deck_type": "shoe", "penetration": 0.5}
+        rewards = run_simulations(shoe_config, 100, workers=1)
+
+        env = GameSimulator(1, simple_rank_scores, deck_type="shoe", penetration=0.5)
+        seed = np.random.SeedSequence(0).spawn(1)[0]
+        assert np.array_equal(rewards, env.simulate_many("random", 100, seed=seed))
+
+        with pytest.raises(ValueError):
+            run_simulations({**config, "max_step": 10}, 100, workers=1)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,97 @@
+"""
+Functions to test planners module.
+"""
+
+### Imports ###
+import time
+
+import numpy as np
+import pytest
+
+from cardgames.games import GameSimulator, simple_rank_scores
+from cardgames.planners import RolloutPlanner
+
+### Constants ###
+# Three score groups, so that a few hundred rollouts separate the actions
+coarse_rank_scores = {
+    rank: min(score // 4, 2) for rank, score in simple_rank_scores.items()
+}
+
+
+### Test Classes ###
+class TestRolloutPlanner:
+    @pytest.mark.parametrize("tree", [False, True])
+    def test_action_func(self, tree):
+        """
+        Play an episode through `simulate_run`, and assert that the planner
+        picks a near-best action for the remaining cards at each step.
+        """
+        env = GameSimulator(1, coarse_rank_scores)
+        planner = RolloutPlanner(n_rollouts=1000, tree=tree, depth=3, seed=0)
+        plan = planner.action_func(env)
+        actions = np.arange(env.n_actions)
+
+        def action_func():
+            scores = env.observation_distribution()
+            expected_rewards = env.reward(scores[:, None], actions[None, :]).mean(0)
+            action = plan()
+            assert expected_rewards[action] >= expected_rewards.max() - 0.05
+            return action
+
+        rewards = env.simulate_run(action_func, seed=0)
+        assert len(rewards) == 52
+
+    def test_beats_random(self):
+        """
+        Assert that planned episodes score more than random ones.
+        """
+        env = GameSimulator(1, simple_rank_scores)
+        planner = RolloutPlanner(n_rollouts=256, seed=0)
+        planned = env.simulate_run(planner.action_func(env), seed=0).sum()
+        random = env.simulate_many("random", 100, seed=0).mean()
+
+        assert planned > random
+
+    def test_subtree_reuse(self):
+        """
+        Assert that the root after a step is the previous root's child for the
+        dealt card, and that a reset starts a new tree.
+        """
+        env = GameSimulator(1, simple_rank_scores)
+        planner = RolloutPlanner(n_rollouts=500, tree=True, depth=4, seed=0)
+
+        env.reset(seed=0)
+        env.step(planner.act(env))
+        root = planner._root
+        rank = int(np.argmax(root.counts - env.remaining_rank_counts()))
+        child = root.children.get(rank)
+
+        planner.act(env)
+        if child is not None:
+            assert planner._root is child
+            assert child.n > 0
+        assert np.array_equal(planner._root.counts, env.remaining_rank_counts())
+
+        env.reset(seed=1)
+        planner.act(env)
+        assert planner._root.counts.sum() == 52
+
+    def test_time_budget(self):
+        """
+        Assert that a decision stops near its time budget.
+        """
+        env = GameSimulator(1, simple_rank_scores)
+        env.reset(seed=0)
+        for tree in (False, True):
+            planner = RolloutPlanner(
+                n_rollouts=10**9, time_budget=0.05, tree=tree, batch_size=64
+            )
+
+            start = time.perf_counter()
+            action = planner.act(env)
+            assert time.perf_counter() - start < 1.0
+            assert 0 <= action < env.n_actions
+
+
+if __name__ == "__main__":
+    pytest.main()
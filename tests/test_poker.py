@@ -0,0 +1,116 @@
+"""
+Functions to test poker module.
+"""
+
+### Imports ###
+import itertools
+
+import numpy as np
+import pytest
+
+from cardgames.poker import (
+    HandEvaluator,
+    categories,
+    category,
+    n_strengths,
+    _rank_key,
+    _rank_multisets,
+)
+from cardgames.utils import BitHand, Card, Hand, N_CARDS_PER_DECK
+
+### Constants ###
+# Number of 5-card hands of each category
+category_counts = [1302540, 1098240, 123552, 54912, 10200, 5108, 3744, 624, 40]
+
+
+### Test Classes ###
+class TestHandEvaluator:
+    def test_rank_keys(self):
+        """
+        Assert that rank key sums identify the rank multisets of each size.
+        """
+        for n_cards in range(5, 8):
+            keys = [_rank_key(counts) for counts in _rank_multisets(n_cards)]
+            assert len(set(keys)) == len(keys)
+
+    def test_five_cards(self):
+        """
+        Evaluate every 5-card hand, and assert the number of strengths and of
+        hands in each category.
+        """
+        evaluator = HandEvaluator(cache_dir=None)
+        hands = np.array(
+            list(itertools.combinations(range(N_CARDS_PER_DECK), 5)), dtype=np.uint8
+        )
+        strengths = evaluator.evaluate(hands)
+
+        assert len(np.unique(strengths)) == n_strengths
+        assert strengths.min() == 1 and strengths.max() == n_strengths
+        assert np.bincount(category(strengths)).tolist() == category_counts
+
+    @pytest.mark.parametrize("n_cards", [6, 7])
+    def test_best_five(self, n_cards):
+        """
+        Assert that larger hands are as strong as their best 5-card subset.
+        """
+        evaluator = HandEvaluator(cache_dir=None)
+        rng = np.random.default_rng(n_cards)
+        hands = np.argsort(rng.random((2000, N_CARDS_PER_DECK)), axis=1)
+        hands = hands[:, :n_cards].astype(np.uint8)
+
+        subsets = np.array(list(itertools.combinations(range(n_cards), 5)))
+        best = evaluator.evaluate(hands[:, subsets]).max(axis=1)
+
+        assert np.array_equal(evaluator.evaluate(hands), best)
+
+    def test_examples(self):
+        """
+        Assert the categories and order of hands given as Cards, ids, Hands
+        and BitHands.
+        """
+        evaluator = HandEvaluator(cache_dir=None)
+        royal_flush = ["10S", "JS", "QS", "KS", "AS", "2C", "3D"]
+        wheel = BitHand(*[Card(id) for id in ["AC", "2D", "3H", "4S", "5C"]])
+        six_high = Hand(*[Card(id) for id in ["2C", "3D", "4H", "5S", "6C"]])
+        full_house = ["KC", "KD", "KH", "2S", "2C", "2D"]
+
+        assert categories[category(evaluator.evaluate_hand(royal_flush))] == (
+            "Straight Flush"
+        )
+        assert category(evaluator.evaluate_hand(wheel)) == categories.index("Straight")
+        assert evaluator.evaluate_hand(wheel) < evaluator.evaluate_hand(six_high)
+        assert categories[category(evaluator.evaluate_hand(full_house))] == (
+            "Full House"
+        )
+
+        with pytest.raises(ValueError):
+            evaluator.evaluate(np.zeros((10, 4), dtype=np.uint8))
+
+    def test_compare(self):
+        evaluator = HandEvaluator(cache_dir=None)
+        hands = np.array([[0, 4, 8, 12, 16], [1, 5, 9, 13, 21]], dtype=np.uint8)
+        assert evaluator.compare(hands, hands[::-1]).tolist() == [1, -1]
+        assert evaluator.compare(hands, hands).tolist() == [0, 0]
+
+    def test_cache(self, tmp_path):
+        """
+        Assert that tables are saved in the cache directory on first use, and
+        then loaded from it.
+        """
+        evaluator = HandEvaluator(cache_dir=None)
+        cached = HandEvaluator(cache_dir=tmp_path)
+        paths = sorted(tmp_path.iterdir())
+        assert len(paths) == 4
+        assert not any(path.name.endswith(".tmp.npy") for path in paths)
+
+        loaded = HandEvaluator(cache_dir=str(tmp_path))
+        assert isinstance(loaded.rank_tables[7], np.memmap)
+        for n_cards in range(5, 8):
+            assert np.array_equal(
+                cached.rank_tables[n_cards], evaluator.rank_tables[n_cards]
+            )
+        assert np.array_equal(loaded.flush_table, evaluator.flush_table)
+
+
+if __name__ == "__main__":
+    pytest.main()
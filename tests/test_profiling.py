@@ -0,0 +1,46 @@
+"""
+Functions to test profiling module.
+"""
+
+### Imports ###
+import pytest
+
+from cardgames.games import GameSimulator, simple_rank_scores
+from cardgames.profiling import PhaseStats, phases, profile
+
+
+### Test Classes ###
+class TestPhaseStats:
+    def test_snapshot(self):
+        stats = PhaseStats()
+        stats.add("deal", 1.0)
+        stats.add("deal", 2.0)
+        stats.deck_allocations += 1
+        snapshot = stats.snapshot()
+
+        assert snapshot["deal"] == {"count": 2, "time": 3.0, "mean": 1.5}
+        assert snapshot["step"] == {"count": 0, "time": 0.0, "mean": 0.0}
+        assert snapshot["deck_allocations"] == 1
+        assert set(phases) <= set(snapshot)
+
+        stats.clear()
+        assert stats.snapshot()["deal"]["count"] == 0
+
+
+class TestProfile:
+    def test_report(self, tmp_path):
+        """
+        Assert that profiling a batch of runs writes a report that lists
+        simulate_run.
+        """
+        env = GameSimulator(1, simple_rank_scores)
+        path = tmp_path / "report.txt"
+        with profile(path, limit=10):
+            for i in range(5):
+                env.simulate_run(env.random, seed=i)
+
+        assert "simulate_run" in path.read_text()
+
+
+if __name__ == "__main__":
+    pytest.main()
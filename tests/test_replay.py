@@ -0,0 +1,163 @@
+"""
+Functions to test replay module.
+"""
+
+### Imports ###
+import numpy as np
+import pytest
+
+from cardgames.games import GameBase, GameSimulator, simple_rank_scores
+from cardgames.replay import ReplayDeck, TrajectoryStore, TrajectoryWriter
+from cardgames.utils import Deck, N_CARDS_PER_DECK, all_codes
+
+
+### Test Classes ###
+class TestTrajectoryStore:
+    def test_append(self, tmp_path):
+        """
+        Assert that episodes appended across chunks and writer sessions are
+        read back in order, memory-mapped.
+        """
+        codes = np.array([Deck(1, seed=i).codes for i in range(10)])
+        with TrajectoryWriter(tmp_path, N_CARDS_PER_DECK, chunk_size=4) as writer:
+            writer.append(codes[0])
+            writer.append(codes[1:7])
+        with TrajectoryWriter(tmp_path, N_CARDS_PER_DECK, chunk_size=4) as writer:
+            writer.append(codes[7:])
+
+        store = TrajectoryStore(tmp_path)
+        assert len(store) == 10
+        assert isinstance(store.codes(0), np.memmap)
+        for i in range(10):
+            assert np.array_equal(store.codes(i), codes[i])
+
+        with pytest.raises(IndexError):
+            store.codes(10)
+        with pytest.raises(ValueError):
+            store.rewards(0)
+        with pytest.raises(ValueError):
+            TrajectoryWriter(tmp_path, N_CARDS_PER_DECK, record_steps=True)
+
+    def test_record(self, tmp_path):
+        """
+        Assert that recorded rewards match `simulate_many` with the same seed.
+        """
+        env = GameSimulator(1, simple_rank_scores)
+        store = env.record(tmp_path, 20, "expected_observation", seed=0, chunk_size=8)
+        rewards = env.simulate_many("expected_observation", 20, seed=0, chunk_size=8)
+
+        assert store.fields == ("codes", "actions", "rewards")
+        for i in range(20):
+            assert np.array_equal(np.sort(store.codes(i)), all_codes)
+            assert np.isclose(store.rewards(i).sum(), rewards[i])
+
+
+class TestReplayDeck:
+    def test_deal(self, tmp_path):
+        env = GameSimulator(1, simple_rank_scores)
+        store = env.record(tmp_path, 3, seed=0)
+        deck = ReplayDeck(tmp_path, start=1)
+
+        assert deck.n_cards == N_CARDS_PER_DECK
+        assert np.array_equal(deck.deal_codes(5), store.codes(1)[:5])
+        assert deck.deal()[0].code == store.codes(1)[5]
+        deck.cut(10)
+        assert deck.n_cards == N_CARDS_PER_DECK - 16
+        assert deck.cut_cards.n_cards == 10
+        assert deck.rank_counts().sum() == deck.n_cards
+
+        deck.reset()
+        assert np.array_equal(deck.codes, store.codes(1))
+
+        deck.shuffle()  # Keeps the start shoe
+        assert deck.episode == 1
+        deck.shuffle()
+        assert deck.episode == 2
+        with pytest.raises(IndexError):
+            deck.shuffle()
+
+        deck = ReplayDeck(store, start=2, loop=True)
+        deck.shuffle()
+        deck.shuffle()
+        assert deck.episode == 0
+
+    def test_replay_env(self, tmp_path):
+        """
+        Assert that replaying recorded shoes and actions through an env
+        reproduces the recorded rewards.
+        """
+        recorder = GameSimulator(1, simple_rank_scores)
+        store = recorder.record(tmp_path, 3, "random", seed=0)
+
+        env = GameBase(1, simple_rank_scores)
+        env.reset(options={"deck": ReplayDeck(store)})
+        for i in range(3):
+            if i > 0:
+                env.reset()
+            rewards = [env.step(action)[1] for action in store.actions(i)]
+            assert np.allclose(rewards, store.rewards(i))
+            assert env.deck.n_cards == 0
+
+    def test_action_dtype(self, tmp_path):
+        """
+        Assert that discrete actions are stored as small integers and
+        mean-based actions as floats, and that stores keep their dtype.
+        """
+        env = GameSimulator(1, simple_rank_scores)
+        store = env.record(tmp_path / "random", 2, "random", seed=0)
+        assert store.actions(0).dtype == np.uint8
+        assert np.allclose(
+            store.rewards(0),
+            env.reward(env._rank_score_array[store.codes(0) >> 2], store.actions(0)),
+        )
+
+        store = env.record(tmp_path / "mean", 2, "mean_observation", seed=0)
+        assert store.actions(0).dtype == np.float64
+        assert np.all(store.actions(0) == env.mean_observation())
+
+        with pytest.raises(ValueError):
+            env.record(tmp_path / "random", 1, "mean_observation")
+        with pytest.raises(ValueError):
+            TrajectoryWriter(
+                tmp_path / "random", N_CARDS_PER_DECK, record_steps=True
+            ).append(store.codes(0), 6.5, 0.0)
+
+    def test_replay_random(self, tmp_path):
+        """
+        Assert that the "random" strategy can be stepped on a replayed shoe,
+        which has no generator of its own.
+        """
+        GameSimulator(1, simple_rank_scores).record(tmp_path, 2, seed=0)
+        env = GameSimulator(1, simple_rank_scores)
+        env.reset(options={"deck": ReplayDeck(tmp_path)})
+
+        rewards = env.simulate_run(env.random)  # Resets to the next shoe
+        assert rewards.shape == (N_CARDS_PER_DECK,)
+        assert env.deck.episode == 1
+
+    def test_replay_seeded(self, tmp_path):
+        """
+        Assert that a seeded reset keeps a replayed shoe, only seeding the
+        env generator, so seeded runs deal the next recorded shoe.
+        """
+        store = GameSimulator(1, simple_rank_scores).record(tmp_path, 3, seed=0)
+        env = GameSimulator(1, simple_rank_scores)
+        deck = ReplayDeck(store)
+        env.reset(options={"deck": deck})
+
+        rewards = env.simulate_run(env.random, seed=0)
+        assert env.deck is deck
+        assert deck.episode == 1
+
+        env.reset(seed=0)
+        assert env.deck is deck
+        assert deck.episode == 2
+        assert np.array_equal(deck.codes, store.codes(2))
+
+        # The seed only seeds the random actions
+        env.reset(options={"deck": ReplayDeck(store)})
+        assert np.array_equal(env.simulate_run(env.random, seed=0), rewards)
+
+
+if __name__ == "__main__":
+    pytest.main()
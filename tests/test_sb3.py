@@ -0,0 +1,66 @@
+"""
+Functions to test sb3 module.
+"""
+
+### Imports ###
+import functools
+
+import numpy as np
+import pytest
+from stable_baselines3 import DQN
+
+from cardgames.games import GameBase, simple_rank_scores
+from cardgames.sb3 import SB3VecEnv
+from cardgames.utils import N_CARDS_PER_DECK
+from cardgames.vector import SharedMemoryVectorEnv, VectorGameEnv
+
+
+### Test Classes ###
+class TestSB3VecEnv:
+    def test_terminal_observation(self):
+        """
+        Assert that done environments report their terminal observation in the
+        stable-baselines3 info format.
+        """
+        env = SB3VecEnv(VectorGameEnv(3, 1, simple_rank_scores))
+        env.seed(0)
+        observations = env.reset()
+        assert observations.shape == (3,)
+
+        actions = np.zeros(3, dtype=np.int64)
+        for i in range(N_CARDS_PER_DECK):
+            observations, rewards, dones, infos = env.step(actions)
+
+        assert dones.all()
+        assert all("terminal_observation" in info for info in infos)
+        assert not any(info["TimeLimit.truncated"] for info in infos)
+
+    def test_learn(self):
+        venv = SharedMemoryVectorEnv(
+            functools.partial(GameBase, 1, simple_rank_scores), 4, num_workers=2
+        )
+        env = SB3VecEnv(venv)
+        model = DQN("MlpPolicy", env, seed=0, learning_starts=50)
+        model.learn(total_timesteps=200)
+        env.close()
+
+        assert venv.closed
+
+    def test_replay_buffer(self):
+        """
+        Assert that transitions stored from count observations, which are
+        views of a buffer updated in place, keep distinct observations and
+        next observations.
+        """
+        venv = VectorGameEnv(4, 1, simple_rank_scores, observation_mode="counts")
+        model = DQN("MlpPolicy", SB3VecEnv(venv), seed=0, learning_starts=50)
+        model.learn(total_timesteps=200)
+
+        buffer = model.replay_buffer
+        observations = buffer.observations[: buffer.pos]
+        next_observations = buffer.next_observations[: buffer.pos]
+        assert np.all(np.any(observations != next_observations, axis=-1))
+
+
+if __name__ == "__main__":
+    pytest.main()
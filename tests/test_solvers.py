@@ -0,0 +1,156 @@
+"""
+Functions to test solvers module.
+"""
+
+### Imports ###
+import numpy as np
+import pytest
+
+from cardgames.games import GameSimulator, simple_rank_scores
+from cardgames.solvers import (
+    OptimalPolicy,
+    exact_expected_reward,
+    _exact_expected_reward,
+)
+from cardgames.utils import ranks
+
+### Constants ###
+# Blackjack-style scores, where several ranks share a score
+grouped_rank_scores = {
+    rank: min(score, 8) for rank, score in simple_rank_scores.items()
+}
+
+# Three score groups, small enough to enumerate every composition in tests
+coarse_rank_scores = {
+    rank: min(score // 4, 2) for rank, score in simple_rank_scores.items()
+}
+
+
+### Test Classes ###
+class TestExactExpectedReward:
+    def test_mean_observation(self):
+        env = GameSimulator(1, simple_rank_scores)
+        total = np.sum(env.simulate_run(env.mean_observation))
+
+        assert np.isclose(
+            exact_expected_reward("mean_observation", 1, simple_rank_scores), total
+        )
+
+    @pytest.mark.parametrize(
+        "strategy, n_decks, rank_scores",
+        [
+            ("random", 1, simple_rank_scores),
+            ("expected_observation", 1, simple_rank_scores),
+            ("expected_observation", 2, grouped_rank_scores),
+        ],
+    )
+    def test_monte_carlo(self, strategy, n_decks, rank_scores):
+        """
+        Assert that the exact expected reward is within 5 standard errors of
+        the Monte Carlo estimate from `simulate_many`.
+        """
+        n_episodes = 100_000
+        env = GameSimulator(n_decks, rank_scores)
+        rewards = env.simulate_many(strategy, n_episodes, seed=0)
+        standard_error = rewards.std() / np.sqrt(n_episodes)
+
+        exact = exact_expected_reward(strategy, n_decks, rank_scores)
+
+        assert abs(exact - rewards.mean()) < 5 * standard_error
+
+    def test_cache(self):
+        env = GameSimulator(1, simple_rank_scores)
+        exact_expected_reward(env.expected_observation, 1, simple_rank_scores)
+        hits = _exact_expected_reward.cache_info().hits
+        exact_expected_reward("expected_observation", 1, simple_rank_scores)
+
+        assert _exact_expected_reward.cache_info().hits == hits + 1
+
+
+class TestOptimalPolicy:
+    def test_table(self):
+        """
+        Assert that every table entry maximizes the expected reward of the
+        next card for its composition, independent of the chunk size.
+        """
+        policy = OptimalPolicy.solve(1, coarse_rank_scores)
+        env = GameSimulator(1, coarse_rank_scores)
+        scores = np.unique(list(coarse_rank_scores.values()))
+        actions = np.arange(env.n_actions)
+
+        max_counts = [16, 16, 20]  # Cards per score group in one deck
+        compositions = np.stack(
+            np.meshgrid(*[np.arange(n + 1) for n in max_counts], indexing="ij"),
+            axis=-1,
+        ).reshape(-1, 3)
+        rewards = compositions @ env.reward(scores[:, None], actions[None, :])
+        best = rewards.max(axis=1)
+
+        index = compositions @ np.array([1, 17, 17 * 17])
+        chosen = rewards[np.arange(len(rewards)), policy.table[index]]
+        assert np.allclose(chosen, best)
+
+        small_chunks = OptimalPolicy.solve(1, coarse_rank_scores, chunk_size=50)
+        assert np.array_equal(policy.table, small_chunks.table)
+
+    def test_save_load(self, tmp_path):
+        path = tmp_path / "policy.npy"
+        policy = OptimalPolicy.solve(2, coarse_rank_scores, path=path)
+        loaded = OptimalPolicy.load(path)
+
+        assert isinstance(loaded.table, np.memmap)
+        assert np.array_equal(
+            loaded.table, OptimalPolicy.solve(2, coarse_rank_scores).table
+        )
+        assert loaded.rank_scores == coarse_rank_scores
+
+        with pytest.raises(ValueError):
+            OptimalPolicy.solve(1, simple_rank_scores, max_states=1000)
+
+    def test_action_func(self):
+        """
+        Play an episode with the policy's action function, and assert that
+        every action maximizes the expected reward over the remaining cards.
+        """
+        policy = OptimalPolicy.solve(1, coarse_rank_scores)
+        env = GameSimulator(1, coarse_rank_scores)
+        action_func = policy.action_func(env)
+        actions = np.arange(env.n_actions)
+
+        env.reset(seed=0)
+        terminated = False
+        while not terminated:
+            scores = env.observation_distribution()
+            expected_rewards = env.reward(scores[:, None], actions[None, :]).mean(0)
+            action = action_func()
+
+            assert np.isclose(expected_rewards[action], expected_rewards.max())
+            terminated = env.step(action)[2]
+
+    def test_episode_actions(self):
+        """
+        Assert that batched actions match per-step lookups, and that the
+        policy beats the expected observation strategy on the same shoes.
+        """
+        policy = OptimalPolicy.solve(1, coarse_rank_scores)
+        env = GameSimulator(1, coarse_rank_scores)
+        codes = env._shuffled_codes(np.random.default_rng(0), 3)
+        actions = policy.episode_actions(codes)
+
+        for episode_codes, episode_actions in zip(codes, actions):
+            rank_counts = np.full(len(ranks), 4)
+            for code, action in zip(episode_codes, episode_actions):
+                assert action == policy.action(rank_counts)
+                rank_counts[code >> 2] -= 1
+
+        rewards = env.compare(
+            {"optimal": policy, "expected": "expected_observation"}, 200, seed=0
+        )
+        assert rewards["optimal"].mean() >= rewards["expected"].mean()
+
+        with pytest.raises(ValueError):
+            GameSimulator(2, coarse_rank_scores).compare([policy], 1)
+
+
+if __name__ == "__main__":
+    pytest.main()
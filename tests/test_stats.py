@@ -0,0 +1,65 @@
+"""
+Functions to test stats module.
+"""
+
+### Imports ###
+import math
+
+import numpy as np
+import pytest
+
+from cardgames.stats import RunningStats, difference_half_width, z_score
+
+
+### Test Classes ###
+class TestRunningStats:
+    def test_batches(self):
+        """
+        Assert that batched updates match NumPy statistics of all values.
+        """
+        values = np.random.default_rng(0).normal(10, 3, size=10_000)
+        stats = RunningStats((0, 20), bins=200)
+        for batch in np.array_split(values, [1, 7, 500, 4000]):
+            stats.update(batch)
+
+        assert stats.count == values.size
+        assert np.isclose(stats.mean, values.mean())
+        assert np.isclose(stats.variance, values.var(ddof=1))
+        assert stats.min == values.min() and stats.max == values.max()
+        assert stats.histogram.sum() == values.size
+
+        for q in [0.01, 0.5, 0.99]:
+            assert abs(stats.quantile(q) - np.quantile(values, q)) <= 0.2
+
+    def test_merge(self):
+        values = np.arange(100, dtype=float)
+        stats1, stats2 = RunningStats((0, 100)), RunningStats((0, 100))
+        stats1.update(values[:30])
+        stats2.update(values[30:])
+        stats1.merge(stats2)
+
+        assert stats1.count == 100
+        assert np.isclose(stats1.mean, values.mean())
+        assert np.isclose(stats1.variance, values.var(ddof=1))
+
+        with pytest.raises(ValueError):
+            stats1.merge(RunningStats())
+
+    def test_confidence_interval(self):
+        stats = RunningStats()
+        assert math.isnan(stats.half_width())
+        with pytest.raises(ValueError):
+            stats.quantile(0.5)
+
+        stats.update([1.0, 3.0])
+        low, high = stats.confidence_interval(0.95)
+        half_width = z_score(0.95) * math.sqrt(2) / math.sqrt(2)
+
+        assert np.isclose(high - low, 2 * half_width)
+        assert np.isclose(
+            difference_half_width(stats, stats), math.sqrt(2) * half_width
+        )
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -3,8 +3,23 @@ Functions to test utils module.
 """
 
 ### Imports ###
+import pickle
+import numpy as np
 import pytest
-from cardgames.utils import Card, Hand, Deck, ranks, suits, all_ids, N_CARDS_PER_DECK
+from cardgames.utils import (
+    Card,
+    Hand,
+    BitHand,
+    Deck,
+    Shoe,
+    CountDeck,
+    InfiniteDeck,
+    hi_lo_weights,
+    ranks,
+    suits,
+    all_ids,
+    N_CARDS_PER_DECK,
+)
 
 ### Constants ###
 # Generate list of ranks and suits corresopnding to all_ids list
@@ -16,6 +31,23 @@ for rank in ranks.keys():
         matching_suits.append(suit)  # Add corresponding suit to list
 
 
+### Functions ###
+def assert_state_roundtrip(deck, n=10):
+    """
+    Assert that restoring a pickled snapshot replays the same deals, and that
+    a clone deals the same Cards without affecting the original.
+    """
+    state = pickle.loads(pickle.dumps(deck.get_state()))
+    codes = deck.deal_codes(n).copy()
+    deck.set_state(state)
+    assert np.array_equal(deck.deal_codes(n), codes)
+
+    deck.set_state(state)
+    clone = deck.clone()
+    assert np.array_equal(clone.deal_codes(n), codes)
+    assert np.array_equal(clone.deal_codes(n), deck.deal_codes(2 * n)[n:])
+
+
 class TestCard:
     def test_id(self) -> None:
         for card_id in all_ids:
@@ -51,6 +83,34 @@ class TestCard:
 
             assert card.name == card_name
 
+    def test_indices(self) -> None:
+        rank_keys = list(ranks.keys())
+        suit_keys = list(suits.keys())
+        for code, card_id in enumerate(all_ids):
+            card = Card(card_id)
+
+            assert card.code == code
+            assert rank_keys[card.rank_index] == matching_ranks[code]
+            assert suit_keys[card.suit_index] == matching_suits[code]
+            assert Card.from_code(code) is card
+
+    def test_interned(self) -> None:
+        """
+        Assert that Cards are interned, immutable, and usable in sets, and
+        that pickling round-trips to the same instance.
+        """
+        for card_id in all_ids:
+            assert Card(card_id) is Card(card_id)
+            assert pickle.loads(pickle.dumps(Card(card_id))) is Card(card_id)
+
+        assert len({Card(card_id) for card_id in all_ids * 2}) == len(all_ids)
+
+        with pytest.raises(AttributeError):
+            Card("AS").rank = "K"
+
+        with pytest.raises(ValueError):
+            Card("1X")
+
 
 class TestHand:
     def test_ids(self):
@@ -112,6 +172,18 @@ class TestHand:
             for prev_id in prev_ids:
                 assert prev_id not in hand.ids
 
+    def test_cards_immutable(self):
+        """
+        Assert that `cards` is an immutable snapshot, so that in-place edits
+        raise instead of silently changing nothing.
+        """
+        hand = Hand(Card("4H"), Card("8C"))
+        with pytest.raises(AttributeError):
+            hand.cards.append(Card("AS"))
+
+        hand.add_cards(Card("AS"))
+        assert hand.cards == (Card("4H"), Card("8C"), Card("AS"))
+
     def test_remove_by_id(self):
         """
         Fill Hand with one deck's worth of Cards, then remove Cards one-by-one
@@ -130,8 +202,119 @@ class TestHand:
             for prev_id in prev_ids:
                 assert prev_id not in hand.ids
 
+    def test_contains_and_count(self):
+        """
+        Fill Hand with `n_decks` decks' worth of Cards, then remove one deck's
+        worth. Assert that `contains` and `count` track every id, code and
+        Card throughout.
+        """
+        n_decks = 3
+        hand = Hand(*[Card(id) for id in all_ids * n_decks])
+
+        for code, id in enumerate(all_ids):
+            assert hand.count(id) == n_decks
+            assert hand.contains(code)
+            assert Card(id) in hand
+
+        hand.remove_by_id(*all_ids)
+
+        for id in all_ids:
+            assert hand.count(Card(id)) == n_decks - 1
+
+        assert len(hand) == N_CARDS_PER_DECK * (n_decks - 1)
+
+    def test_bulk_codes(self):
+        """
+        Add and remove Cards in bulk by code. Assert that the remaining Cards
+        keep their order, and that removing a missing Card raises.
+        """
+        hand = Hand()
+        hand.add_codes(np.arange(N_CARDS_PER_DECK, dtype=np.uint8))
+        hand.remove_codes(np.arange(0, N_CARDS_PER_DECK, 2))
+
+        assert hand.ids == all_ids[1::2]
+        assert np.all(hand.codes == np.arange(1, N_CARDS_PER_DECK, 2))
+
+        with pytest.raises(ValueError):
+            hand.remove_codes([0])
+
+
+class TestBitHand:
+    def test_set_operations(self):
+        """
+        Assert that union, intersection, membership and counts of single-deck
+        BitHands match Python sets of card codes.
+        """
+        rng = np.random.default_rng(0)
+        for i in range(20):
+            codes_a = set(rng.choice(N_CARDS_PER_DECK, 10, replace=False).tolist())
+            codes_b = set(rng.choice(N_CARDS_PER_DECK, 10, replace=False).tolist())
+            hand_a = BitHand.from_codes(sorted(codes_a))
+            hand_b = BitHand(*[Card.from_code(code) for code in codes_b])
+
+            assert (hand_a | hand_b).codes.tolist() == sorted(codes_a | codes_b)
+            assert (hand_a & hand_b).codes.tolist() == sorted(codes_a & codes_b)
+            assert len(hand_a) == 10
+            for code in range(N_CARDS_PER_DECK):
+                assert (code in hand_a) == (code in codes_a)
+                assert hand_a.contains(all_ids[code]) == (code in codes_a)
+
+            assert np.array_equal(
+                hand_a.rank_counts(), Hand(*hand_a.cards).rank_counts()
+            )
+            assert hand_a.suit_counts().sum() == 10
+            assert BitHand.from_mask(hand_a.mask) == hand_a
+
+        hand = BitHand(Card("AS"))
+        with pytest.raises(ValueError):
+            hand.add_cards(Card("AS"))
+        hand.remove_cards(Card("AS"))
+        assert hand.mask == 0
+        with pytest.raises(ValueError):
+            hand.remove_cards(Card("AS"))
+
+    def test_multiple_decks(self):
+        """
+        Assert that multi-deck BitHands count repeated Cards, with the larger
+        and smaller count in unions and intersections.
+        """
+        n_decks = 3
+        hand_a = BitHand.from_codes([0, 0, 5], n_decks=n_decks)
+        hand_b = BitHand.from_codes([0, 5, 5, 5, 7], n_decks=n_decks)
+
+        assert hand_a.count(0) == 2
+        assert len(hand_a) == 3
+        assert (hand_a | hand_b).codes.tolist() == [0, 0, 5, 5, 5, 7]
+        assert (hand_a & hand_b).codes.tolist() == [0, 5]
+        assert np.array_equal(hand_a.suit_counts(), [2, 1, 0, 0])
+
+        with pytest.raises(ValueError):
+            hand_b.add_codes([5])
+        with pytest.raises(ValueError):
+            hand_a | BitHand()
+
+        hand_a.remove_codes([0, 0])
+        assert 0 not in hand_a
+        assert hand_a == BitHand.from_codes([5], n_decks=n_decks)
+
 
 class TestDeck:
+    def test_set_cards(self):
+        """
+        Deal from a Deck, then assign its Cards. Assert that the Deck holds
+        exactly the assigned Cards, undealt and in order.
+        """
+        deck = Deck(seed=0)
+        deck.shuffle()
+        deck.deal(5)
+
+        cards = [Card("AS"), Card("4H"), Card("AS")]
+        deck.cards = cards
+        assert deck.ids == ["AS", "4H", "AS"]
+        assert deck.n_cards == 3
+        assert deck.rank_counts().sum() == 3
+        assert deck.deal()[0] == Card("AS")
+
     def test_seed(self):
         """
         Initialize two Decks with the same seed. Shuffle and assert that
@@ -204,6 +387,258 @@ class TestDeck:
         assert remaining_ids == deck.ids
         assert cut_ids == deck.cut_cards.ids
 
+    def test_deal_codes(self):
+        """
+        Initialize Deck with `n_decks` worth of Cards, then deal all codes
+        in chunks. Assert that the dealt codes are `uint8`, appear in `all_ids`
+        order, and that `n_cards` decreases by the number of Cards dealt.
+        """
+        n_decks = 8
+        deck = Deck(n_decks)
+        n_total = n_decks * N_CARDS_PER_DECK
+
+        dealt = []
+        while deck.n_cards > 0:
+            codes = deck.deal_codes(min(5, deck.n_cards))
+            assert codes.dtype == np.uint8
+            dealt.extend(codes.tolist())
+            assert deck.n_cards == n_total - len(dealt)
+
+        assert [all_ids[code] for code in dealt] == all_ids * n_decks
+
+        with pytest.raises(ValueError):
+            deck.deal()
+
+    def test_shuffle_after_deal(self):
+        """
+        Deal part of a Deck, then shuffle. Assert that the remaining Cards
+        are a permutation of the Cards that were not dealt.
+        """
+        n_dealt = 20
+        deck = Deck(seed=0)
+        deck.deal(n_dealt)
+        deck.shuffle()
+
+        assert deck.n_cards == N_CARDS_PER_DECK - n_dealt
+        assert sorted(deck.ids) == sorted(all_ids[n_dealt:])
+
+    def test_reset(self):
+        """
+        Deal and cut Cards, then reset. Assert that the full Deck is restored
+        in place, in the same order.
+        """
+        deck = Deck(2, seed=0)
+        deck.shuffle()
+        ids = deck.ids
+        storage = deck._codes
+
+        deck.deal(30)
+        deck.cut(10)
+        deck.reset()
+
+        assert deck.ids == ids
+        assert deck._codes is storage
+        assert deck.cut_cards.n_cards == 0
+        assert np.all(deck.rank_counts() == 8)
+
+    def test_lazy(self):
+        """
+        Shuffle lazy Decks and deal them fully. Assert that each deals a
+        permutation of the Deck, that reading `ids` fixes the order that is
+        then dealt, and that lazy cuts remove random Cards.
+        """
+        n_decks = 2
+        deck = Deck(n_decks, seed=0, lazy=True)
+        deck.shuffle()
+        dealt = [card.id for card in deck.deal(n_decks * N_CARDS_PER_DECK)]
+
+        assert sorted(dealt) == sorted(all_ids * n_decks)
+        assert dealt != all_ids * n_decks
+
+        deck.reset()
+        deck.shuffle()
+        deck.deal(10)
+        ids = deck.ids
+        assert [card.id for card in deck.deal(deck.n_cards)] == ids
+
+        deck.reset()
+        deck.shuffle()
+        deck.cut(20)
+        assert deck.cut_cards.ids != (all_ids * n_decks)[-20:]
+        assert np.all(deck.counts() + deck.cut_cards.counts() == n_decks)
+
+    def test_state(self):
+        """
+        Round-trip snapshots of eager and lazy Decks mid-deal, including cut
+        Cards and a Deck whose size changed.
+        """
+        for lazy in [False, True]:
+            deck = Deck(2, seed=0, lazy=lazy)
+            deck.shuffle()
+            deck.deal(5)
+            deck.cut(7)
+            state = deck.get_state()
+            deck.reset()
+            deck.set_state(state)
+            assert deck.cut_cards.n_cards == 7
+            assert deck.n_cards == 2 * N_CARDS_PER_DECK - 12
+
+            assert_state_roundtrip(deck)
+
+        deck = Deck(1, seed=0)
+        state = deck.get_state()
+        deck.remove_codes([0, 1])
+        deck.set_state(state)
+        assert deck.n_cards == N_CARDS_PER_DECK
+
+
+class TestShoe:
+    def test_penetration(self):
+        """
+        Deal rounds from a Shoe, and assert that it only reshuffles, in
+        place, once the cut card has come out.
+        """
+        n_decks = 6
+        shoe = Shoe(n_decks, seed=0, penetration=0.75)
+        storage = shoe._codes
+        cut_index = int(0.75 * n_decks * N_CARDS_PER_DECK)
+
+        shoe.shuffle()
+        dealt = []
+        while shoe.n_cards:
+            shoe.reset()
+            shoe.shuffle()
+            dealt.append(shoe.deal_codes(min(7, shoe.n_cards)).copy())
+
+        assert shoe.n_shuffles == 1
+        assert shoe.n_dealt == cut_index
+        assert shoe.n_unseen == n_decks * N_CARDS_PER_DECK - cut_index
+        assert shoe.needs_shuffle
+
+        # Cards behind the cut card are unseen, and are counted as remaining
+        dealt = np.concatenate(dealt)
+        expected = np.full(len(ranks), len(suits) * n_decks)
+        expected -= np.bincount(dealt >> 2, minlength=len(ranks))
+        assert np.array_equal(shoe.rank_counts(), expected)
+        assert np.array_equal(shoe.dealt_rank_counts(), len(suits) * n_decks - expected)
+
+        shoe.shuffle()
+        assert shoe.n_shuffles == 2
+        assert shoe.n_cards == cut_index
+        assert shoe._codes is storage
+        assert np.array_equal(
+            np.sort(storage), np.repeat(np.arange(N_CARDS_PER_DECK), n_decks)
+        )
+
+        with pytest.raises(ValueError):
+            Shoe(penetration=0)
+
+    def test_count(self):
+        """
+        Assert that the running and true counts match the Hi-Lo count of the
+        dealt Cards.
+        """
+        shoe = Shoe(2, seed=0)
+        shoe.shuffle()
+        weights = np.array([hi_lo_weights[rank] for rank in ranks])
+
+        dealt = shoe.deal_codes(30).copy()
+        running_count = weights[dealt >> 2].sum()
+        assert shoe.running_count == running_count
+        assert np.isclose(shoe.true_count, running_count / ((104 - 30) / 52))
+
+        counted = Shoe(2, seed=0, count_weights={rank: 1 for rank in ranks})
+        counted.shuffle()
+        counted.deal_codes(30)
+        assert counted.running_count == 30
+
+    def test_count_dealt_out(self):
+        """
+        Assert that the true count of a Shoe without a cut card is 0.0 once
+        every Card is dealt.
+        """
+        shoe = Shoe(1, seed=0, penetration=1)
+        shoe.shuffle()
+        shoe.deal_codes(N_CARDS_PER_DECK)
+
+        assert shoe.n_unseen == 0
+        assert shoe.true_count == 0.0
+
+    def test_state(self):
+        shoe = Shoe(2, seed=0)
+        shoe.shuffle()
+        shoe.deal(5)
+        assert_state_roundtrip(shoe)
+
+        running_count = shoe.running_count
+        clone = shoe.clone()
+        clone.reshuffle()
+        assert clone.running_count == 0
+        assert shoe.running_count == running_count
+
+
+class TestCountDeck:
+    def test_deal(self):
+        """
+        Deal a full `n_decks` shoe, and assert that each id was dealt exactly
+        `n_decks` times and that the counts track the remaining Cards.
+        """
+        n_decks = 4
+        deck = CountDeck(n_decks, seed=0)
+        dealt = []
+        while deck.n_cards > 0:
+            dealt.extend(deck.deal(min(7, deck.n_cards)))
+            assert deck.counts().sum() == deck.n_cards
+            assert deck.rank_counts().sum() == deck.n_cards
+
+        for id in all_ids:
+            assert [card.id for card in dealt].count(id) == n_decks
+
+        with pytest.raises(ValueError):
+            deck.deal()
+
+    def test_state(self):
+        deck = CountDeck(2, seed=0)
+        deck.deal(5)
+        assert_state_roundtrip(deck)
+
+    def test_seed(self):
+        deck1 = CountDeck(seed=0)
+        deck2 = CountDeck(seed=0)
+        deck3 = CountDeck(seed=1)
+
+        codes1 = deck1.deal_codes(N_CARDS_PER_DECK)
+        assert np.array_equal(codes1, deck2.deal_codes(N_CARDS_PER_DECK))
+        assert not np.array_equal(codes1, deck3.deal_codes(N_CARDS_PER_DECK))
+
+    def test_cut(self):
+        n_decks = 2
+        deck = CountDeck(n_decks, seed=0)
+        deck.cut(30)
+
+        assert deck.n_cards == n_decks * N_CARDS_PER_DECK - 30
+        assert np.all(deck.counts() + deck.cut_cards.counts() == n_decks)
+
+
+class TestInfiniteDeck:
+    def test_deal(self):
+        """
+        Deal more Cards than one batch holds, and assert that every code is
+        dealt and the Deck never runs out.
+        """
+        deck = InfiniteDeck(seed=0, batch_size=100)
+        codes = np.concatenate([deck.deal_codes(37).copy() for i in range(300)])
+
+        assert deck.n_cards == np.inf
+        assert np.all(np.bincount(codes, minlength=N_CARDS_PER_DECK) > 0)
+        assert len(deck.deal(500)) == 500
+        assert np.all(deck.rank_counts() == len(suits))
+
+    def test_state(self):
+        deck = InfiniteDeck(seed=0, batch_size=8)
+        deck.deal(5)
+        assert_state_roundtrip(deck)
+
 
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,190 @@
+"""
+Functions to test vector module.
+"""
+
+### Imports ###
+import functools
+
+import numpy as np
+import pytest
+
+from cardgames.games import GameBase, simple_rank_scores
+from cardgames.utils import N_CARDS_PER_DECK
+from cardgames.vector import SharedMemoryVectorEnv, VectorGameEnv
+
+
+### Test Classes ###
+class TestVectorGameEnv:
+    def test_spaces(self):
+        num_envs = 8
+        envs = VectorGameEnv(num_envs, 1, simple_rank_scores)
+        observations, infos = envs.reset(seed=0)
+
+        assert envs.observation_space.contains(observations)
+        assert envs.action_space.shape == (num_envs,)
+        assert infos == {}
+
+    def test_episode(self):
+        """
+        Step every environment through a full shoe. Assert that each
+        environment observes every score `4 * n_decks` times, that rewards
+        match `GameBase.reward`, and that all environments terminate and
+        autoreset on the last card.
+        """
+        num_envs = 16
+        n_decks = 2
+        envs = VectorGameEnv(num_envs, n_decks, simple_rank_scores)
+        game = GameBase(n_decks, simple_rank_scores)
+        envs.reset(seed=0)
+
+        deck_size = n_decks * N_CARDS_PER_DECK
+        seen = np.zeros((deck_size, num_envs), dtype=np.int64)
+        for i in range(deck_size):
+            actions = envs.action_space.sample()
+            observations, rewards, terminations, truncations, infos = envs.step(actions)
+
+            if i < deck_size - 1:
+                seen[i] = observations
+                assert not terminations.any()
+            else:
+                seen[i] = infos["final_obs"].astype(np.int64)
+                assert terminations.all()
+                assert infos["_final_obs"].all()
+                assert np.all(observations == 0)
+                assert np.all(envs.remaining_cards() == deck_size)
+
+            assert not truncations.any()
+            assert np.allclose(rewards, game.reward(seen[i], actions))
+
+        for env_seen in seen.T:
+            counts = np.bincount(env_seen, minlength=len(simple_rank_scores))
+            assert np.all(counts == 4 * n_decks)
+
+    def test_seed(self):
+        """
+        Assert that two vector environments reset with the same seed observe
+        the same cards, and that a different seed gives different cards.
+        """
+        envs = [VectorGameEnv(4, 1, simple_rank_scores) for i in range(3)]
+        for env, seed in zip(envs, [0, 0, 1]):
+            env.reset(seed=seed)
+
+        actions = np.zeros(4, dtype=np.int64)
+        observations = [
+            np.array([env.step(actions)[0] for i in range(10)]) for env in envs
+        ]
+
+        assert np.all(observations[0] == observations[1])
+        assert np.any(observations[0] != observations[2])
+
+    def test_reset_mask(self):
+        envs = VectorGameEnv(4, 1, simple_rank_scores)
+        envs.reset(seed=0)
+        envs.step(np.zeros(4, dtype=np.int64))
+
+        mask = np.array([True, False, True, False])
+        envs.reset(options={"reset_mask": mask})
+
+        assert np.all(envs.remaining_cards() == np.where(mask, 52, 51))
+
+    @pytest.mark.parametrize("observation_mode", ["counts", "seen"])
+    def test_observation_counts(self, observation_mode):
+        """
+        Assert that count observations track the cards dealt in each
+        environment, end the shoe at zero remaining (or all seen) and are
+        refilled on autoreset.
+        """
+        num_envs = 4
+        envs = VectorGameEnv(
+            num_envs, 1, simple_rank_scores, observation_mode=observation_mode
+        )
+        observations, infos = envs.reset(seed=0)
+        assert envs.observation_space.contains(observations)
+        assert not observations.flags.writeable
+
+        full = 4 if observation_mode == "counts" else 0
+        assert np.all(observations[:, :-1] == full)
+
+        actions = np.zeros(num_envs, dtype=np.int64)
+        for i in range(N_CARDS_PER_DECK - 1):
+            observations, rewards, terminations, truncations, infos = envs.step(actions)
+
+        dealt = np.abs(observations[:, :-1] - full).sum(axis=1)
+        assert np.all(dealt == N_CARDS_PER_DECK - 1)
+
+        observations, rewards, terminations, truncations, infos = envs.step(actions)
+        assert terminations.all()
+        for final_obs in infos["final_obs"]:
+            assert np.all(final_obs[:-1] == 4 - full)
+        assert np.all(observations[:, :-1] == full)
+        assert np.all(observations[:, -1] == 0)
+
+
+class TestSharedMemoryVectorEnv:
+    def test_matches_single_envs(self):
+        """
+        Assert that stepping across worker processes matches stepping seeded
+        `GameBase` instances one by one, including same-step autoreset.
+        """
+        num_envs = 5
+        env_fn = functools.partial(GameBase, 1, simple_rank_scores)
+        envs = SharedMemoryVectorEnv(env_fn, num_envs, num_workers=2)
+        singles = [env_fn() for i in range(num_envs)]
+
+        observations, infos = envs.reset(seed=10)
+        for i, env in enumerate(singles):
+            assert observations[i] == env.reset(seed=10 + i)[0]
+
+        rng = np.random.default_rng(0)
+        for step in range(N_CARDS_PER_DECK + 3):
+            actions = rng.integers(0, envs.single_action_space.n, size=num_envs)
+            observations, rewards, terminations, truncations, infos = envs.step(actions)
+
+            for i, env in enumerate(singles):
+                observation, reward, terminated, truncated, info = env.step(actions[i])
+                assert rewards[i] == reward
+                assert terminations[i] == terminated
+                if terminated:
+                    assert infos["final_obs"][i] == observation
+                    observation = env.reset()[0]
+                assert observations[i] == observation
+
+        mask = np.array([True, False, False, False, True])
+        observations, infos = envs.reset(options={"reset_mask": mask})
+        assert np.all(observations[mask] == 0)
+        envs.close()
+
+    def test_seeds(self):
+        """
+        Assert that a list of seeds, or a NumPy integer seed, seeds each
+        environment as an int seed does.
+        """
+        num_envs = 3
+        env_fn = functools.partial(GameBase, 1, simple_rank_scores)
+        envs = SharedMemoryVectorEnv(env_fn, num_envs, num_workers=1)
+        actions = np.zeros(num_envs, dtype=np.int64)
+
+        observations = []
+        for seed in [5, np.int64(5), [5, 6, 7], np.arange(5, 8)]:
+            envs.reset(seed=seed)
+            observations.append(envs.step(actions)[0])
+        envs.close()
+
+        for other in observations[1:]:
+            assert np.all(other == observations[0])
+
+    def test_worker_error(self):
+        envs = SharedMemoryVectorEnv(
+            functools.partial(GameBase, 1, simple_rank_scores), 2, num_workers=2
+        )
+        envs.reset(seed=0)
+
+        with pytest.raises(RuntimeError):
+            envs.step(np.array([0, 100]))  # Action out of range
+
+        envs.close()
+        assert envs.closed
+
+
+if __name__ == "__main__":
+    pytest.main()